@@ -1,15 +1,37 @@
 import pygame
 import random
 import math
+import argparse
+import struct
+import time
 
-# Initialize Pygame
-pygame.init()
+import numpy as np
+
+import engine
+import render
+import scores
+import sound
+from brickLevels import Level, LevelPack, LevelFile, UNBREAKABLE, default_level_data
+from snapshot import GameRandom
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
 
+# Balls
+BALL_RADIUS = 8
+BALL_SPEED = 6
+MAX_BALLS = 500
+TRAIL_BALLS = 3  # trails are only drawn for the first few balls
+SPLIT_ANGLE = 0.35
+STRESS_BALLS = 500
+
+# Power-ups
+POWERUP_CHANCE = 0.1
+POWERUP_SPEED = 3
+MAX_PARTICLES = 1500
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -28,6 +50,18 @@ GOLD = (255, 215, 0)
 # Brick colors for different rows
 BRICK_COLORS = [RED, ORANGE, YELLOW, GREEN, CYAN, BLUE, PURPLE, PINK]
 
+# Snapshot header: paddle x, score, lives, bricks left, game over, won,
+# ball count, power-up count, rng state. Then the ball arrays (x, y, vx,
+# vy as float64), one hit-count byte per brick and (x, y) per power-up.
+SNAPSHOT_HEADER = struct.Struct('<iiii??HHQ')
+
+def build_dot(color, radius):
+    # A filled circle; blitting it at (x - radius, y - radius) covers the
+    # same pixels as pygame.draw.circle centred on (x, y)
+    dot = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+    pygame.draw.circle(dot, color, (radius, radius), radius)
+    return dot
+
 class Particle:
     def __init__(self, x, y, color):
         self.x = x
@@ -44,11 +78,10 @@ class Particle:
         self.vy += 0.1  # gravity
         self.life -= 1
         
-    def draw(self, screen):
+    def draw(self, out):
         if self.life > 0:
-            alpha = int(255 * (self.life / self.max_life))
-            color = (*self.color, alpha)
-            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), 2)
+            out.sprite(('brick_particle', self.color), lambda: build_dot(self.color, 2),
+                       (int(self.x) - 2, int(self.y) - 2))
 
 class Paddle:
     def __init__(self, x, y):
@@ -66,218 +99,460 @@ class Paddle:
         if keys[pygame.K_RIGHT] and self.x < SCREEN_WIDTH - self.width:
             self.x += self.speed
             
-    def draw(self, screen):
+    def build_sprite(self):
+        sprite = pygame.Surface((self.width, self.height))
         # Draw paddle with gradient effect
         for i in range(self.height):
             color_factor = 1 - (i / self.height) * 0.3
             color = tuple(int(c * color_factor) for c in self.color)
-            pygame.draw.rect(screen, color, 
-                           (self.x, self.y + i, self.width, 1))
+            pygame.draw.rect(sprite, color, (0, i, self.width, 1))
         
         # Draw border
-        pygame.draw.rect(screen, WHITE, 
-                        (self.x, self.y, self.width, self.height), 2)
+        pygame.draw.rect(sprite, WHITE, (0, 0, self.width, self.height), 2)
+        return sprite
+        
+    def draw(self, out):
+        out.sprite('brick_paddle', self.build_sprite, (self.x, self.y))
     
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.width, self.height)
 
-class Ball:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 8
-        self.speed = 6
-        self.vx = random.choice([-1, 1]) * self.speed * 0.7
-        self.vy = -self.speed
+class Balls:
+    """Every ball in play, kept in arrays so they all move and bounce at once"""
+    def __init__(self, rng):
+        self.rng = rng
+        self.radius = BALL_RADIUS
+        self.speed = BALL_SPEED
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.vx = np.empty(0)
+        self.vy = np.empty(0)
         self.color = WHITE
-        self.trail = []
+        # One trail per ball, but only the first TRAIL_BALLS ever grow
+        self.trails = []
+        
+    def __len__(self):
+        return len(self.x)
+    
+    def add(self, x, y):
+        # A fresh serve, exactly like the single ball always had
+        vx = self.rng.choice([-1, 1]) * self.speed * 0.7
+        self.add_many([x], [y], [vx], [-self.speed])
+    
+    def add_many(self, x, y, vx, vy):
+        room = MAX_BALLS - len(self)
+        self.x = np.append(self.x, x[:room])
+        self.y = np.append(self.y, y[:room])
+        self.vx = np.append(self.vx, vx[:room])
+        self.vy = np.append(self.vy, vy[:room])
+        self.trails += [[] for _ in range(len(self.x) - len(self.trails))]
+    
+    def spray(self, x, y, count):
+        # Stress mode: `count` balls fanned out upwards from one point
+        angles = np.array([self.rng.uniform(-1.2, 1.2) for _ in range(count)])
+        self.add_many(np.full(count, float(x)), np.full(count, float(y)),
+                      self.speed * np.sin(angles), -self.speed * np.cos(angles))
+    
+    def split(self):
+        # Multi-ball power-up: every ball gains two twins at +/- SPLIT_ANGLE
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        for angle in (SPLIT_ANGLE, -SPLIT_ANGLE):
+            cos, sin = math.cos(angle), math.sin(angle)
+            self.add_many(x, y, vx * cos - vy * sin, vx * sin + vy * cos)
+    
+    def remove(self, lost):
+        keep = ~lost
+        self.x = self.x[keep]
+        self.y = self.y[keep]
+        self.vx = self.vx[keep]
+        self.vy = self.vy[keep]
+        self.trails = [trail for trail, kept in zip(self.trails, keep) if kept]
+    
+    def snapshot(self):
+        return np.concatenate((self.x, self.y, self.vx, self.vy)).tobytes()
+    
+    def restore(self, data, offset, count):
+        arrays = np.frombuffer(data, float, count * 4, offset).reshape(4, count).copy()
+        self.x, self.y, self.vx, self.vy = arrays
+        # Trails start over rather than jump across the screen
+        self.trails = [[] for _ in range(count)]
+        return offset + arrays.nbytes
         
     def update(self):
         self.x += self.vx
         self.y += self.vy
         
         # Add trail effect
-        self.trail.append((self.x, self.y))
-        if len(self.trail) > 10:
-            self.trail.pop(0)
-        
-        # Wall collision
-        if self.x - self.radius <= 0 or self.x + self.radius >= SCREEN_WIDTH:
-            self.vx = -self.vx
-            self.x = max(self.radius, min(SCREEN_WIDTH - self.radius, self.x))
-        
-        if self.y - self.radius <= 0:
-            self.vy = -self.vy
-            self.y = self.radius
-            
-    def draw(self, screen):
-        # Draw trail
-        for i, pos in enumerate(self.trail):
-            alpha = int(255 * (i / len(self.trail)) * 0.5)
-            radius = int(self.radius * (i / len(self.trail)))
-            if radius > 0:
-                pygame.draw.circle(screen, (255, 255, 255), 
-                                 (int(pos[0]), int(pos[1])), radius)
-        
-        # Draw ball with glow effect
+        for i in range(min(TRAIL_BALLS, len(self))):
+            trail = self.trails[i]
+            trail.append((self.x[i], self.y[i]))
+            if len(trail) > 10:
+                trail.pop(0)
+        
+        # Wall collision; clamping balls that did not touch a wall is a no-op
+        side = (self.x - self.radius <= 0) | (self.x + self.radius >= SCREEN_WIDTH)
+        self.vx[side] = -self.vx[side]
+        np.clip(self.x, self.radius, SCREEN_WIDTH - self.radius, out=self.x)
+        
+        top = self.y - self.radius <= 0
+        self.vy[top] = -self.vy[top]
+        self.y[top] = self.radius
+    
+    def build_sprite(self):
+        # Glow and core drawn once; balls are then blitted in one batch
+        size = (self.radius + 2) * 2 + 1
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        center = (self.radius + 2, self.radius + 2)
         for i in range(3):
             color = tuple(max(0, c - i * 50) for c in self.color)
-            pygame.draw.circle(screen, color, 
-                             (int(self.x), int(self.y)), self.radius + i)
-        
-        # Draw core
-        pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius)
+            pygame.draw.circle(sprite, color, center, self.radius + i)
+        pygame.draw.circle(sprite, WHITE, center, self.radius)
+        return sprite
+            
+    def draw(self, out):
+        # Draw trails
+        for trail in self.trails[:TRAIL_BALLS]:
+            for i, pos in enumerate(trail):
+                radius = int(self.radius * (i / len(trail)))
+                if radius > 0:
+                    out.sprite(('brick_trail', radius), lambda: build_dot(WHITE, radius),
+                               (int(pos[0]) - radius, int(pos[1]) - radius))
+        
+        # Draw balls with glow effect, in one batch
+        offset = self.radius + 2
+        out.sprites('brick_ball', self.build_sprite,
+                    [(x - offset, y - offset) for x, y in zip(self.x.astype(int).tolist(), self.y.astype(int).tolist())])
     
-    def get_rect(self):
-        return pygame.Rect(self.x - self.radius, self.y - self.radius, 
-                          self.radius * 2, self.radius * 2)
+    def rects(self):
+        # Left/top of each ball's rect; pygame.Rect truncates float edges
+        return np.trunc(self.x - self.radius), np.trunc(self.y - self.radius), self.radius * 2
+
+class BrickGrid:
+    """Bricks indexed by level cell, so a ball only tests the bricks it overlaps"""
+    def __init__(self, level, start_x):
+        self.left = start_x
+        self.top = level.top
+        self.pitch_x = level.brick_width + level.margin
+        self.pitch_y = level.brick_height + level.margin
+        self.cols = level.cols
+        self.rows = level.rows
+        self.cells = [[None] * level.cols for _ in range(level.rows)]
+    
+    def add(self, row, col, brick):
+        self.cells[row][col] = brick
+    
+    def candidates(self, left, top, size):
+        """Indices and cell ranges of the balls whose rect reaches the wall"""
+        col0 = (left - self.left) // self.pitch_x
+        col1 = (left + size - 1 - self.left) // self.pitch_x
+        row0 = (top - self.top) // self.pitch_y
+        row1 = (top + size - 1 - self.top) // self.pitch_y
+        near = np.flatnonzero((col1 >= 0) & (col0 < self.cols) & (row1 >= 0) & (row0 < self.rows))
+        
+        col0 = np.maximum(col0[near], 0).astype(int).tolist()
+        col1 = np.minimum(col1[near], self.cols - 1).astype(int).tolist()
+        row0 = np.maximum(row0[near], 0).astype(int).tolist()
+        row1 = np.minimum(row1[near], self.rows - 1).astype(int).tolist()
+        return zip(near.tolist(), col0, col1, row0, row1)
+    
+    def first_hit(self, left, top, size, col0, col1, row0, row1):
+        # Row-major, so this is the same brick a scan of the brick list finds
+        for row in range(row0, row1 + 1):
+            cells = self.cells[row]
+            for col in range(col0, col1 + 1):
+                brick = cells[col]
+                if (brick is not None and not brick.destroyed and
+                        left < brick.x + brick.width and brick.x < left + size and
+                        top < brick.y + brick.height and brick.y < top + size):
+                    return brick
+        return None
 
 class Brick:
-    def __init__(self, x, y, color, points=10):
+    def __init__(self, x, y, color, points=10, width=75, height=30, hits=1, unbreakable=False, index=0):
+        # Position in Game.all_bricks and Game.brick_hits
+        self.index = index
         self.x = x
         self.y = y
-        self.width = 75
-        self.height = 30
+        self.width = width
+        self.height = height
         self.color = color
         self.points = points
+        self.hits = hits
+        self.unbreakable = unbreakable
         self.destroyed = False
         
-    def draw(self, screen):
+    def sprite_key(self):
+        return ('brick', self.color, self.width, self.height)
+    
+    def build_sprite(self):
+        # Draw brick with 3D effect
+        sprite = pygame.Surface((self.width, self.height))
+        # Main brick
+        sprite.fill(self.color)
+        
+        # Highlight
+        highlight_color = tuple(min(255, c + 50) for c in self.color)
+        pygame.draw.rect(sprite, highlight_color, (0, 0, self.width, 5))
+        pygame.draw.rect(sprite, highlight_color, (0, 0, 5, self.height))
+        
+        # Shadow
+        shadow_color = tuple(max(0, c - 50) for c in self.color)
+        pygame.draw.rect(sprite, shadow_color, (0, self.height - 5, self.width, 5))
+        pygame.draw.rect(sprite, shadow_color, (self.width - 5, 0, 5, self.height))
+        
+        # Border
+        pygame.draw.rect(sprite, WHITE, (0, 0, self.width, self.height), 1)
+        return sprite
+        
+    def draw(self, out):
+        # Every brick of one colour and size shares a cached sprite
         if not self.destroyed:
-            # Draw brick with 3D effect
-            # Main brick
-            pygame.draw.rect(screen, self.color, 
-                           (self.x, self.y, self.width, self.height))
-            
-            # Highlight
-            highlight_color = tuple(min(255, c + 50) for c in self.color)
-            pygame.draw.rect(screen, highlight_color, 
-                           (self.x, self.y, self.width, 5))
-            pygame.draw.rect(screen, highlight_color, 
-                           (self.x, self.y, 5, self.height))
-            
-            # Shadow
-            shadow_color = tuple(max(0, c - 50) for c in self.color)
-            pygame.draw.rect(screen, shadow_color, 
-                           (self.x, self.y + self.height - 5, self.width, 5))
-            pygame.draw.rect(screen, shadow_color, 
-                           (self.x + self.width - 5, self.y, 5, self.height))
-            
-            # Border
-            pygame.draw.rect(screen, WHITE, 
-                           (self.x, self.y, self.width, self.height), 1)
+            out.sprite(self.sprite_key(), self.build_sprite, (self.x, self.y))
     
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.width, self.height)
 
+class PowerUp:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.width = 30
+        self.height = 14
+        self.color = CYAN
+        
+    def update(self):
+        self.y += POWERUP_SPEED
+        
+    def build_sprite(self, font):
+        sprite = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        rect = sprite.get_rect()
+        pygame.draw.rect(sprite, self.color, rect, border_radius=7)
+        label = font.render("x3", True, BLACK)
+        sprite.blit(label, label.get_rect(center=rect.center))
+        return sprite
+        
+    def draw(self, out, font):
+        out.sprite('brick_powerup', lambda: self.build_sprite(font), self.get_rect())
+    
+    def get_rect(self):
+        return pygame.Rect(self.x - self.width // 2, self.y, self.width, self.height)
+
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("🧱 BRICK BREAKER EXTREME 🧱")
+    def __init__(self, level=None, stress_balls=0, backend='surface'):
+        # Everything is drawn through a render backend (render.py): blitted
+        # onto the display surface, or copied from textures by an SDL renderer
+        self.out = render.open_display((SCREEN_WIDTH, SCREEN_HEIGHT), "🧱 BRICK BREAKER EXTREME 🧱", backend)
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.big_font = pygame.font.Font(None, 72)
-        self.small_font = pygame.font.Font(None, 24)
-        
+        self.font = engine.get_font(36)
+        self.big_font = engine.get_font(72)
+        self.small_font = engine.get_font(24)
+        
+        # Level layout (brickLevels.Level); defaults to the classic 8x10 wall
+        self.level = level if level is not None else Level(default_level_data())
+        # Extra balls sprayed in at the start of every game (stress mode)
+        self.stress_balls = stress_balls
+        self.scores_name = 'BrickBreaker:stress' if stress_balls else 'BrickBreaker'
+        # Serves, paddle bounces, power-up drops and stress sprays all draw
+        # from one generator that a snapshot can save and restore
+        self.rng = GameRandom()
         self.reset_game()
         
+        # One sprite per brick colour and size in the level
+        bricks = {brick.sprite_key(): brick.build_sprite for brick in self.bricks}
+        engine.warm_up(sprites=[('brick_background', self.build_background), ('brick_ball', self.balls.build_sprite),
+                                ('brick_paddle', self.paddle.build_sprite), ('brick_star', self.build_star),
+                                *bricks.items()])
+        
     def reset_game(self):
         self.paddle = Paddle(SCREEN_WIDTH // 2 - 50, SCREEN_HEIGHT - 50)
-        self.ball = Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.balls = Balls(self.rng)
+        self.balls.add(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.balls.spray(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, self.stress_balls)
         self.bricks = []
         self.particles = []
+        self.powerups = []
         self.score = 0
         self.lives = 3
         self.game_over = False
         self.won = False
-        
-        # Create bricks
-        brick_rows = 8
-        brick_cols = 10
-        brick_width = 75
-        brick_height = 30
-        margin = 5
-        
-        start_x = (SCREEN_WIDTH - (brick_cols * brick_width + (brick_cols - 1) * margin)) // 2
-        start_y = 50
-        
-        for row in range(brick_rows):
-            for col in range(brick_cols):
-                x = start_x + col * (brick_width + margin)
-                y = start_y + row * (brick_height + margin)
-                color = BRICK_COLORS[row % len(BRICK_COLORS)]
-                points = (brick_rows - row) * 10  # Higher rows worth more points
-                brick = Brick(x, y, color, points)
-                self.bricks.append(brick)
+        self.started = time.perf_counter()
+        self.last_run = None
+        self.build_bricks(self.level)
+    
+    def build_bricks(self, level):
+        # Brick objects only exist for the level being played
+        start_x = (SCREEN_WIDTH - (level.cols * level.brick_width + (level.cols - 1) * level.margin)) // 2
+        self.bricks_left = 0
+        self.grid = BrickGrid(level, start_x)
+        
+        for row, col, brick_type, hits, color_index in level.cells():
+            x = start_x + col * (level.brick_width + level.margin)
+            y = level.top + row * (level.brick_height + level.margin)
+            points = (level.rows - row) * 10 * max(1, hits)  # Higher rows worth more points
+            index = len(self.bricks)
+            if brick_type == UNBREAKABLE:
+                brick = Brick(x, y, LIGHT_GRAY, 0, level.brick_width, level.brick_height, 0, True, index)
+            else:
+                color = BRICK_COLORS[color_index % len(BRICK_COLORS)]
+                brick = Brick(x, y, color, points, level.brick_width, level.brick_height, hits, index=index)
+                self.bricks_left += 1
+            self.bricks.append(brick)
+            self.grid.add(row, col, brick)
+        
+        # Every brick, destroyed or not, and the hits each one has left as
+        # one byte apiece; a breakable brick is destroyed exactly when its
+        # count is 0, so these bytes are the whole wall's state
+        self.all_bricks = list(self.bricks)
+        self.brick_hits = bytearray(brick.hits for brick in self.all_bricks)
     
     def handle_collisions(self):
-        # Ball-paddle collision
-        if self.ball.get_rect().colliderect(self.paddle.get_rect()) and self.ball.vy > 0:
+        balls = self.balls
+        left, top, size = balls.rects()
+        paddle = self.paddle
+        
+        # Ball-paddle collision: the overlap test covers every ball at once,
+        # the bounce itself only runs for the few balls touching the paddle
+        touching = ((left < paddle.x + paddle.width) & (paddle.x < left + size) &
+                    (top < paddle.y + paddle.height) & (paddle.y < top + size) & (balls.vy > 0))
+        if touching.any():
+            sound.play('paddle')
+        for i in np.flatnonzero(touching).tolist():
             # Calculate hit position on paddle
-            hit_pos = (self.ball.x - self.paddle.x) / self.paddle.width
+            hit_pos = (float(balls.x[i]) - paddle.x) / paddle.width
             hit_pos = max(0, min(1, hit_pos))  # Clamp to [0, 1]
             
             # Adjust ball angle based on hit position
             angle = (hit_pos - 0.5) * math.pi * 0.8  # Max 72 degrees
-            speed = math.sqrt(self.ball.vx**2 + self.ball.vy**2)
+            speed = math.sqrt(float(balls.vx[i])**2 + float(balls.vy[i])**2)
             
-            self.ball.vx = speed * math.sin(angle)
-            self.ball.vy = -abs(speed * math.cos(angle))  # Always go up
+            balls.vx[i] = speed * math.sin(angle)
+            balls.vy[i] = -abs(speed * math.cos(angle))  # Always go up
             
             # Add some randomness
-            self.ball.vx += random.uniform(-0.5, 0.5)
-        
-        # Ball-brick collision
-        for brick in self.bricks[:]:
-            if not brick.destroyed and self.ball.get_rect().colliderect(brick.get_rect()):
+            balls.vx[i] += self.rng.uniform(-0.5, 0.5)
+        
+        # Ball-brick collision: at most one brick per ball per frame, and only
+        # balls whose rect reaches the wall are looked at
+        destroyed = False
+        for i, col0, col1, row0, row1 in self.grid.candidates(left, top, size):
+            brick = self.grid.first_hit(int(left[i]), int(top[i]), size, col0, col1, row0, row1)
+            if brick is None:
+                continue
+            
+            if not brick.unbreakable:
+                brick.hits -= 1
+                self.brick_hits[brick.index] = brick.hits
+            if brick.hits <= 0 and not brick.unbreakable:
                 brick.destroyed = True
+                destroyed = True
+                self.bricks_left -= 1
                 self.score += brick.points
                 
                 # Create particles
-                for _ in range(10):
-                    particle = Particle(brick.x + brick.width // 2, 
-                                       brick.y + brick.height // 2, 
-                                       brick.color)
-                    self.particles.append(particle)
-                
-                # Simple collision response
-                ball_center_x = self.ball.x
-                ball_center_y = self.ball.y
-                brick_center_x = brick.x + brick.width // 2
-                brick_center_y = brick.y + brick.height // 2
-                
-                # Determine collision side
-                dx = ball_center_x - brick_center_x
-                dy = ball_center_y - brick_center_y
-                
-                if abs(dx) / brick.width > abs(dy) / brick.height:
-                    self.ball.vx = -self.ball.vx
-                else:
-                    self.ball.vy = -self.ball.vy
+                if len(self.particles) < MAX_PARTICLES:
+                    for _ in range(10):
+                        particle = Particle(brick.x + brick.width // 2, 
+                                           brick.y + brick.height // 2, 
+                                           brick.color)
+                        self.particles.append(particle)
                 
-                break
+                if self.rng.random() < POWERUP_CHANCE:
+                    self.powerups.append(PowerUp(brick.x + brick.width // 2, brick.y + brick.height))
+            
+            # Simple collision response
+            ball_center_x = float(balls.x[i])
+            ball_center_y = float(balls.y[i])
+            brick_center_x = brick.x + brick.width // 2
+            brick_center_y = brick.y + brick.height // 2
+            
+            # Determine collision side
+            dx = ball_center_x - brick_center_x
+            dy = ball_center_y - brick_center_y
+            
+            if abs(dx) / brick.width > abs(dy) / brick.height:
+                balls.vx[i] = -balls.vx[i]
+            else:
+                balls.vy[i] = -balls.vy[i]
         
         # Remove destroyed bricks
-        self.bricks = [brick for brick in self.bricks if not brick.destroyed]
-        
-        # Check win condition
-        if not self.bricks:
+        if destroyed:
+            # One break sound a frame, however many balls broke bricks
+            sound.play('brick')
+            self.bricks = [brick for brick in self.bricks if not brick.destroyed]
+        
+        # Power-ups caught by the paddle split every ball in three
+        paddle_rect = paddle.get_rect()
+        for powerup in self.powerups[:]:
+            if powerup.get_rect().colliderect(paddle_rect):
+                balls.split()
+                sound.play('powerup')
+                self.powerups.remove(powerup)
+            elif powerup.y > SCREEN_HEIGHT:
+                self.powerups.remove(powerup)
+        
+        # Check win condition (unbreakable bricks don't count)
+        if not self.bricks_left:
             self.won = True
-            self.game_over = True
-        
-        # Check if ball fell below paddle
-        if self.ball.y > SCREEN_HEIGHT:
-            self.lives -= 1
-            if self.lives <= 0:
-                self.game_over = True
-            else:
-                # Reset ball position
-                self.ball = Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+            self.end_game()
+        
+        # Check if balls fell below paddle; a life is only lost with the last one
+        lost = balls.y > SCREEN_HEIGHT
+        if lost.any():
+            balls.remove(lost)
+            if not len(balls):
+                self.lives -= 1
+                self.powerups = []
+                sound.play('crash')
+                if self.lives <= 0:
+                    self.end_game()
+                else:
+                    # Reset ball position
+                    balls.add(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    
+    def end_game(self):
+        if self.game_over:
+            return
+        self.game_over = True
+        self.last_run = scores.record(self.scores_name, self.score, seconds=time.perf_counter() - self.started,
+                                      detail="cleared" if self.won else "")
+    
+    def snapshot(self):
+        powerups = [value for powerup in self.powerups for value in (powerup.x, powerup.y)]
+        return b''.join((
+            SNAPSHOT_HEADER.pack(self.paddle.x, self.score, self.lives, self.bricks_left, self.game_over,
+                                 self.won, len(self.balls), len(self.powerups), self.rng.getstate()),
+            self.balls.snapshot(),
+            self.brick_hits,
+            struct.pack(f'<{len(powerups)}i', *powerups),
+        ))
+    
+    def restore(self, data):
+        (self.paddle.x, self.score, self.lives, self.bricks_left, self.game_over, self.won,
+         ball_count, powerup_count, rng_state) = SNAPSHOT_HEADER.unpack_from(data)
+        self.rng.setstate(rng_state)
+        offset = self.balls.restore(data, SNAPSHOT_HEADER.size, ball_count)
+        
+        # Only bricks whose hit count differs are touched
+        hits = data[offset:offset + len(self.brick_hits)]
+        offset += len(hits)
+        if hits != self.brick_hits:
+            changed = np.flatnonzero(np.frombuffer(hits, np.uint8) != np.frombuffer(self.brick_hits, np.uint8))
+            for index in changed.tolist():
+                brick = self.all_bricks[index]
+                brick.hits = hits[index]
+                brick.destroyed = not brick.hits
+            self.brick_hits[:] = hits
+            self.bricks = [brick for brick in self.all_bricks if not brick.destroyed]
+        
+        positions = struct.unpack_from(f'<{powerup_count * 2}i', data, offset)
+        self.powerups = [PowerUp(x, y) for x, y in zip(positions[::2], positions[1::2])]
     
     def update(self):
         if not self.game_over:
             self.paddle.update()
-            self.ball.update()
+            self.balls.update()
+            for powerup in self.powerups:
+                powerup.update()
             self.handle_collisions()
         
         # Update particles
@@ -286,75 +561,82 @@ class Game:
             if particle.life <= 0:
                 self.particles.remove(particle)
     
-    def draw_background(self):
-        # Gradient background
+    def build_background(self):
+        # Gradient background, drawn once and cached
+        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         for y in range(SCREEN_HEIGHT):
             color_factor = y / SCREEN_HEIGHT
             r = int(10 * (1 - color_factor))
             g = int(20 * (1 - color_factor))
             b = int(40 + 20 * color_factor)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+            pygame.draw.line(background, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+        return background
+    
+    def build_star(self):
+        return build_dot(WHITE, 1)
+    
+    def draw_background(self):
+        self.out.sprite('brick_background', self.build_background, (0, 0))
         
         # Stars
-        for _ in range(50):
-            x = random.randint(0, SCREEN_WIDTH)
-            y = random.randint(0, SCREEN_HEIGHT // 2)
-            pygame.draw.circle(self.screen, WHITE, (x, y), 1)
+        self.out.sprites('brick_star', self.build_star,
+                         [(random.randint(0, SCREEN_WIDTH) - 1, random.randint(0, SCREEN_HEIGHT // 2) - 1)
+                          for _ in range(50)])
     
     def draw_ui(self):
         # Score
-        score_text = self.font.render(f"SCORE: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+        self.out.text(self.font, f"SCORE: {self.score}", WHITE, (10, 10))
         
         # Lives
-        lives_text = self.font.render(f"LIVES: {self.lives}", True, WHITE)
-        self.screen.blit(lives_text, (10, 50))
+        self.out.text(self.font, f"LIVES: {self.lives}", WHITE, (10, 50))
+        
+        # Ball count and frame rate once there is more than one ball
+        if len(self.balls) > 1:
+            balls_text = f"BALLS: {len(self.balls)}  FPS: {self.clock.get_fps():.0f}  [{self.out.name}]"
+            width = self.small_font.size(balls_text)[0]
+            self.out.text(self.small_font, balls_text, LIGHT_GRAY, (SCREEN_WIDTH - width - 10, 10))
         
         # Instructions
         if not self.game_over:
-            inst_text = self.small_font.render("Use LEFT/RIGHT arrows to move paddle", True, LIGHT_GRAY)
-            self.screen.blit(inst_text, (10, SCREEN_HEIGHT - 30))
+            self.out.text(self.small_font, "Use LEFT/RIGHT arrows to move paddle", LIGHT_GRAY, (10, SCREEN_HEIGHT - 30))
     
     def draw_game_over(self):
         # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.out.shade(BLACK, 128)
         
         if self.won:
-            title = self.big_font.render("🎉 YOU WON! 🎉", True, GOLD)
-            subtitle = self.font.render("Congratulations!", True, WHITE)
+            self.out.text(self.big_font, "🎉 YOU WON! 🎉", GOLD, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60))
+            subtitle = "Congratulations!"
         else:
-            title = self.big_font.render("GAME OVER", True, RED)
-            subtitle = self.font.render("Better luck next time!", True, WHITE)
-        
-        final_score = self.font.render(f"Final Score: {self.score}", True, WHITE)
-        restart_text = self.font.render("Press R to restart or Q to quit", True, WHITE)
+            self.out.text(self.big_font, "GAME OVER", RED, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60))
+            subtitle = "Better luck next time!"
         
         # Center text
-        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60))
-        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 10))
-        score_rect = final_score.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 80))
-        
-        self.screen.blit(title, title_rect)
-        self.screen.blit(subtitle, subtitle_rect)
-        self.screen.blit(final_score, score_rect)
-        self.screen.blit(restart_text, restart_rect)
+        self.out.text(self.font, subtitle, WHITE, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 10))
+        self.out.text(self.font, f"Final Score: {self.score}", WHITE, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
+        self.out.text(self.font, "Press R to restart or Q to quit", WHITE,
+                      center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 80))
+        
+        # Best runs so far, this one highlighted
+        for i, (entry, line) in enumerate(scores.leaderboard(self.scores_name)):
+            color = GOLD if entry is self.last_run else LIGHT_GRAY
+            self.out.text(self.small_font, line, color, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 125 + i * 26))
     
     def draw(self):
         self.draw_background()
         
         # Draw game objects
         for brick in self.bricks:
-            brick.draw(self.screen)
+            brick.draw(self.out)
         
         for particle in self.particles:
-            particle.draw(self.screen)
+            particle.draw(self.out)
+        
+        for powerup in self.powerups:
+            powerup.draw(self.out, self.small_font)
         
-        self.paddle.draw(self.screen)
-        self.ball.draw(self.screen)
+        self.paddle.draw(self.out)
+        self.balls.draw(self.out)
         
         self.draw_ui()
         
@@ -362,25 +644,43 @@ class Game:
             self.draw_game_over()
     
     def run(self):
+        scores.start()
+        sound.start()
         running = True
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    engine.request_exit()
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r and self.game_over:
                         self.reset_game()
-                    elif event.key == pygame.K_q:
+                    elif event.key in (pygame.K_q, pygame.K_ESCAPE):
                         running = False
             
             self.update()
             self.draw()
             
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            engine.flip()
+            engine.wait_frame(self.clock, FPS)
         
-        pygame.quit()
+        engine.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Brick Breaker")
+    parser.add_argument('levels', nargs='?', help="level pack, or a single .brkl level file")
+    parser.add_argument('number', nargs='?', type=int, default=0, help="level number within the pack")
+    parser.add_argument('--stress', type=int, nargs='?', const=STRESS_BALLS, default=0, metavar='BALLS',
+                        help=f"start every game with extra balls (default {STRESS_BALLS})")
+    parser.add_argument('--renderer', choices=render.BACKENDS, default='surface',
+                        help="draw by blitting surfaces or through SDL textures (GPU when available)")
+    args = parser.parse_args()
+    
+    level = None
+    if args.levels:
+        if args.levels.endswith('.brkl'):
+            level = LevelFile(args.levels).level
+        else:
+            level = LevelPack(args.levels)[args.number]
+    game = Game(level, args.stress, args.renderer)
+    game.run()
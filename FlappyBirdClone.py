@@ -1,9 +1,14 @@
 import pygame
 import random
 import math
+import struct
+import time
 
-# Initialize Pygame
-pygame.init()
+import engine
+import quality
+import scores
+import sound
+from snapshot import GameRandom
 
 # Constants
 SCREEN_WIDTH = 800
@@ -16,6 +21,15 @@ GRAVITY = 0.6
 JUMP_FORCE = -9
 FPS = 60
 
+# Cached bird frames: wing positions per flap and degrees between rotations
+BIRD_WING_FRAMES = 12
+BIRD_ANGLE_STEP = 5
+PIPE_CAP_HEIGHT = 25
+
+# The score and game-over texts pulse through these font sizes
+SCORE_FONT_SIZES = range(int(48 * 0.9), int(48 * 1.1) + 1)
+GAME_OVER_FONT_SIZES = range(int(64 * 0.8), int(64 * 1.2) + 1)
+
 # Ultra-modern color palette
 COLORS = {
     'bg_start': (20, 20, 40),  # Deep purple
@@ -34,6 +48,10 @@ COLORS = {
     'trail': (100, 200, 255),      # Blue trail
 }
 
+# Snapshot header: bird y and velocity, score, started, game over, pipe
+# count, rng state; then (x, gap y, passed) per pipe
+SNAPSHOT_HEADER = struct.Struct('<ddi??HQ')
+
 class Particle:
     def __init__(self, x, y, color, velocity_x=0, velocity_y=0):
         self.x = x
@@ -61,6 +79,80 @@ class Particle:
                 pygame.draw.circle(particle_surf, color, (size, size), size)
                 screen.blit(particle_surf, (self.x - size, self.y - size))
 
+def build_bird_glow(radius):
+    glow_surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(glow_surf, (*COLORS['bird_glow'], 30), (radius, radius), radius)
+    return glow_surf
+
+def build_bird_frame(wing, angle):
+    """The bird with its wing at position `wing` of a flap, rotated by `angle` degrees"""
+    size = BIRD_SIZE
+    bird_surface = pygame.Surface((size * 3, size * 3), pygame.SRCALPHA)
+    center = size * 1.5
+    
+    # Wing animation
+    wing_flap = math.sin(wing * 2 * math.pi / BIRD_WING_FRAMES) * 0.3
+    wing_size = size * 0.8
+    
+    # Draw wings (behind bird)
+    wing_points = [
+        (center - wing_size, center + wing_flap * 10),
+        (center - wing_size * 1.5, center - wing_size * 0.5 + wing_flap * 10),
+        (center - wing_size * 0.3, center - wing_size * 0.8 + wing_flap * 10),
+        (center + wing_size * 0.3, center - wing_size * 0.3 + wing_flap * 10)
+    ]
+    pygame.draw.polygon(bird_surface, COLORS['accent'], wing_points)
+    
+    # Draw bird body (main circle)
+    pygame.draw.circle(bird_surface, COLORS['bird_main'], (center, center), size)
+    
+    # Draw bird outline glow
+    pygame.draw.circle(bird_surface, COLORS['bird_glow'], (center, center), size + 3, 3)
+    
+    # Draw beak
+    beak_points = [
+        (center + size - 5, center - 3),
+        (center + size + 15, center),
+        (center + size - 5, center + 3)
+    ]
+    pygame.draw.polygon(bird_surface, COLORS['accent2'], beak_points)
+    
+    # Draw eye
+    eye_size = 8
+    pygame.draw.circle(bird_surface, COLORS['bird_eye'], 
+                     (center + 5, center - 5), eye_size)
+    pygame.draw.circle(bird_surface, (0, 0, 0), 
+                     (center + 7, center - 5), eye_size - 3)
+    
+    # Add eye glow
+    pygame.draw.circle(bird_surface, COLORS['bird_eye'], 
+                     (center + 5, center - 5), eye_size + 2, 2)
+    
+    return pygame.transform.rotate(bird_surface, angle)
+
+def build_pipe_body():
+    """A full-height pipe with its border; both halves of every pipe are cut
+    from it, and the caps cover the border where a half ends"""
+    body = pygame.Surface((PIPE_WIDTH, SCREEN_HEIGHT))
+    body.fill(COLORS['pipe_main'])
+    pygame.draw.rect(body, COLORS['pipe_glow'], (0, 0, PIPE_WIDTH, SCREEN_HEIGHT), 3)
+    return body
+
+def build_pipe_cap():
+    cap = pygame.Surface((PIPE_WIDTH + 10, PIPE_CAP_HEIGHT))
+    cap.fill(COLORS['pipe_main'])
+    pygame.draw.rect(cap, COLORS['pipe_glow'], (0, 0, PIPE_WIDTH + 10, PIPE_CAP_HEIGHT), 3)
+    return cap
+
+def sprite_entries():
+    """(key, build) for every sprite the game can draw, for engine.warm_up()"""
+    entries = [('flappy_pipe_body', build_pipe_body), ('flappy_pipe_cap', build_pipe_cap)]
+    entries += [(('flappy_glow', radius), lambda radius=radius: build_bird_glow(radius))
+                for radius in range(25, 36)]
+    entries += [(('flappy_bird', wing, angle), lambda wing=wing, angle=angle: build_bird_frame(wing, angle))
+                for angle in range(-45, 46, BIRD_ANGLE_STEP) for wing in range(BIRD_WING_FRAMES)]
+    return entries
+
 class Bird:
     def __init__(self, x, y):
         self.x = x
@@ -99,8 +191,9 @@ class Bird:
             
     def jump(self):
         self.velocity = JUMP_FORCE
+        sound.play('flap')
         # Create jump particles
-        for _ in range(8):
+        for _ in range(quality.particles(8)):
             self.particles.append(Particle(
                 self.x + random.uniform(-10, 10),
                 self.y + random.uniform(-10, 10),
@@ -110,11 +203,12 @@ class Bird:
             ))
         
     def draw(self, screen):
-        # Draw trail
-        if len(self.trail_points) > 1:
-            for i, point in enumerate(self.trail_points):
-                alpha = int(255 * (i / len(self.trail_points)) * 0.5)
-                size = int(self.size * (i / len(self.trail_points)) * 0.8)
+        # Draw trail (only its newest points at lower quality)
+        trail_points = self.trail_points[-quality.trail(len(self.trail_points)):]
+        if len(trail_points) > 1:
+            for i, point in enumerate(trail_points):
+                alpha = int(255 * (i / len(trail_points)) * 0.5)
+                size = int(self.size * (i / len(trail_points)) * 0.8)
                 if size > 0:
                     trail_surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
                     pygame.draw.circle(trail_surf, (*COLORS['trail'], alpha), (size, size), size)
@@ -125,55 +219,15 @@ class Bird:
             particle.draw(screen)
             
         # Draw glow effect
-        glow_surf = pygame.Surface((self.glow_size * 2, self.glow_size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(glow_surf, (*COLORS['bird_glow'], 30), 
-                         (self.glow_size, self.glow_size), self.glow_size)
-        screen.blit(glow_surf, (self.x - self.glow_size, self.y - self.glow_size))
-        
-        # Create bird surface with rotation
-        bird_surface = pygame.Surface((self.size * 3, self.size * 3), pygame.SRCALPHA)
-        center = self.size * 1.5
-        
-        # Wing animation
-        wing_flap = math.sin(self.animation_time) * 0.3
-        wing_size = self.size * 0.8
-        
-        # Draw wings (behind bird)
-        wing_points = [
-            (center - wing_size, center + wing_flap * 10),
-            (center - wing_size * 1.5, center - wing_size * 0.5 + wing_flap * 10),
-            (center - wing_size * 0.3, center - wing_size * 0.8 + wing_flap * 10),
-            (center + wing_size * 0.3, center - wing_size * 0.3 + wing_flap * 10)
-        ]
-        pygame.draw.polygon(bird_surface, COLORS['accent'], wing_points)
-        
-        # Draw bird body (main circle)
-        pygame.draw.circle(bird_surface, COLORS['bird_main'], (center, center), self.size)
-        
-        # Draw bird outline glow
-        pygame.draw.circle(bird_surface, COLORS['bird_glow'], (center, center), self.size + 3, 3)
-        
-        # Draw beak
-        beak_points = [
-            (center + self.size - 5, center - 3),
-            (center + self.size + 15, center),
-            (center + self.size - 5, center + 3)
-        ]
-        pygame.draw.polygon(bird_surface, COLORS['accent2'], beak_points)
-        
-        # Draw eye
-        eye_size = 8
-        pygame.draw.circle(bird_surface, COLORS['bird_eye'], 
-                         (center + 5, center - 5), eye_size)
-        pygame.draw.circle(bird_surface, (0, 0, 0), 
-                         (center + 7, center - 5), eye_size - 3)
-        
-        # Add eye glow
-        pygame.draw.circle(bird_surface, COLORS['bird_eye'], 
-                         (center + 5, center - 5), eye_size + 2, 2)
-        
-        # Rotate and draw
-        rotated_bird = pygame.transform.rotate(bird_surface, self.rotation)
+        if quality.glow(1):
+            radius = int(self.glow_size)
+            glow_surf = engine.get_sprite(('flappy_glow', radius), lambda: build_bird_glow(radius))
+            screen.blit(glow_surf, (self.x - radius, self.y - radius))
+        
+        # Rotated frames are cached per wing position and angle step
+        wing = int(self.animation_time / (2 * math.pi) * BIRD_WING_FRAMES) % BIRD_WING_FRAMES
+        angle = round(self.rotation / BIRD_ANGLE_STEP) * BIRD_ANGLE_STEP
+        rotated_bird = engine.get_sprite(('flappy_bird', wing, angle), lambda: build_bird_frame(wing, angle))
         rect = rotated_bird.get_rect(center=(self.x, self.y))
         screen.blit(rotated_bird, rect)
         
@@ -182,9 +236,9 @@ class Bird:
                           self.size, self.size)
 
 class Pipe:
-    def __init__(self, x):
+    def __init__(self, x, gap_y):
         self.x = x
-        self.gap_y = random.randint(150, SCREEN_HEIGHT - 200)
+        self.gap_y = gap_y
         self.width = PIPE_WIDTH
         self.passed = False
         self.glow_intensity = 0
@@ -215,26 +269,15 @@ class Pipe:
                         (0, 0, glow_width, bottom_height + 20))
         screen.blit(bottom_glow_surf, (self.x - 10, bottom_y - 10))
         
-        # Draw main pipes
-        pygame.draw.rect(screen, COLORS['pipe_main'], (self.x, 0, self.width, top_height))
-        pygame.draw.rect(screen, COLORS['pipe_main'], (self.x, bottom_y, self.width, bottom_height))
-        
-        # Draw pipe borders
-        pygame.draw.rect(screen, COLORS['pipe_glow'], (self.x, 0, self.width, top_height), 3)
-        pygame.draw.rect(screen, COLORS['pipe_glow'], (self.x, bottom_y, self.width, bottom_height), 3)
+        # Draw main pipes, cut from one cached full-height pipe
+        body = engine.get_sprite('flappy_pipe_body', build_pipe_body)
+        screen.blit(body, (self.x, 0), (0, 0, self.width, top_height))
+        screen.blit(body, (self.x, bottom_y), (0, bottom_y, self.width, bottom_height))
         
         # Draw pipe caps
-        cap_height = 25
-        cap_width = self.width + 10
-        
-        # Top cap
-        top_cap_y = top_height - cap_height
-        pygame.draw.rect(screen, COLORS['pipe_main'], (self.x - 5, top_cap_y, cap_width, cap_height))
-        pygame.draw.rect(screen, COLORS['pipe_glow'], (self.x - 5, top_cap_y, cap_width, cap_height), 3)
-        
-        # Bottom cap
-        pygame.draw.rect(screen, COLORS['pipe_main'], (self.x - 5, bottom_y, cap_width, cap_height))
-        pygame.draw.rect(screen, COLORS['pipe_glow'], (self.x - 5, bottom_y, cap_width, cap_height), 3)
+        cap = engine.get_sprite('flappy_pipe_cap', build_pipe_cap)
+        screen.blit(cap, (self.x - 5, top_height - PIPE_CAP_HEIGHT))
+        screen.blit(cap, (self.x - 5, bottom_y))
         
     def get_rects(self):
         top_rect = pygame.Rect(self.x, 0, self.width, self.gap_y - PIPE_GAP//2)
@@ -244,31 +287,33 @@ class Pipe:
 
 class Game:
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("NEON FLAPPY BIRD")
+        self.screen = engine.init_display((SCREEN_WIDTH, SCREEN_HEIGHT), "NEON FLAPPY BIRD")
         self.clock = pygame.time.Clock()
+        quality.start(FPS)
         
         # Load fonts
-        try:
-            self.font_title = pygame.font.Font(None, 64)
-            self.font_large = pygame.font.Font(None, 48)
-            self.font_medium = pygame.font.Font(None, 32)
-            self.font_small = pygame.font.Font(None, 24)
-        except:
-            self.font_title = pygame.font.Font(None, 64)
-            self.font_large = pygame.font.Font(None, 48)
-            self.font_medium = pygame.font.Font(None, 32)
-            self.font_small = pygame.font.Font(None, 24)
+        self.font_title = engine.get_font(64)
+        self.font_large = engine.get_font(48)
+        self.font_medium = engine.get_font(32)
+        self.font_small = engine.get_font(24)
             
         self.background_particles = []
+        # Pipe gaps; its state is part of every snapshot
+        self.rng = GameRandom()
         self.reset_game()
         
+        # Ready by the time SPACE is pressed on the title screen
+        engine.warm_up(fonts=[*SCORE_FONT_SIZES, *GAME_OVER_FONT_SIZES],
+                       sprites=[('flappy_gradient', self.build_gradient), *sprite_entries()])
+        
     def reset_game(self):
         self.bird = Bird(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
         self.pipes = []
         self.score = 0
         self.game_over = False
         self.game_started = False
+        self.started = time.perf_counter()
+        self.last_run = None
         self.background_particles = []
         
         # Create background particles
@@ -281,20 +326,27 @@ class Game:
                 random.uniform(-1, 1)
             ))
         
-    def draw_animated_background(self):
-        """Draw animated gradient background with particles"""
-        # Create gradient
+    def build_gradient(self):
+        """Render the background gradient once; it is cached by the engine"""
+        gradient = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         for y in range(SCREEN_HEIGHT):
             ratio = y / SCREEN_HEIGHT
             r = int(COLORS['bg_start'][0] * (1 - ratio) + COLORS['bg_end'][0] * ratio)
             g = int(COLORS['bg_start'][1] * (1 - ratio) + COLORS['bg_end'][1] * ratio)
             b = int(COLORS['bg_start'][2] * (1 - ratio) + COLORS['bg_end'][2] * ratio)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+            pygame.draw.line(gradient, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+        return gradient
+        
+    def draw_animated_background(self):
+        """Draw animated gradient background with particles"""
+        self.screen.blit(engine.get_sprite('flappy_gradient', self.build_gradient), (0, 0))
             
-        # Update and draw background particles
-        for particle in self.background_particles:
+        # Update and draw background particles; lower quality draws fewer
+        visible = quality.particles(len(self.background_particles))
+        for i, particle in enumerate(self.background_particles):
             particle.update()
-            particle.draw(self.screen)
+            if i < visible:
+                particle.draw(self.screen)
             
             # Reset particle if it's dead
             if particle.life <= 0:
@@ -304,8 +356,8 @@ class Game:
                 
     def draw_glowing_text(self, text, font, color, glow_color, pos):
         """Draw text with glow effect"""
-        # Draw glow (multiple layers)
-        for offset in range(5, 0, -1):
+        # Draw glow (multiple layers; lower quality drops the outermost ones)
+        for offset in range(quality.glow(5), 0, -1):
             glow_surf = font.render(text, True, glow_color)
             for dx in range(-offset, offset + 1):
                 for dy in range(-offset, offset + 1):
@@ -342,7 +394,7 @@ class Game:
         else:
             # Animated score
             score_scale = 1.0 + math.sin(pygame.time.get_ticks() * 0.01) * 0.1
-            score_font = pygame.font.Font(None, int(48 * score_scale))
+            score_font = engine.get_font(int(48 * score_scale))
             self.draw_glowing_text(f"SCORE: {self.score}", score_font, 
                                  COLORS['text'], COLORS['text_glow'], 
                                  (SCREEN_WIDTH//2, 50))
@@ -355,7 +407,7 @@ class Game:
             
             # Pulsing game over text
             pulse = math.sin(pygame.time.get_ticks() * 0.008) * 0.2 + 1.0
-            game_over_font = pygame.font.Font(None, int(64 * pulse))
+            game_over_font = engine.get_font(int(64 * pulse))
             self.draw_glowing_text("GAME OVER", game_over_font, 
                                  COLORS['accent'], COLORS['text_glow'], 
                                  (SCREEN_WIDTH//2, 200))
@@ -374,6 +426,29 @@ class Game:
                                  COLORS['text'], COLORS['text_glow'], 
                                  (SCREEN_WIDTH//2, 400))
             
+            # Best runs so far, this one highlighted
+            for i, (entry, line) in enumerate(scores.leaderboard('FlappyBirdClone')):
+                color = COLORS['accent2'] if entry is self.last_run else COLORS['text']
+                text = self.font_small.render(line, True, color)
+                self.screen.blit(text, text.get_rect(center=(SCREEN_WIDTH//2, 450 + i * 26)))
+            
+    def snapshot(self):
+        pipes = [value for pipe in self.pipes for value in (pipe.x, pipe.gap_y, pipe.passed)]
+        return (SNAPSHOT_HEADER.pack(self.bird.y, self.bird.velocity, self.score, self.game_started,
+                                     self.game_over, len(self.pipes), self.rng.getstate()) +
+                struct.pack('<' + 'ii?' * len(self.pipes), *pipes))
+    
+    def restore(self, data):
+        (self.bird.y, self.bird.velocity, self.score, self.game_started, self.game_over,
+         pipe_count, rng_state) = SNAPSHOT_HEADER.unpack_from(data)
+        self.rng.setstate(rng_state)
+        values = struct.unpack_from('<' + 'ii?' * pipe_count, data, SNAPSHOT_HEADER.size)
+        self.pipes = []
+        for i in range(0, len(values), 3):
+            pipe = Pipe(values[i], values[i + 1])
+            pipe.passed = values[i + 2]
+            self.pipes.append(pipe)
+    
     def update(self):
         if not self.game_started or self.game_over:
             return
@@ -383,7 +458,7 @@ class Game:
         
         # Check ground collision
         if self.bird.y > SCREEN_HEIGHT - 30 or self.bird.y < 0:
-            self.game_over = True
+            self.end_game()
             
         # Update pipes
         for pipe in self.pipes[:]:
@@ -397,9 +472,10 @@ class Game:
             if not pipe.passed and pipe.x + pipe.width < self.bird.x:
                 pipe.passed = True
                 self.score += 1
+                sound.play('score')
                 
                 # Create score particles
-                for _ in range(10):
+                for _ in range(quality.particles(10)):
                     self.bird.particles.append(Particle(
                         self.bird.x + random.uniform(-20, 20),
                         self.bird.y + random.uniform(-20, 20),
@@ -412,12 +488,19 @@ class Game:
             bird_rect = self.bird.get_rect()
             for pipe_rect in pipe.get_rects():
                 if bird_rect.colliderect(pipe_rect):
-                    self.game_over = True
+                    self.end_game()
                     
         # Spawn new pipes
         if len(self.pipes) == 0 or self.pipes[-1].x < SCREEN_WIDTH - 300:
-            self.pipes.append(Pipe(SCREEN_WIDTH))
+            self.pipes.append(Pipe(SCREEN_WIDTH, self.rng.randint(150, SCREEN_HEIGHT - 200)))
             
+    def end_game(self):
+        if self.game_over:
+            return
+        self.game_over = True
+        sound.play('crash')
+        self.last_run = scores.record('FlappyBirdClone', self.score, seconds=time.perf_counter() - self.started)
+    
     def draw(self):
         # Draw animated background
         self.draw_animated_background()
@@ -431,38 +514,47 @@ class Game:
         
         # Draw UI
         self.draw_ui()
+        quality.draw_readout(self.screen)
         
-        pygame.display.flip()
+        engine.flip()
         
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                engine.request_exit()
                 return False
                 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     if not self.game_started:
                         self.game_started = True
+                        self.started = time.perf_counter()
                     elif not self.game_over:
                         self.bird.jump()
                         
                 elif event.key == pygame.K_r and self.game_over:
                     self.reset_game()
                     
+                elif event.key == pygame.K_F3:
+                    quality.toggle_readout()
+                    
                 elif event.key == pygame.K_ESCAPE:
                     return False
                     
         return True
         
     def run(self):
+        scores.start()
+        sound.start()
         running = True
         while running:
             running = self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(FPS)
+            engine.wait_frame(self.clock, FPS)
+            quality.update(engine.frame_time)
             
-        pygame.quit()
+        engine.quit()
 
 if __name__ == "__main__":
     game = Game()
@@ -1,16 +1,30 @@
 import pygame
 import random
 import math
-import sys
+import argparse
+import struct
+import time
 
-# Initialize Pygame
-pygame.init()
+import engine
+import quality
+import scores
+import sound
+from shooterBullets import BulletPool, PATTERNS
+from shooterSwarm import Swarm, DRONE_WIDTH, DRONE_HEIGHT
+from shooterWorld import World, SCROLL_SPEED
+from snapshot import GameRandom
 
 # Constants
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 FPS = 60
 
+# Bullet-hell mode
+BULLET_HELL_ENEMIES = 12  # enemy cap before the level bonus (normal mode: 6)
+BULLET_HELL_SPAWN_RATE = 20  # frames between enemies
+BULLET_DAMAGE = 5
+HIT_INVULNERABILITY = 30  # frames after a bullet hit in which no more count
+
 # Modern color palette
 DARK_BG = (8, 12, 20)
 ACCENT_BLUE = (0, 150, 255)
@@ -24,6 +38,42 @@ RED = (255, 50, 50)
 ORANGE = (255, 150, 0)
 GRAY = (100, 100, 100)
 
+ENEMY_COLORS = [NEON_PURPLE, RED, NEON_PINK]
+
+# Difficulty of the mission: frames between enemies start at spawn_start
+# and drop by spawn_step per level down to spawn_min; at most enemy_cap
+# enemies plus one per level fly at once, each at a speed drawn from
+# enemy_speed; every level_points points is a level. Each Game copies
+# this, so shooterBalance.py can try other values
+DIFFICULTY = {
+    'spawn_start': 90,
+    'spawn_step': 5,
+    'spawn_min': 30,
+    'enemy_cap': 6,
+    'enemy_speed': (1.5, 3.5),
+    'level_points': 1000,
+}
+
+# Swarm mode
+SWARM_WAVE_RATE = 60  # frames between waves
+SWARM_DAMAGE = 10
+SWARM_COLORS = [NEON_PURPLE, RED, NEON_PINK]
+
+# Menu entries and the game mode each one starts (None quits)
+MENU_OPTIONS = [("START MISSION", 'mission'), ("BULLET HELL", 'bullet_hell'), ("SWARM", 'swarm'),
+                ("DEEP STRIKE", 'deep_strike'), ("QUIT", None)]
+MODES = [mode for _, mode in MENU_OPTIONS if mode]
+PATTERN_NAMES = list(PATTERNS)
+
+# Snapshot header: mode, score, level, spawn timer, game over,
+# invulnerability, swarm waves, player x/y/health/last shot, rng state,
+# player bullet count, enemy count. Then (x, y) per player bullet, one
+# ENEMY_STATE per enemy, the enemy bullet pool, the swarm and the
+# deep-strike world.
+SNAPSHOT_HEADER = struct.Struct('<Biii?iiiiiqQHH')
+# x, y, speed, colour, pattern (-1 = none), fire tick, health
+ENEMY_STATE = struct.Struct('<didBbii')
+
 class Star:
     def __init__(self):
         self.x = random.randint(0, SCREEN_WIDTH)
@@ -79,9 +129,7 @@ class Player:
         self.max_health = 100
         self.engine_particles = []
         
-    def update(self):
-        keys = pygame.key.get_pressed()
-        
+    def update(self, keys, now):
         # Smoother movement
         if keys[pygame.K_UP] and self.y > 50:
             self.y -= self.speed
@@ -94,15 +142,15 @@ class Player:
             
         # Shooting
         if keys[pygame.K_SPACE]:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.last_shot > self.shot_delay:
+            if now - self.last_shot > self.shot_delay:
                 # Double bullets from wings
                 self.bullets.append(Bullet(self.x + self.width, self.y + 8, 12, NEON_CYAN))
                 self.bullets.append(Bullet(self.x + self.width, self.y + self.height - 8, 12, NEON_CYAN))
-                self.last_shot = current_time
+                self.last_shot = now
+                sound.play('shot')
         
         # Engine particles
-        if random.random() < 0.3:
+        if random.random() < quality.chance(0.3):
             self.engine_particles.append(Particle(self.x - 5, self.y + self.height//2, ACCENT_BLUE, 3))
         
         # Update bullets
@@ -164,21 +212,24 @@ class Player:
         return pygame.Rect(self.x + 10, self.y + 8, self.width - 20, self.height - 16)
 
 class Enemy:
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=random, speed=DIFFICULTY['enemy_speed']):
         self.x = x
         self.y = y
         self.width = 60
         self.height = 30
-        self.speed = random.uniform(1.5, 3.5)  # Slower
-        self.color = random.choice([NEON_PURPLE, RED, NEON_PINK])
+        self.speed = rng.uniform(*speed)  # Slower
+        self.color = rng.choice(ENEMY_COLORS)
         self.health = 30
         self.engine_particles = []
+        # Bullet-hell mode: name of the pattern this enemy fires
+        self.pattern = None
+        self.fire_tick = 0
         
     def update(self):
         self.x -= self.speed
         
         # Enemy engine particles
-        if random.random() < 0.2:
+        if random.random() < quality.chance(0.2):
             self.engine_particles.append(Particle(self.x + self.width, self.y + self.height//2, self.color, 2))
         
         # Update engine particles
@@ -244,23 +295,35 @@ class Bullet:
 
 class Game:
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("🚀 SKY DOMINATION - Modern Air Combat")
+        self.screen = engine.init_display((SCREEN_WIDTH, SCREEN_HEIGHT), "🚀 SKY DOMINATION - Modern Air Combat")
         self.clock = pygame.time.Clock()
+        quality.start(FPS)
         self.player = Player(100, SCREEN_HEIGHT // 2)
         self.enemies = []
         self.particles = []
         self.stars = [Star() for _ in range(150)]
         self.score = 0
         self.level = 1
-        self.font = pygame.font.Font(None, 32)
-        self.big_font = pygame.font.Font(None, 64)
-        self.title_font = pygame.font.Font(None, 48)
+        self.font = engine.get_font(32)
+        self.big_font = engine.get_font(64)
+        self.title_font = engine.get_font(48)
         self.enemy_spawn_timer = 0
         self.game_over = False
         self.running = True
         self.game_started = False
         self.menu_selection = 0
+        self.mode = 'mission'
+        self.enemy_bullets = BulletPool(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.invulnerable = 0
+        self.swarm = Swarm(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.swarm_waves = 0
+        # Deep-strike mode: a long level streamed in by chunk as it scrolls
+        self.world = World(SCREEN_WIDTH, SCREEN_HEIGHT, len(ENEMY_COLORS))
+        self.difficulty = dict(DIFFICULTY)
+        # Enemy spawns; the swarm keeps its own NumPy generator
+        self.rng = GameRandom()
+        # Built while the menu is up
+        engine.warm_up(sprites=[('swarm_drones', self.build_drone_sprites)])
         
     def draw_menu(self):
         # Animated background
@@ -287,8 +350,7 @@ class Game:
         self.screen.blit(subtitle, subtitle_rect)
         
         # Menu options
-        menu_options = ["START MISSION", "QUIT"]
-        for i, option in enumerate(menu_options):
+        for i, (option, _) in enumerate(MENU_OPTIONS):
             color = NEON_GREEN if i == self.menu_selection else WHITE
             text = self.font.render(option, True, color)
             text_rect = text.get_rect(center=(SCREEN_WIDTH//2, 350 + i * 50))
@@ -309,32 +371,94 @@ class Game:
         
         for i, instruction in enumerate(instructions):
             text = self.font.render(instruction, True, NEON_CYAN)
-            text_rect = text.get_rect(center=(SCREEN_WIDTH//2, 500 + i * 30))
+            text_rect = text.get_rect(center=(SCREEN_WIDTH//2, 560 + i * 30))
             self.screen.blit(text, text_rect)
+        
+        # Cache warm-up progress, until it is done
+        warmed, queued = engine.warm_up_progress()
+        if warmed < queued:
+            text = self.font.render(f"Preparing graphics {warmed}/{queued}", True, WHITE)
+            self.screen.blit(text, text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 40)))
     
     def spawn_enemy(self):
-        if len(self.enemies) < 6 + self.level:  # More enemies as level increases
-            y = random.randint(80, SCREEN_HEIGHT - 100)
-            self.enemies.append(Enemy(SCREEN_WIDTH, y))
+        cap = BULLET_HELL_ENEMIES if self.mode == 'bullet_hell' else self.difficulty['enemy_cap']
+        if len(self.enemies) < cap + self.level:  # More enemies as level increases
+            y = self.rng.randint(80, SCREEN_HEIGHT - 100)
+            enemy = Enemy(SCREEN_WIDTH, y, self.rng, self.difficulty['enemy_speed'])
+            if self.mode == 'bullet_hell':
+                enemy.pattern = self.rng.choice(PATTERN_NAMES)
+            self.enemies.append(enemy)
+    
+    def update_enemy_bullets(self):
+        # Move and cull every enemy bullet in one step, then fire new volleys
+        self.enemy_bullets.step()
+        target = self.player.get_rect().center
+        for enemy in self.enemies:
+            pattern, interval = PATTERNS[enemy.pattern]
+            enemy.fire_tick += 1
+            if enemy.fire_tick % interval == 0:
+                pattern(self.enemy_bullets, enemy.x, enemy.y + enemy.height // 2, enemy.fire_tick, target,
+                        self.level)
+    
+    def spawn_swarm_wave(self):
+        # Sine snake, V formation and flock in turn, bigger every level
+        y = self.rng.randint(150, SCREEN_HEIGHT - 150)
+        color = self.swarm_waves % len(SWARM_COLORS)
+        wave = self.swarm_waves % 3
+        if wave == 0:
+            self.swarm.spawn_sine(20 + 10 * self.level, y, color)
+        elif wave == 1:
+            self.swarm.spawn_vee(15 + 6 * self.level, y, color)
+        else:
+            self.swarm.spawn_flock(100 * self.level, y, color)
+        self.swarm_waves += 1
+    
+    def advance_world(self):
+        # Enemies coming into range wake up flying at the scroll speed on
+        # top of their own; a cleared level starts the next, denser sector
+        for x, y, speed, color in self.world.advance():
+            enemy = Enemy(x, y)
+            enemy.speed = speed + SCROLL_SPEED
+            enemy.color = ENEMY_COLORS[color]
+            self.enemies.append(enemy)
+        if self.world.finished() and not self.enemies:
+            self.world.start(self.rng.next64(), self.world.sector + 1)
+    
+    def build_drone_sprites(self):
+        # The regular enemy plane drawn once per colour and shrunk to drone size
+        sprites = []
+        for color in SWARM_COLORS:
+            plane = pygame.Surface((60, 30), pygame.SRCALPHA)
+            enemy = Enemy(0, 0)
+            enemy.color = color
+            enemy.draw(plane)
+            sprites.append(pygame.transform.smoothscale(plane, (DRONE_WIDTH, DRONE_HEIGHT)))
+        return sprites
+    
+    def enemy_destroyed(self, x, y, color):
+        self.score += 100
+        self.create_explosion(x, y, color)
+        
+        # Level up every 1000 points (by default)
+        if self.score % self.difficulty['level_points'] == 0:
+            self.level += 1
     
     def create_explosion(self, x, y, color):
-        for _ in range(25):
+        sound.play('explosion')
+        for _ in range(quality.particles(25)):
             self.particles.append(Particle(x, y, color, random.uniform(3, 8)))
     
     def handle_collisions(self):
-        # Player bullets vs enemies
+        # Player bullets vs enemies: each bullet is one collidelist() over
+        # the enemy rects, built once a frame
+        enemy_rects = [enemy.get_rect() for enemy in self.enemies]
         for bullet in self.player.bullets[:]:
-            for enemy in self.enemies[:]:
-                if bullet.get_rect().colliderect(enemy.get_rect()):
-                    self.player.bullets.remove(bullet)
-                    self.enemies.remove(enemy)
-                    self.score += 100
-                    self.create_explosion(enemy.x, enemy.y, enemy.color)
-                    
-                    # Level up every 1000 points
-                    if self.score % 1000 == 0:
-                        self.level += 1
-                    break
+            index = bullet.get_rect().collidelist(enemy_rects)
+            if index >= 0:
+                enemy = self.enemies.pop(index)
+                del enemy_rects[index]
+                self.player.bullets.remove(bullet)
+                self.enemy_destroyed(enemy.x, enemy.y, enemy.color)
         
         # Enemies vs player
         for enemy in self.enemies[:]:
@@ -343,7 +467,44 @@ class Game:
                 self.player.health -= 25
                 self.create_explosion(self.player.x, self.player.y, RED)
                 if self.player.health <= 0:
-                    self.game_over = True
+                    self.end_game()
+        
+        # Player bullets vs swarm: each bullet is one query over every drone
+        if self.mode == 'swarm':
+            for bullet in self.player.bullets[:]:
+                slot = self.swarm.hit_first(bullet.get_rect())
+                if slot is not None:
+                    self.player.bullets.remove(bullet)
+                    self.enemy_destroyed(self.swarm.x[slot], self.swarm.y[slot],
+                                         SWARM_COLORS[self.swarm.color[slot]])
+            
+            hits = self.swarm.hit_all(self.player.get_rect())
+            if hits:
+                self.player.health -= SWARM_DAMAGE * hits
+                self.create_explosion(self.player.x, self.player.y, RED)
+                if self.player.health <= 0:
+                    self.end_game()
+        
+        # Enemy bullets vs player, as one query over the whole bullet pool
+        if self.mode == 'bullet_hell':
+            if self.invulnerable:
+                self.invulnerable -= 1
+            elif self.enemy_bullets.collide(self.player.get_rect()):
+                self.player.health -= BULLET_DAMAGE
+                self.invulnerable = HIT_INVULNERABILITY
+                sound.play('hit')
+                self.create_explosion(self.player.x + self.player.width // 2, self.player.y, ORANGE)
+                if self.player.health <= 0:
+                    self.end_game()
+    
+    def end_game(self):
+        if self.game_over:
+            return
+        self.game_over = True
+        sound.play('crash')
+        detail = f"sector {self.world.sector}" if self.mode == 'deep_strike' else ""
+        self.last_run = scores.record(f'SpaceShooter:{self.mode}', self.score, self.level,
+                                      time.perf_counter() - self.started, detail)
     
     def draw_hud(self):
         # Modern HUD panel
@@ -392,8 +553,19 @@ class Game:
         self.screen.blit(health_text, (health_x + health_width + 20, health_y - 5))
         
         # Enemy counter
-        enemy_text = self.font.render(f"🎯 ENEMIES: {len(self.enemies)}", True, NEON_PINK)
+        enemy_count = self.swarm.count if self.mode == 'swarm' else len(self.enemies)
+        enemy_text = self.font.render(f"🎯 ENEMIES: {enemy_count}", True, NEON_PINK)
         self.screen.blit(enemy_text, (SCREEN_WIDTH - 200, 20))
+        
+        # Live enemy bullets
+        if self.mode == 'bullet_hell':
+            bullet_text = self.font.render(f"BULLETS: {self.enemy_bullets.count:,}", True, ORANGE)
+            self.screen.blit(bullet_text, (SCREEN_WIDTH - 420, 20))
+        
+        # How far through the level
+        if self.mode == 'deep_strike':
+            sector_text = self.font.render(f"SECTOR {self.world.sector}: {self.world.progress():.0%}", True, ORANGE)
+            self.screen.blit(sector_text, (SCREEN_WIDTH - 450, 20))
     
     def draw_game_over(self):
         # Dark overlay
@@ -436,8 +608,70 @@ class Game:
         quit_text = self.font.render("Press Q to Quit", True, WHITE)
         quit_rect = quit_text.get_rect(center=(SCREEN_WIDTH//2, panel_y + 340))
         self.screen.blit(quit_text, quit_rect)
+        
+        # Best runs in this mode, this one highlighted
+        for i, (entry, line) in enumerate(scores.leaderboard(f'SpaceShooter:{self.mode}')):
+            color = GOLD if entry is self.last_run else GRAY
+            text = self.font.render(line, True, color)
+            self.screen.blit(text, text.get_rect(center=(SCREEN_WIDTH//2, panel_y + panel_height + 30 + i * 32)))
     
-    def reset_game(self):
+    def snapshot(self):
+        player = self.player
+        bullets = [value for bullet in player.bullets for value in (bullet.x, bullet.y)]
+        parts = [
+            SNAPSHOT_HEADER.pack(MODES.index(self.mode), self.score, self.level, self.enemy_spawn_timer,
+                                 self.game_over, self.invulnerable, self.swarm_waves, player.x, player.y,
+                                 player.health, player.last_shot, self.rng.getstate(), len(player.bullets),
+                                 len(self.enemies)),
+            struct.pack(f'<{len(bullets)}i', *bullets),
+        ]
+        for enemy in self.enemies:
+            pattern = PATTERN_NAMES.index(enemy.pattern) if enemy.pattern else -1
+            parts.append(ENEMY_STATE.pack(enemy.x, enemy.y, enemy.speed, ENEMY_COLORS.index(enemy.color), pattern,
+                                          enemy.fire_tick, enemy.health))
+        parts.append(self.enemy_bullets.snapshot())
+        parts.append(self.swarm.snapshot())
+        parts.append(self.world.snapshot())
+        return b''.join(parts)
+    
+    def restore(self, data):
+        player = self.player
+        (mode, self.score, self.level, self.enemy_spawn_timer, self.game_over, self.invulnerable,
+         self.swarm_waves, player.x, player.y, player.health, player.last_shot, rng_state, bullet_count,
+         enemy_count) = SNAPSHOT_HEADER.unpack_from(data)
+        self.mode = MODES[mode]
+        self.rng.setstate(rng_state)
+        
+        offset = SNAPSHOT_HEADER.size
+        bullets = struct.unpack_from(f'<{bullet_count * 2}i', data, offset)
+        offset += bullet_count * 8
+        player.bullets = [Bullet(x, y, 12, NEON_CYAN) for x, y in zip(bullets[::2], bullets[1::2])]
+        
+        self.enemies = []
+        for _ in range(enemy_count):
+            x, y, speed, color, pattern, fire_tick, health = ENEMY_STATE.unpack_from(data, offset)
+            offset += ENEMY_STATE.size
+            enemy = Enemy(x, y)
+            enemy.speed = speed
+            enemy.color = ENEMY_COLORS[color]
+            enemy.pattern = PATTERN_NAMES[pattern] if pattern >= 0 else None
+            enemy.fire_tick = fire_tick
+            enemy.health = health
+            self.enemies.append(enemy)
+        
+        offset = self.enemy_bullets.restore(data, offset)
+        offset = self.swarm.restore(data, offset)
+        self.world.restore(data, offset)
+    
+    def reset_game(self, mode='mission'):
+        self.mode = mode
+        self.enemy_bullets.clear()
+        self.invulnerable = 0
+        self.swarm.clear()
+        self.swarm_waves = 0
+        self.world.clear()
+        if mode == 'deep_strike':
+            self.world.start(self.rng.next64())
         self.player = Player(100, SCREEN_HEIGHT // 2)
         self.enemies = []
         self.particles = []
@@ -446,84 +680,140 @@ class Game:
         self.enemy_spawn_timer = 0
         self.game_over = False
         self.game_started = True
+        self.started = time.perf_counter()
+        self.last_run = None
+    
+    def update(self, keys=None, now=None):
+        """One frame of play; `keys` and `now` (ms) default to the keyboard
+        and the clock, so bots can play it headless"""
+        if not self.game_started or self.game_over:
+            return
+        
+        # Update game objects
+        self.player.update(pygame.key.get_pressed() if keys is None else keys,
+                           pygame.time.get_ticks() if now is None else now)
+        
+        # Spawn enemies (increases with level)
+        difficulty = self.difficulty
+        spawn_rate = max(difficulty['spawn_min'], difficulty['spawn_start'] - self.level * difficulty['spawn_step'])
+        if self.mode == 'bullet_hell':
+            spawn_rate = BULLET_HELL_SPAWN_RATE
+        elif self.mode == 'swarm':
+            spawn_rate = SWARM_WAVE_RATE
+        self.enemy_spawn_timer += 1
+        if self.mode == 'deep_strike':
+            self.advance_world()
+        elif self.enemy_spawn_timer > spawn_rate:
+            if self.mode == 'swarm':
+                self.spawn_swarm_wave()
+            else:
+                self.spawn_enemy()
+            self.enemy_spawn_timer = 0
+        
+        # Update enemies
+        for enemy in self.enemies[:]:
+            enemy.update()
+            if enemy.x < -enemy.width:
+                self.enemies.remove(enemy)
+        
+        if self.mode == 'bullet_hell':
+            self.update_enemy_bullets()
+        elif self.mode == 'swarm':
+            self.swarm.update(self.player.get_rect().center)
+        
+        # Update particles
+        for particle in self.particles[:]:
+            particle.update()
+            if particle.life <= 0:
+                self.particles.remove(particle)
+        
+        # Handle collisions
+        self.handle_collisions()
+    
+    def draw(self):
+        if not self.game_started:
+            self.draw_menu()
+        else:
+            # Game background
+            self.screen.fill(DARK_BG)
+            
+            # Moving stars
+            for star in self.stars:
+                star.update()
+                star.draw(self.screen)
+            
+            if not self.game_over:
+                # Draw game objects
+                self.player.draw(self.screen)
+                for enemy in self.enemies:
+                    # Awake but not in view yet (deep strike wakes them early)
+                    if enemy.x < SCREEN_WIDTH:
+                        enemy.draw(self.screen)
+                if self.mode == 'bullet_hell':
+                    self.enemy_bullets.draw(self.screen, NEON_PINK, WHITE)
+                elif self.mode == 'swarm':
+                    self.swarm.draw(self.screen, engine.get_sprite('swarm_drones', self.build_drone_sprites))
+                for particle in self.particles:
+                    particle.draw(self.screen)
+                
+                # Draw HUD
+                self.draw_hud()
+            else:
+                self.draw_game_over()
+        
+        quality.draw_readout(self.screen)
+        engine.flip()
     
     def run(self):
+        scores.start()
+        sound.start()
         while self.running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    engine.request_exit()
                     self.running = False
                 elif event.type == pygame.KEYDOWN:
-                    if not self.game_started:
+                    if event.key == pygame.K_ESCAPE:
+                        self.running = False
+                    elif event.key == pygame.K_F3:
+                        quality.toggle_readout()
+                    elif not self.game_started:
                         if event.key == pygame.K_UP:
-                            self.menu_selection = (self.menu_selection - 1) % 2
+                            self.menu_selection = (self.menu_selection - 1) % len(MENU_OPTIONS)
                         elif event.key == pygame.K_DOWN:
-                            self.menu_selection = (self.menu_selection + 1) % 2
+                            self.menu_selection = (self.menu_selection + 1) % len(MENU_OPTIONS)
                         elif event.key == pygame.K_RETURN:
-                            if self.menu_selection == 0:
-                                self.reset_game()
+                            mode = MENU_OPTIONS[self.menu_selection][1]
+                            if mode:
+                                self.reset_game(mode)
                             else:
                                 self.running = False
                     elif self.game_over:
                         if event.key == pygame.K_r:
-                            self.reset_game()
+                            self.reset_game(self.mode)
                         elif event.key == pygame.K_q:
                             self.running = False
             
-            if not self.game_started:
-                self.draw_menu()
-            else:
-                # Game background
-                self.screen.fill(DARK_BG)
-                
-                # Moving stars
-                for star in self.stars:
-                    star.update()
-                    star.draw(self.screen)
-                
-                if not self.game_over:
-                    # Update game objects
-                    self.player.update()
-                    
-                    # Spawn enemies (increases with level)
-                    spawn_rate = max(30, 90 - self.level * 5)
-                    self.enemy_spawn_timer += 1
-                    if self.enemy_spawn_timer > spawn_rate:
-                        self.spawn_enemy()
-                        self.enemy_spawn_timer = 0
-                    
-                    # Update enemies
-                    for enemy in self.enemies[:]:
-                        enemy.update()
-                        if enemy.x < -enemy.width:
-                            self.enemies.remove(enemy)
-                    
-                    # Update particles
-                    for particle in self.particles[:]:
-                        particle.update()
-                        if particle.life <= 0:
-                            self.particles.remove(particle)
-                    
-                    # Handle collisions
-                    self.handle_collisions()
-                    
-                    # Draw game objects
-                    self.player.draw(self.screen)
-                    for enemy in self.enemies:
-                        enemy.draw(self.screen)
-                    for particle in self.particles:
-                        particle.draw(self.screen)
-                    
-                    # Draw HUD
-                    self.draw_hud()
-                else:
-                    self.draw_game_over()
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            self.update()
+            self.draw()
+            engine.wait_frame(self.clock, FPS)
+            quality.update(engine.frame_time)
         
-        pygame.quit()
-        sys.exit()
+        engine.quit()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sky Domination")
+    parser.add_argument('--swarm', type=int, metavar='DRONES',
+                        help="skip the menu and start swarm mode with this many flocking drones")
+    parser.add_argument('--deep-strike', type=int, metavar='CHUNKS',
+                        help="skip the menu and start deep-strike mode with a level this many chunks long")
+    args = parser.parse_args()
+    
     game = Game()
+    if args.swarm:
+        game.reset_game('swarm')
+        game.swarm.spawn_flock(args.swarm, SCREEN_HEIGHT // 2, 0)
+    elif args.deep_strike:
+        game.world.chunks = args.deep_strike
+        game.reset_game('deep_strike')
     game.run()
\ No newline at end of file
@@ -0,0 +1,225 @@
+import argparse
+import mmap
+import random
+import struct
+import time
+
+# Compact Brick Breaker level files.
+#
+# A level is a small header followed by a rows x cols grid of 3-byte cells
+# (brick type, hit points, colour index). A level pack is a header, an
+# index of (offset, length) pairs and the level blobs back to back, so any
+# level can be found without reading the others.
+#
+# Files are opened through mmap and a Level only holds a memoryview into
+# the mapping: loading does no parsing beyond the header and no copying.
+# Brick objects are created by the game when it actually starts a level.
+
+LEVEL_MAGIC = b'BRKL'
+PACK_MAGIC = b'BRKP'
+VERSION = 1
+
+# magic, version, flags, cols, rows, brick width, brick height, margin, top
+LEVEL_HEADER = struct.Struct('<4sBBHHHHHH')
+# magic, version, level count
+PACK_HEADER = struct.Struct('<4sHI')
+# offset, length
+PACK_ENTRY = struct.Struct('<QI')
+CELL_SIZE = 3
+
+# Brick types
+EMPTY = 0
+NORMAL = 1
+UNBREAKABLE = 2
+
+
+class LevelFormatError(ValueError):
+    pass
+
+
+class Level:
+    def __init__(self, buffer):
+        if len(buffer) < LEVEL_HEADER.size:
+            raise LevelFormatError("level data is truncated")
+        (magic, version, self.flags, self.cols, self.rows, self.brick_width,
+         self.brick_height, self.margin, self.top) = LEVEL_HEADER.unpack_from(buffer)
+        if magic != LEVEL_MAGIC:
+            raise LevelFormatError("not a Brick Breaker level")
+        if version != VERSION:
+            raise LevelFormatError(f"unsupported level version {version}")
+
+        grid_size = self.cols * self.rows * CELL_SIZE
+        if len(buffer) < LEVEL_HEADER.size + grid_size:
+            raise LevelFormatError("level grid is truncated")
+        self.grid = memoryview(buffer)[LEVEL_HEADER.size:LEVEL_HEADER.size + grid_size]
+
+    def cell(self, row, col):
+        """(type, hit points, colour index) of one grid cell"""
+        offset = (row * self.cols + col) * CELL_SIZE
+        return tuple(self.grid[offset:offset + CELL_SIZE])
+
+    def cells(self):
+        """Yield (row, col, type, hit points, colour index) for every brick"""
+        grid = self.grid
+        cols = self.cols
+        for index in range(self.cols * self.rows):
+            offset = index * CELL_SIZE
+            brick_type = grid[offset]
+            if brick_type != EMPTY:
+                yield index // cols, index % cols, brick_type, grid[offset + 1], grid[offset + 2]
+
+    def release(self):
+        self.grid.release()
+
+
+def encode_level(cols, rows, cells, brick_width=75, brick_height=30, margin=5, top=50):
+    """Level blob from a flat row-major list of (type, hit points, colour) cells"""
+    grid = bytearray(cols * rows * CELL_SIZE)
+    for index, cell in enumerate(cells):
+        grid[index * CELL_SIZE:(index + 1) * CELL_SIZE] = bytes(cell)
+    header = LEVEL_HEADER.pack(LEVEL_MAGIC, VERSION, 0, cols, rows, brick_width, brick_height, margin, top)
+    return header + bytes(grid)
+
+
+def default_level_data():
+    # The original 8x10 wall: one colour per row, one hit per brick
+    rows, cols = 8, 10
+    return encode_level(cols, rows, [(NORMAL, 1, row) for row in range(rows) for _ in range(cols)])
+
+
+def random_level_data(cols, rows, rng, brick_width=None, brick_height=None, margin=1, top=50,
+                      screen_width=800, density=0.8):
+    if brick_width is None:
+        brick_width = max(1, (screen_width - (cols - 1) * margin) // cols)
+    if brick_height is None:
+        brick_height = max(1, brick_width // 2)
+    cells = []
+    for row in range(rows):
+        for _ in range(cols):
+            roll = rng.random()
+            if roll > density:
+                cells.append((EMPTY, 0, 0))
+            elif roll > density * 0.95:
+                cells.append((UNBREAKABLE, 0, 6))
+            else:
+                cells.append((NORMAL, rng.randint(1, 3), row % 8))
+    return encode_level(cols, rows, cells, brick_width, brick_height, margin, top)
+
+
+def write_pack(path, levels):
+    """Write a level pack from a list of level blobs"""
+    offset = PACK_HEADER.size + PACK_ENTRY.size * len(levels)
+    with open(path, 'wb') as pack_file:
+        pack_file.write(PACK_HEADER.pack(PACK_MAGIC, VERSION, len(levels)))
+        for data in levels:
+            pack_file.write(PACK_ENTRY.pack(offset, len(data)))
+            offset += len(data)
+        for data in levels:
+            pack_file.write(data)
+
+
+def write_level(path, data):
+    with open(path, 'wb') as level_file:
+        level_file.write(data)
+
+
+class MappedFile:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        # Any Level still holding a view must be released first
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LevelPack(MappedFile):
+    def __init__(self, path):
+        MappedFile.__init__(self, path)
+        magic, version, self.count = PACK_HEADER.unpack_from(self.map)
+        if magic != PACK_MAGIC:
+            self.close()
+            raise LevelFormatError("not a Brick Breaker level pack")
+        if version != VERSION:
+            self.close()
+            raise LevelFormatError(f"unsupported pack version {version}")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(f"level {number} not in pack of {self.count}")
+        offset, length = PACK_ENTRY.unpack_from(self.map, PACK_HEADER.size + PACK_ENTRY.size * number)
+        with memoryview(self.map) as view:
+            return Level(view[offset:offset + length])
+
+
+class LevelFile(MappedFile):
+    """A single level file opened through mmap"""
+
+    def __init__(self, path):
+        MappedFile.__init__(self, path)
+        self.level = Level(memoryview(self.map))
+
+    def close(self):
+        self.level.release()
+        MappedFile.close(self)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brick Breaker level packs")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    make = commands.add_parser('make-pack', help="write a pack of random levels")
+    make.add_argument('path')
+    make.add_argument('--levels', type=int, default=20)
+    make.add_argument('--cols', type=int, default=100)
+    make.add_argument('--rows', type=int, default=100)
+    make.add_argument('--seed', type=int, default=0)
+
+    info = commands.add_parser('info', help="list the levels in a pack")
+    info.add_argument('path')
+
+    bench = commands.add_parser('bench', help="time opening a pack and loading every level")
+    bench.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'make-pack':
+        rng = random.Random(args.seed)
+        levels = [default_level_data()]
+        levels += [random_level_data(args.cols, args.rows, rng) for _ in range(args.levels - 1)]
+        write_pack(args.path, levels)
+        print(f"Wrote {len(levels)} levels to {args.path}")
+
+    elif args.command == 'info':
+        with LevelPack(args.path) as pack:
+            for number in range(len(pack)):
+                level = pack[number]
+                cols, rows, width, height = level.cols, level.rows, level.brick_width, level.brick_height
+                level.release()
+                print(f"{number:4d}: {cols}x{rows} bricks of {width}x{height}")
+
+    elif args.command == 'bench':
+        start = time.perf_counter()
+        pack = LevelPack(args.path)
+        opened = time.perf_counter()
+        worst = 0
+        for number in range(len(pack)):
+            level_start = time.perf_counter()
+            level = pack[number]
+            worst = max(worst, time.perf_counter() - level_start)
+            level.release()
+        pack.close()
+        print(f"open: {(opened - start) * 1000:.3f} ms, slowest level load: {worst * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
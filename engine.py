@@ -0,0 +1,349 @@
+import os
+import sys
+import time
+from functools import partial
+
+import pygame
+
+import scheduler
+import scores
+
+# Shared start-up, window and cache helpers for the games.
+#
+# Nothing here runs at import time. pygame.init() would bring up every SDL
+# subsystem (audio, joystick, ...) even though the games only ever draw and
+# read the keyboard, so instead each Game asks for the display and fonts
+# the first time it needs them.
+
+# Start-up timestamps (time.perf_counter) recorded the first time each
+# stage is reached, read by startupReport.py
+startup_marks = {}
+
+# Set by startupReport.py to stop a game right after its first flip
+stop_after_first_flip = False
+
+# recorder.Recorder fed every frame by flip(), when recording
+recorder = None
+
+_fonts = {}
+_sprites = {}
+
+# Cache lookups from the games, and how many entries warm_up() was asked
+# for and has finished
+cache_stats = {'hits': 0, 'misses': 0, 'queued': 0, 'warmed': 0}
+# Misses during the frame shown by the last flip()
+frame_misses = 0
+_misses_at_flip = 0
+
+# When the launcher hosts the games this is its window; every game then
+# draws into a centred subsurface of it instead of opening its own
+_host_screen = None
+
+# Set when the window was closed (as opposed to a game just being left)
+exit_requested = False
+
+# SDL renderer of a game drawing through textures (render.TextureBackend),
+# and the name of the render driver it got
+_renderer = None
+renderer_driver = None
+
+# Input latency tracking, off unless track_input_latency() was called
+_latency = None
+# Set once a game has narrowed the event types SDL queues
+_events_filtered = False
+
+# Seconds the last frame took to build, from the end of one wait_frame()
+# to the start of the next; read by quality.py
+frame_time = 0.0
+_frame_end = None
+
+# SDL_RENDERER_ACCELERATED, in a render driver's flags
+ACCELERATED = 0x02
+
+# Events whose latency is measured
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+
+class FirstFlip(Exception):
+    pass
+
+
+class InputLatency:
+    """Time from each input event arriving to the first flip after the game read it"""
+
+    def __init__(self):
+        self.early = []  # (arrival, event) picked up while waiting for the next frame
+        self.pending = []  # arrival times of events read but not yet shown
+        self.samples = []  # seconds
+        self.frame_start = time.perf_counter()
+
+    def percentiles(self):
+        """p50, p95, p99 and max latency in ms, or None before any input"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {name: ordered[min(last, int(fraction * len(ordered)))] * 1000
+                for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))}
+
+
+def mark(stage):
+    if stage not in startup_marks:
+        startup_marks[stage] = time.perf_counter()
+
+
+def init_timer():
+    # pygame.time.get_ticks() returns 0 until SDL's timer is running
+    try:
+        from pygame._sdl2 import sdl2
+        sdl2.init_subsystem(sdl2.INIT_TIMER)
+    except (ImportError, AttributeError):
+        pygame.init()
+
+
+def host_display(size, caption):
+    """Open the one window that all games will share"""
+    global _host_screen
+    _host_screen = None
+    _host_screen = init_display(size, caption)
+    return _host_screen
+
+
+def init_display(size, caption):
+    """Open (or reuse) the game window, starting only the video subsystem"""
+    global _frame_end
+    # Frame timing starts over with every game
+    _frame_end = None
+    if _host_screen is not None:
+        pygame.display.set_caption(caption)
+        _host_screen.fill((0, 0, 0))
+        area = pygame.Rect((0, 0), size)
+        area.center = _host_screen.get_rect().center
+        return _host_screen.subsurface(area)
+
+    if not pygame.display.get_init():
+        pygame.display.init()
+        init_timer()
+        mark('display_init')
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(caption)
+    return screen
+
+
+def init_renderer(size, caption):
+    """Open the game window with an SDL Renderer instead of a display
+    surface: the first hardware-accelerated render driver that works, else
+    SDL's software renderer. None when the launcher hosts the game (it only
+    shares a surface) or pygame has no _sdl2 module; the caller then falls
+    back to init_display()."""
+    global _renderer, renderer_driver, _frame_end
+    if _host_screen is not None:
+        return None
+    try:
+        from pygame._sdl2 import video
+    except ImportError:
+        return None
+
+    _frame_end = None
+    if not pygame.display.get_init():
+        pygame.display.init()
+        init_timer()
+        mark('display_init')
+    # Let SDL merge consecutive copies into as few draw calls as it can
+    os.environ.setdefault('SDL_RENDER_BATCHING', '1')
+    window = video.Window(caption, size)
+    drivers = sorted(enumerate(video.get_drivers()), key=lambda driver: not driver[1].flags & ACCELERATED)
+    for index, info in drivers:
+        try:
+            _renderer = video.Renderer(window, index=index)
+        except video.error:
+            continue
+        renderer_driver = info.name
+        mark('renderer_init')
+        return _renderer
+    window.destroy()
+    return None
+
+
+def get_font(size):
+    """Default font at `size`, created once and then shared"""
+    font = _fonts.get(size)
+    if font is None:
+        cache_stats['misses'] += 1
+        font = _create_font(size)
+    else:
+        cache_stats['hits'] += 1
+    return font
+
+
+def _create_font(size):
+    if not pygame.font.get_init():
+        pygame.font.init()
+        mark('font_init')
+    font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+def get_sprite(key, build):
+    """Surface for `key`, built by calling `build()` the first time only"""
+    sprite = _sprites.get(key)
+    if sprite is None:
+        cache_stats['misses'] += 1
+        sprite = _sprites[key] = build()
+    else:
+        cache_stats['hits'] += 1
+    return sprite
+
+
+def _warm_font(size):
+    if size not in _fonts:
+        _create_font(size)
+    cache_stats['warmed'] += 1
+
+
+def _warm_sprite(key, build):
+    if key not in _sprites:
+        _sprites[key] = build()
+    cache_stats['warmed'] += 1
+
+
+def warm_up(fonts=(), sprites=()):
+    """Create font sizes and build (key, build) sprites one at a time in
+    the slack at the end of frames (scheduler.py). Returns at once; a game
+    that needs an entry before it is ready simply builds its own copy, so
+    the main loop never waits."""
+    fonts = [size for size in fonts if size not in _fonts]
+    sprites = [(key, build) for key, build in sprites if key not in _sprites]
+    cache_stats['queued'] += len(fonts) + len(sprites)
+    for size in fonts:
+        scheduler.defer('warm font', partial(_warm_font, size))
+    for key, build in sprites:
+        scheduler.defer('warm sprite', partial(_warm_sprite, key, build))
+
+
+def stop_warm_up():
+    """Abandon any queued warm-up; call before pygame.quit()"""
+    scheduler.cancel('warm font', 'warm sprite')
+
+
+def warm_up_progress():
+    """(entries warmed, entries queued) over every warm_up() call"""
+    return cache_stats['warmed'], cache_stats['queued']
+
+
+def cache_report():
+    warmed, queued = warm_up_progress()
+    return (f"cache: {warmed}/{queued} warmed  {cache_stats['hits']} hits  {cache_stats['misses']} misses  "
+            f"{frame_misses} last frame")
+
+
+def track_input_latency():
+    """Start timestamping input; games must then use poll_events() and wait_frame()"""
+    global _latency
+    _latency = InputLatency()
+    return _latency
+
+
+def latency_report():
+    percentiles = _latency.percentiles() if _latency else None
+    if percentiles is None:
+        return "input latency: no input events"
+    values = "  ".join(f"{name} {value:.1f} ms" for name, value in percentiles.items())
+    return f"input latency over {len(_latency.samples)} events: {values}"
+
+
+def allow_events(types):
+    """Have SDL queue only these event types; everything else is dropped at the source"""
+    global _events_filtered
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(types)
+    _events_filtered = True
+
+
+def poll_events():
+    """pygame.event.get(), stamping input events when latency tracking is on"""
+    if _latency is None:
+        return pygame.event.get()
+    now = time.perf_counter()
+    events = _latency.early + [(now, event) for event in pygame.event.get()]
+    _latency.early = []
+    _latency.pending += [arrival for arrival, event in events if event.type in INPUT_EVENTS]
+    return [event for _, event in events]
+
+
+def wait_frame(clock, fps):
+    """clock.tick(fps), recording frame_time and giving the frame's slack
+    to scheduler.idle() first; with latency tracking it waits in 1 ms
+    slices so input that arrives in the meantime gets an accurate
+    timestamp"""
+    global frame_time, _frame_end
+    if _frame_end is not None:
+        frame_time = time.perf_counter() - _frame_end
+    scheduler.idle(_frame_end, 1 / fps)
+    if _latency is None:
+        elapsed = clock.tick(fps)
+        _frame_end = time.perf_counter()
+        return elapsed
+    deadline = _latency.frame_start + 1 / fps
+    while True:
+        now = time.perf_counter()
+        _latency.early += [(now, event) for event in pygame.event.get()]
+        if now >= deadline:
+            break
+        time.sleep(min(0.001, deadline - now))
+    _latency.frame_start = _frame_end = now
+    # Keeps clock.get_fps() working; the wait itself is already done
+    return clock.tick()
+
+
+def request_exit():
+    global exit_requested
+    exit_requested = True
+
+
+def quit():
+    global _events_filtered, _renderer
+    if _events_filtered:
+        pygame.event.set_allowed(None)
+        _events_filtered = False
+    # Hosted games just return to the launcher's menu
+    if _host_screen is not None:
+        return
+    if recorder is not None:
+        recorder.close()
+        print(recorder.report())
+    scores.stop()
+    stop_warm_up()
+    scheduler.stop()
+    # The renderer goes before the video subsystem it belongs to
+    _renderer = None
+    pygame.quit()
+    sys.exit()
+
+
+def _present():
+    if _renderer is not None:
+        _renderer.present()
+    else:
+        pygame.display.flip()
+
+
+def flip():
+    global frame_misses, _misses_at_flip
+    frame_misses = cache_stats['misses'] - _misses_at_flip
+    _misses_at_flip = cache_stats['misses']
+    if recorder is not None:
+        # Before presenting: a renderer's back buffer is undefined afterwards
+        recorder.capture(_renderer.to_surface() if _renderer is not None else pygame.display.get_surface())
+    if 'first_flip' not in startup_marks:
+        mark('first_frame')
+        _present()
+        mark('first_flip')
+        if stop_after_first_flip:
+            raise FirstFlip()
+        return
+    _present()
+    if _latency is not None and _latency.pending:
+        shown = time.perf_counter()
+        _latency.samples += [shown - arrival for arrival in _latency.pending]
+        _latency.pending = []
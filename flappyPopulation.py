@@ -0,0 +1,203 @@
+import argparse
+import time
+
+import numpy as np
+
+from FlappyBirdClone import (SCREEN_WIDTH, SCREEN_HEIGHT, BIRD_SIZE, PIPE_WIDTH,
+                             PIPE_GAP, PIPE_SPEED, GRAVITY, JUMP_FORCE, FPS)
+
+# Headless NumPy engine that steps a whole population of birds at once
+# against one shared pipe sequence, using FlappyBirdClone's rules:
+# jump sets the velocity, gravity is added, the bird dies above the top or
+# 30px from the bottom, and Bird.get_rect is tested against
+# Pipe.get_rects. Every bird has the same x, so only the one pipe that can
+# overlap that column ever needs testing.
+
+BIRD_X = SCREEN_WIDTH // 4
+BIRD_START_Y = SCREEN_HEIGHT // 2
+GROUND_Y = SCREEN_HEIGHT - 30
+PIPE_SPACING = 300
+GAP_MIN = 150
+GAP_MAX = SCREEN_HEIGHT - 200
+
+# Observation columns handed to policies
+OBSERVATIONS = ['y', 'velocity', 'pipe_dx', 'gap_dy']
+
+MAX_FRAMES = FPS * 60
+
+
+class PopulationSim:
+    def __init__(self, count, seed=0):
+        self.count = count
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.y = np.full(self.count, float(BIRD_START_Y))
+        self.velocity = np.zeros(self.count)
+        self.alive = np.ones(self.count, dtype=bool)
+        self.frames_alive = np.zeros(self.count, dtype=np.int32)
+        self.score = np.zeros(self.count, dtype=np.int32)
+        self.frame = 0
+        # Only a handful of pipes exist at once: [x, gap_y, passed]
+        self.pipes = []
+
+    def spawn_pipe(self):
+        gap_y = int(self.rng.integers(GAP_MIN, GAP_MAX, endpoint=True))
+        self.pipes.append([SCREEN_WIDTH, gap_y, False])
+
+    def next_pipe(self):
+        for pipe in self.pipes:
+            if pipe[0] + PIPE_WIDTH >= BIRD_X - BIRD_SIZE // 2:
+                return pipe
+        return [SCREEN_WIDTH, SCREEN_HEIGHT // 2, False]
+
+    def observations(self):
+        pipe_x, gap_y, _ = self.next_pipe()
+        obs = np.empty((self.count, len(OBSERVATIONS)))
+        obs[:, 0] = self.y / SCREEN_HEIGHT
+        obs[:, 1] = self.velocity / 10.0
+        obs[:, 2] = (pipe_x - BIRD_X) / SCREEN_WIDTH
+        obs[:, 3] = (gap_y - self.y) / SCREEN_HEIGHT
+        return obs
+
+    def step(self, jump):
+        """Advance one frame; `jump` is a bool array (flap this frame)"""
+        alive = self.alive
+        self.frame += 1
+
+        # Bird.jump then Bird.update. Dead birds keep falling too; that is
+        # cheaper than masked updates and nothing reads their state
+        np.copyto(self.velocity, JUMP_FORCE, where=jump)
+        self.velocity += GRAVITY
+        self.y += self.velocity
+
+        dead = (self.y > GROUND_Y) | (self.y < 0)
+
+        # Bird.get_rect: pygame.Rect truncates the float top edge
+        top = np.trunc(self.y - BIRD_SIZE // 2)
+        bird_left = BIRD_X - BIRD_SIZE // 2
+        for pipe in self.pipes:
+            pipe[0] -= PIPE_SPEED
+
+            if not pipe[2] and pipe[0] + PIPE_WIDTH < BIRD_X:
+                pipe[2] = True
+                self.score += alive
+
+            # Pipe.get_rects, only when the pipe overlaps the birds' column
+            if pipe[0] < bird_left + BIRD_SIZE and bird_left < pipe[0] + PIPE_WIDTH:
+                gap_top = pipe[1] - PIPE_GAP // 2
+                gap_bottom = pipe[1] + PIPE_GAP // 2
+                dead |= (top < gap_top) | (top + BIRD_SIZE > gap_bottom)
+
+        self.pipes = [pipe for pipe in self.pipes if pipe[0] >= -PIPE_WIDTH]
+        if not self.pipes or self.pipes[-1][0] < SCREEN_WIDTH - PIPE_SPACING:
+            self.spawn_pipe()
+
+        # Birds that die this frame still count it, as in the game
+        self.frames_alive += alive
+        alive &= ~dead
+
+    def fitness(self):
+        return self.frames_alive + self.score * 100
+
+    def run(self, policy, max_frames=MAX_FRAMES):
+        self.reset()
+        while self.alive.any() and self.frame < max_frames:
+            self.step(policy.decide(self.observations()))
+        return self.fitness()
+
+
+class LinearPolicy:
+    """One linear flap/no-flap rule per bird, all evaluated as a single matmul"""
+
+    def __init__(self, weights, bias):
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def random(cls, count, rng):
+        return cls(rng.normal(0, 1, (count, len(OBSERVATIONS))), rng.normal(0, 1, count))
+
+    def decide(self, obs):
+        return np.einsum('ij,ij->i', obs, self.weights) + self.bias > 0
+
+    def select(self, indices):
+        return LinearPolicy(self.weights[indices], self.bias[indices])
+
+    def evolve(self, fitness, rng, elite_fraction=0.05, mutation=0.2):
+        """Next generation: keep the elite, refill with mutated copies of it"""
+        count = len(self.bias)
+        elite_count = max(1, int(count * elite_fraction))
+        elite = np.argsort(fitness)[-elite_count:]
+        parents = rng.choice(elite, count - elite_count)
+
+        weights = np.concatenate([self.weights[elite],
+                                  self.weights[parents] + rng.normal(0, mutation, (len(parents), len(OBSERVATIONS)))])
+        bias = np.concatenate([self.bias[elite],
+                               self.bias[parents] + rng.normal(0, mutation, len(parents))])
+        return LinearPolicy(weights, bias)
+
+
+def render_best(policy, fitness, best_count, seed, max_frames):
+    """Replay the best birds of a generation in a window"""
+    import pygame
+    import engine
+    from FlappyBirdClone import COLORS, Pipe
+
+    best = np.argsort(fitness)[-best_count:]
+    policy = policy.select(best)
+    sim = PopulationSim(len(best), seed)
+
+    screen = engine.init_display((SCREEN_WIDTH, SCREEN_HEIGHT), "NEON FLAPPY BIRD - best birds")
+    clock = pygame.time.Clock()
+    pipe_sprite = Pipe(SCREEN_WIDTH, SCREEN_HEIGHT // 2)
+
+    while sim.alive.any() and sim.frame < max_frames:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return
+        sim.step(policy.decide(sim.observations()))
+
+        screen.fill(COLORS['bg_start'])
+        for pipe_x, gap_y, _ in sim.pipes:
+            pipe_sprite.x, pipe_sprite.gap_y = pipe_x, gap_y
+            pipe_sprite.draw(screen)
+        for y in sim.y[sim.alive]:
+            pygame.draw.circle(screen, COLORS['bird_main'], (BIRD_X, int(y)), BIRD_SIZE // 2)
+        engine.flip()
+        clock.tick(FPS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evolve Flappy Bird controllers with a vectorized population")
+    parser.add_argument('--birds', type=int, default=10000)
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--render', type=int, default=0, metavar='N',
+                        help="replay the best N birds of the last generation")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    policy = LinearPolicy.random(args.birds, rng)
+    sim = PopulationSim(args.birds, args.seed)
+
+    for generation in range(args.generations):
+        # A fresh pipe sequence each generation so nothing overfits one course
+        sim.seed = args.seed + generation
+        start = time.perf_counter()
+        fitness = sim.run(policy, args.max_frames)
+        elapsed = time.perf_counter() - start
+        print(f"gen {generation:3d}: best score {sim.score.max():4d}  mean frames {sim.frames_alive.mean():7.1f}"
+              f"  ({sim.frame} frames, {elapsed * 1000:.0f} ms)")
+        if generation < args.generations - 1:
+            policy = policy.evolve(fitness, rng)
+
+    if args.render:
+        render_best(policy, fitness, args.render, sim.seed, args.max_frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import numpy as np
+import pygame
+
+# Whole-playfield rendering for grid games.
+#
+# Every cell type gets a tile: one cell's worth of pixels, drawn once with
+# pygame in the screen's own pixel format. A frame is then a palette
+# lookup, tiles[cells], that turns a (rows, cols) array of cell types into
+# pixels in a single NumPy gather, rearranged from tile order into screen
+# order and written straight into the screen through a pixels2d view.
+# The cost depends on the size of the playfield, never on how many cells
+# are filled.
+
+
+class GridRaster:
+    def __init__(self, screen, cell_size, draw_tile, types):
+        """draw_tile(surface, cell_type) paints one cell_size x cell_size tile"""
+        self.cell_size = cell_size
+        tiles = []
+        for cell_type in range(types):
+            tile = pygame.Surface((cell_size, cell_size), 0, screen)
+            draw_tile(tile, cell_type)
+            tiles.append(pygame.surfarray.array2d(tile))
+        # (types, x, y) mapped pixel values
+        self.tiles = np.stack(tiles)
+
+    def draw(self, screen, cells, offset=(0, 0)):
+        """Fill `screen` from `cells` (rows, cols), skipping `offset` pixels
+        of the first column and row"""
+        rows, cols = cells.shape
+        size = self.cell_size
+        # (cols, rows, x, y) -> (cols, x, rows, y) -> screen columns and rows
+        image = self.tiles[cells.T].transpose(0, 2, 1, 3).reshape(cols * size, rows * size)
+        width, height = screen.get_size()
+        x, y = offset
+        pixels = pygame.surfarray.pixels2d(screen)
+        pixels[:] = image[x:x + width, y:y + height]
+        del pixels
@@ -0,0 +1,114 @@
+import importlib
+import time
+
+import pygame
+
+import engine
+import scheduler
+import scores
+
+# Arcade launcher: one window, one font/sprite cache, all five games.
+# Each game module is imported the first time it is picked and its Game
+# runs inside the shared window. ESC (or a game's own quit key) comes back
+# here instead of exiting the process.
+
+SCREEN_WIDTH = 1200
+SCREEN_HEIGHT = 800
+FPS = 30
+
+GAMES = [
+    ('snake', "SNAKE"),
+    ('pongGame', "NEON PONG"),
+    ('BrickBreaker', "BRICK BREAKER"),
+    ('FlappyBirdClone', "NEON FLAPPY BIRD"),
+    ('SpaceShooter', "SKY DOMINATION"),
+]
+
+COLORS = {
+    'bg': (10, 10, 24),
+    'title': (0, 255, 255),
+    'item': (255, 255, 255),
+    'selected': (57, 255, 20),
+    'hint': (128, 128, 128),
+}
+
+
+class Launcher:
+    def __init__(self):
+        self.screen = engine.host_display((SCREEN_WIDTH, SCREEN_HEIGHT), "ARCADE")
+        self.clock = pygame.time.Clock()
+        self.font_title = engine.get_font(72)
+        self.font_item = engine.get_font(48)
+        self.font_small = engine.get_font(24)
+        self.selection = 0
+        self.last_switch_ms = None
+
+    def launch(self, module_name):
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        game = module.Game()
+        self.last_switch_ms = (time.perf_counter() - start) * 1000
+
+        game.run()
+
+        # Back in the menu
+        pygame.display.set_caption("ARCADE")
+        pygame.event.clear()
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_UP:
+                    self.selection = (self.selection - 1) % len(GAMES)
+                elif event.key == pygame.K_DOWN:
+                    self.selection = (self.selection + 1) % len(GAMES)
+                elif event.key == pygame.K_RETURN:
+                    self.launch(GAMES[self.selection][0])
+                    if engine.exit_requested:
+                        return False
+                elif event.key == pygame.K_ESCAPE:
+                    return False
+        return True
+
+    def draw(self):
+        self.screen.fill(COLORS['bg'])
+
+        title = self.font_title.render("ARCADE", True, COLORS['title'])
+        self.screen.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2, 150)))
+
+        for i, (_, name) in enumerate(GAMES):
+            color = COLORS['selected'] if i == self.selection else COLORS['item']
+            text = self.font_item.render(name, True, color)
+            rect = text.get_rect(center=(SCREEN_WIDTH // 2, 300 + i * 70))
+            if i == self.selection:
+                pygame.draw.rect(self.screen, color, rect.inflate(40, 20), 2)
+            self.screen.blit(text, rect)
+
+        hint = self.font_small.render("UP/DOWN to choose | ENTER to play | ESC to leave a game", True, COLORS['hint'])
+        self.screen.blit(hint, hint.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60)))
+
+        if self.last_switch_ms is not None:
+            switch = self.font_small.render(f"Last game start: {self.last_switch_ms:.1f} ms", True, COLORS['hint'])
+            self.screen.blit(switch, (20, 20))
+
+        engine.flip()
+
+    def run(self):
+        running = True
+        while running:
+            running = self.handle_events()
+            if running:
+                self.draw()
+            engine.wait_frame(self.clock, FPS)
+
+        scores.stop()
+        engine.stop_warm_up()
+        scheduler.stop()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    launcher = Launcher()
+    launcher.run()
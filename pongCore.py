@@ -0,0 +1,334 @@
+import math
+import random
+
+from pongGame import (SCREEN_WIDTH, SCREEN_HEIGHT, PADDLE_WIDTH, PADDLE_HEIGHT,
+                      BALL_SIZE, PADDLE_SPEED, BALL_SPEED, MAX_BALL_SPEED,
+                      BALL_SPEED_UP, WIN_SCORE)
+
+# Headless Pong rules, kept in step with pongGame.Game.update:
+# paddles move first (handle_events), then Ball.move, paddle bounces,
+# scoring and the win check. No pygame objects, no particles, no clock.
+
+LEFT_PADDLE_X = 50
+RIGHT_PADDLE_X = SCREEN_WIDTH - 50 - PADDLE_WIDTH
+PADDLE_START_Y = SCREEN_HEIGHT // 2 - PADDLE_HEIGHT // 2
+HALF_BALL = BALL_SIZE // 2
+
+# Paddle moves
+UP = -1
+STAY = 0
+DOWN = 1
+
+# Longest match we play before calling it a draw (10 minutes at 60 FPS)
+MAX_FRAMES = 60 * 60 * 10
+
+# Ball centre x at which it touches each side's paddle
+PADDLE_PLANES = {1: LEFT_PADDLE_X + PADDLE_WIDTH + HALF_BALL, 2: RIGHT_PADDLE_X - HALF_BALL}
+# Hit positions (0 = top of the paddle, 1 = bottom) a predictor may aim with
+AIM_POINTS = (0.2, 0.5, 0.8)
+
+
+def rect_round(value):
+    # pygame.Rect rounds half away from zero when a float is assigned
+    if value >= 0:
+        return int(value + 0.5)
+    return -int(-value + 0.5)
+
+
+def bounce_speed(speed_x, speed_y, hit_pos):
+    """Ball speed after a paddle hit at `hit_pos`, as pongGame.Ball.bounce_paddle"""
+    angle = (hit_pos - 0.5) * math.pi / 3
+    speed = math.sqrt(speed_x ** 2 + speed_y ** 2)
+    speed_x = speed * math.cos(angle) * (-1 if speed_x > 0 else 1)
+    speed_y = speed * math.sin(angle)
+
+    speed_x *= BALL_SPEED_UP
+    speed_y *= BALL_SPEED_UP
+
+    if abs(speed_x) > MAX_BALL_SPEED:
+        speed_x = MAX_BALL_SPEED * (1 if speed_x > 0 else -1)
+    if abs(speed_y) > MAX_BALL_SPEED:
+        speed_y = MAX_BALL_SPEED * (1 if speed_y > 0 else -1)
+    return speed_x, speed_y
+
+
+def ball_y_after(y, speed_y, frames):
+    """Ball centre y after `frames` frames of PongState.step, wall bounces
+    included, in constant time however many bounces there are"""
+    if not speed_y or frames <= 0:
+        return y + speed_y * frames
+    step = abs(speed_y)
+    top, bottom = HALF_BALL, SCREEN_HEIGHT - HALF_BALL
+    # The first frame that ends on or past the wall ahead reverses the ball
+    first = max(1, math.ceil(((y - top) if speed_y < 0 else (bottom - y)) / step))
+    if frames <= first:
+        return y + speed_y * frames
+    # From that point it goes to the other wall in `across` frames and
+    # comes back to exactly the same point, over and over
+    turn = y + speed_y * first
+    across = math.ceil(((bottom - turn) if speed_y < 0 else (turn - top)) / step)
+    back = (frames - first) % (2 * across)
+    if back > across:
+        back = 2 * across - back
+    return turn - math.copysign(back * step, speed_y)
+
+
+def predict_crossing(x, y, speed_x, speed_y, plane_x):
+    """(frames, y) for a ball at (x, y) to first pass plane_x, or None if it
+    is heading away or already past"""
+    if not speed_x or (plane_x - x) * speed_x < 0:
+        return None
+    frames = math.floor((plane_x - x) / speed_x) + 1
+    return frames, ball_y_after(y, speed_y, frames)
+
+
+class PongState:
+    def __init__(self, serve_x=1, serve_y=1):
+        self.ball_x = SCREEN_WIDTH // 2
+        self.ball_y = SCREEN_HEIGHT // 2
+        self.speed_x = BALL_SPEED * serve_x
+        self.speed_y = BALL_SPEED * serve_y
+        self.paddle1_y = PADDLE_START_Y
+        self.paddle2_y = PADDLE_START_Y
+        self.score1 = 0
+        self.score2 = 0
+        self.winner = 0  # 0 = playing, 1 = left, 2 = right
+        self.frame = 0
+
+    def copy(self):
+        state = PongState.__new__(PongState)
+        state.__dict__.update(self.__dict__)
+        return state
+
+    def move_paddle(self, y, move):
+        if move < 0 and y > 0:
+            y -= PADDLE_SPEED
+        elif move > 0 and y < SCREEN_HEIGHT - PADDLE_HEIGHT:
+            y += PADDLE_SPEED
+        return y
+
+    def hits_paddle(self, paddle_x, paddle_y):
+        ball_left = rect_round(self.ball_x - HALF_BALL)
+        ball_top = rect_round(self.ball_y - HALF_BALL)
+        return (ball_left < paddle_x + PADDLE_WIDTH and paddle_x < ball_left + BALL_SIZE and
+                ball_top < paddle_y + PADDLE_HEIGHT and paddle_y < ball_top + BALL_SIZE)
+
+    def bounce_paddle(self, paddle_y):
+        hit_pos = (self.ball_y - paddle_y) / PADDLE_HEIGHT
+        self.speed_x, self.speed_y = bounce_speed(self.speed_x, self.speed_y, hit_pos)
+
+    def reset_ball(self):
+        self.ball_x = SCREEN_WIDTH // 2
+        self.ball_y = SCREEN_HEIGHT // 2
+        self.speed_x = BALL_SPEED * (1 if self.speed_x > 0 else -1)
+        self.speed_y = BALL_SPEED * (1 if self.speed_y > 0 else -1)
+
+    def step(self, move1, move2):
+        """Advance one frame. Returns 1 or 2 when that player scored, else 0"""
+        if self.winner:
+            return 0
+        self.frame += 1
+
+        self.paddle1_y = self.move_paddle(self.paddle1_y, move1)
+        self.paddle2_y = self.move_paddle(self.paddle2_y, move2)
+
+        # Ball.move
+        self.ball_x += self.speed_x
+        self.ball_y += self.speed_y
+        if self.ball_y <= HALF_BALL or self.ball_y >= SCREEN_HEIGHT - HALF_BALL:
+            self.speed_y = -self.speed_y
+
+        if self.speed_x < 0 and self.hits_paddle(LEFT_PADDLE_X, self.paddle1_y):
+            self.bounce_paddle(self.paddle1_y)
+        if self.speed_x > 0 and self.hits_paddle(RIGHT_PADDLE_X, self.paddle2_y):
+            self.bounce_paddle(self.paddle2_y)
+
+        scored = 0
+        if self.ball_x < 0:
+            self.score2 += 1
+            self.reset_ball()
+            scored = 2
+        elif self.ball_x > SCREEN_WIDTH:
+            self.score1 += 1
+            self.reset_ball()
+            scored = 1
+
+        if self.score1 >= WIN_SCORE:
+            self.winner = 1
+        elif self.score2 >= WIN_SCORE:
+            self.winner = 2
+        return scored
+
+
+# Paddle controllers. Each one gets its own seeded Random so a match
+# replays exactly from its seed, and answers UP, STAY or DOWN per frame.
+
+class Controller:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose_move(self, state, side):
+        return STAY
+
+    @staticmethod
+    def paddle_center(state, side):
+        paddle_y = state.paddle1_y if side == 1 else state.paddle2_y
+        return paddle_y + PADDLE_HEIGHT / 2
+
+
+class IdleController(Controller):
+    pass
+
+
+class RandomController(Controller):
+    def choose_move(self, state, side):
+        return self.rng.choice((UP, STAY, DOWN))
+
+
+class TrackingController(Controller):
+    dead_zone = 4
+
+    def choose_move(self, state, side):
+        offset = state.ball_y - self.paddle_center(state, side)
+        if offset < -self.dead_zone:
+            return UP
+        if offset > self.dead_zone:
+            return DOWN
+        return STAY
+
+
+class LazyTrackingController(TrackingController):
+    # Only reacts once the ball is heading its way, with a wide dead zone
+    dead_zone = 30
+
+    def choose_move(self, state, side):
+        coming = state.speed_x < 0 if side == 1 else state.speed_x > 0
+        if not coming:
+            return STAY
+        return TrackingController.choose_move(self, state, side)
+
+
+class NoisyTrackingController(TrackingController):
+    mistake_rate = 0.15
+
+    def choose_move(self, state, side):
+        if self.rng.random() < self.mistake_rate:
+            return self.rng.choice((UP, STAY, DOWN))
+        return TrackingController.choose_move(self, state, side)
+
+
+class PredictingController(Controller):
+    # Goes to where the ball will cross its paddle instead of following it.
+    # The crossing is predicted in closed form once per change of ball
+    # velocity (serve, wall or paddle bounce), not simulated frame by frame.
+    # Difficulty comes from reacting late and predicting wrong.
+    dead_zone = 4
+    reaction_delay = 0  # frames between a bounce and acting on it
+    error = 0  # standard deviation of each prediction, in pixels
+    aim = True  # hit with the part of the paddle that beats the opponent
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.velocity = None
+        self.target = SCREEN_HEIGHT / 2
+        self.pending = None
+        self.wait = 0
+
+    def choose_move(self, state, side):
+        velocity = (state.speed_x, state.speed_y)
+        if velocity != self.velocity:
+            self.velocity = velocity
+            self.pending = self.plan(state, side)
+            if self.error:
+                self.pending += self.rng.gauss(0, self.error)
+            self.wait = self.reaction_delay
+        if self.pending is not None:
+            if self.wait:
+                self.wait -= 1
+            else:
+                self.target, self.pending = self.pending, None
+
+        offset = self.target - self.paddle_center(state, side)
+        if offset < -self.dead_zone:
+            return UP
+        if offset > self.dead_zone:
+            return DOWN
+        return STAY
+
+    def plan(self, state, side):
+        """Where this side's paddle centre should go for the ball in `state`"""
+        mine, theirs = PADDLE_PLANES[side], PADDLE_PLANES[3 - side]
+        coming = state.speed_x < 0 if side == 1 else state.speed_x > 0
+        crossing = predict_crossing(state.ball_x, state.ball_y, state.speed_x, state.speed_y,
+                                    mine if coming else theirs)
+        if crossing is None:
+            # Past the paddle already
+            return self.paddle_center(state, side)
+        frames, y = crossing
+        if not coming:
+            # A return off the middle of their paddle comes back flat, so
+            # wait level with where the ball gets to them
+            return y
+        if not self.aim:
+            return y
+
+        # Try a few hit positions through bounce_speed's angle and speed-up
+        # rules and keep the reachable one that lands furthest from the
+        # opponent's paddle
+        center = self.paddle_center(state, side)
+        opponent = self.paddle_center(state, 3 - side)
+        best, best_distance = y, -1
+        for hit_pos in AIM_POINTS:
+            target = y - (hit_pos - 0.5) * PADDLE_HEIGHT
+            if (abs(target - center) > frames * PADDLE_SPEED or
+                    not PADDLE_HEIGHT / 2 <= target <= SCREEN_HEIGHT - PADDLE_HEIGHT / 2):
+                continue
+            speed_x, speed_y = bounce_speed(state.speed_x, state.speed_y, hit_pos)
+            landing = predict_crossing(mine, y, speed_x, speed_y, theirs)[1]
+            if abs(landing - opponent) > best_distance:
+                best, best_distance = target, abs(landing - opponent)
+        return best
+
+
+class CasualPredictingController(PredictingController):
+    reaction_delay = 12
+    error = 30
+
+
+class RookiePredictingController(PredictingController):
+    reaction_delay = 24
+    error = 70
+    aim = False
+
+
+CONTROLLERS = {
+    'idle': IdleController,
+    'random': RandomController,
+    'tracker': TrackingController,
+    'lazy': LazyTrackingController,
+    'noisy': NoisyTrackingController,
+    'predictor': PredictingController,
+    'casual': CasualPredictingController,
+    'rookie': RookiePredictingController,
+}
+
+
+def play_match(left, right, seed, max_frames=MAX_FRAMES):
+    """Play one headless match between two registered controllers"""
+    rng = random.Random(seed)
+    state = PongState(rng.choice((-1, 1)), rng.choice((-1, 1)))
+    left_player = CONTROLLERS[left](random.Random(rng.getrandbits(64)))
+    right_player = CONTROLLERS[right](random.Random(rng.getrandbits(64)))
+
+    while not state.winner and state.frame < max_frames:
+        state.step(left_player.choose_move(state, 1), right_player.choose_move(state, 2))
+
+    return {
+        'left': left,
+        'right': right,
+        'seed': seed,
+        'score1': state.score1,
+        'score2': state.score2,
+        'winner': state.winner,
+        'frames': state.frame,
+    }
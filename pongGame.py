@@ -1,10 +1,14 @@
 import pygame
-import sys
 import math
 import random
+import struct
+import time
+import argparse
 
-# Initialize Pygame
-pygame.init()
+import engine
+import quality
+import scores
+import sound
 
 # Constants
 SCREEN_WIDTH = 1200
@@ -14,6 +18,9 @@ PADDLE_HEIGHT = 120
 BALL_SIZE = 20
 PADDLE_SPEED = 8
 BALL_SPEED = 7
+MAX_BALL_SPEED = 12
+BALL_SPEED_UP = 1.05
+WIN_SCORE = 10
 
 # Exciting color palette with neon vibes
 COLORS = {
@@ -30,6 +37,14 @@ COLORS = {
     'cyan': (0, 255, 255),        # Cyan
 }
 
+# Snapshot: ball x/y, speed x/y, paddle y 1/2, scores, winner (0 = none).
+# Pong has no gameplay randomness, so there is no rng state to save.
+SNAPSHOT_STRUCT = struct.Struct('<4d4iB')
+WINNERS = [None, "PLAYER 1", "PLAYER 2"]
+
+# Scores swell with their pulse (up to 50 after a win) through these font sizes
+SCORE_FONT_SIZES = sorted({int(72 * (1 + pulse * 0.02)) for pulse in range(51)})
+
 class AnimatedBackground:
     def __init__(self):
         self.stars = []
@@ -103,7 +118,7 @@ class Paddle:
             self.create_movement_particles()
     
     def create_movement_particles(self):
-        for _ in range(3):
+        for _ in range(quality.particles(3)):
             self.energy_particles.append({
                 'x': self.x + self.width // 2,
                 'y': self.y + random.randint(0, self.height),
@@ -117,7 +132,7 @@ class Paddle:
         self.hit_effect = 30
         self.glow_intensity = 100
         # Create explosion particles
-        for _ in range(25):
+        for _ in range(quality.particles(25)):
             self.energy_particles.append({
                 'x': self.x + self.width // 2,
                 'y': self.y + self.height // 2,
@@ -152,7 +167,7 @@ class Paddle:
             screen.blit(particle_surface, (particle['x'] - size, particle['y'] - size))
         
         # Draw multiple glow layers
-        for i in range(5):
+        for i in range(quality.glow(5)):
             glow_size = 8 + i * 4
             alpha = max(0, self.glow_intensity - i * 20)
             glow_rect = pygame.Rect(self.x - glow_size//2, self.y - glow_size//2, 
@@ -217,9 +232,10 @@ class Ball:
         if self.y <= self.size//2 or self.y >= SCREEN_HEIGHT - self.size//2:
             self.speed_y = -self.speed_y
             self.create_wall_particles()
+            sound.play('wall')
     
     def create_wall_particles(self):
-        for _ in range(15):
+        for _ in range(quality.particles(15)):
             self.impact_particles.append({
                 'x': self.x,
                 'y': self.y,
@@ -239,8 +255,8 @@ class Ball:
         self.speed_y = speed * math.sin(angle)
         
         # Increase speed and energy
-        self.speed_x *= 1.05
-        self.speed_y *= 1.05
+        self.speed_x *= BALL_SPEED_UP
+        self.speed_y *= BALL_SPEED_UP
         self.energy_level = min(100, self.energy_level + 10)
         
         # Activate rainbow mode at high energy
@@ -248,7 +264,7 @@ class Ball:
             self.rainbow_mode = True
         
         # Cap maximum speed
-        max_speed = 12
+        max_speed = MAX_BALL_SPEED
         if abs(self.speed_x) > max_speed:
             self.speed_x = max_speed * (1 if self.speed_x > 0 else -1)
         if abs(self.speed_y) > max_speed:
@@ -310,10 +326,11 @@ class Ball:
         
         ball_color = self.get_ball_color()
         
-        # Draw dynamic trail
-        for i, (trail_x, trail_y, energy) in enumerate(self.trail):
-            alpha = int(255 * (i + 1) / len(self.trail) * 0.6)
-            size = int(self.size * (i + 1) / len(self.trail) * 0.8)
+        # Draw dynamic trail (only its newest points at lower quality)
+        trail = self.trail[-quality.trail(len(self.trail)):] if self.trail else []
+        for i, (trail_x, trail_y, energy) in enumerate(trail):
+            alpha = int(255 * (i + 1) / len(trail) * 0.6)
+            size = int(self.size * (i + 1) / len(trail) * 0.8)
             trail_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
             
             # Trail color based on energy at that point
@@ -328,7 +345,7 @@ class Ball:
             screen.blit(trail_surface, (trail_x - size, trail_y - size))
         
         # Draw multi-layer glow
-        for i in range(6):
+        for i in range(quality.glow(6)):
             glow_size = self.size + i * 8
             alpha = max(0, 100 - i * 15)
             glow_surface = pygame.Surface((glow_size * 2, glow_size * 2), pygame.SRCALPHA)
@@ -345,10 +362,17 @@ class Ball:
             pygame.draw.circle(screen, core_color, (int(self.x), int(self.y)), core_size)
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("⚡ NEON PONG EXTREME ⚡")
+    def __init__(self, late_latch=False, cpu=None):
+        self.screen = engine.init_display((SCREEN_WIDTH, SCREEN_HEIGHT), "⚡ NEON PONG EXTREME ⚡")
         self.clock = pygame.time.Clock()
+        quality.start(60)
+        
+        # Late latch: draw everything input cannot change first, then read
+        # the keyboard and finish the frame, and have SDL drop every event
+        # type the game never looks at
+        self.late_latch = late_latch
+        if late_latch:
+            engine.allow_events([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP])
         
         # Create animated background
         self.background = AnimatedBackground()
@@ -360,19 +384,31 @@ class Game:
         # Create ball
         self.ball = Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
         
+        # Computer player on the right: a pongCore controller, which sees
+        # the game through a PongState (pongCore imports this module, hence
+        # the late import)
+        self.cpu = None
+        self.scores_name = f'pongGame:{cpu}' if cpu else 'pongGame'
+        if cpu:
+            from pongCore import CONTROLLERS, PongState
+            self.cpu = CONTROLLERS[cpu](random.Random())
+            self.cpu_state = PongState()
+        
         # Scores
         self.score1 = 0
         self.score2 = 0
         
         # Fonts
-        self.font_huge = pygame.font.Font(None, 120)
-        self.font_large = pygame.font.Font(None, 72)
-        self.font_medium = pygame.font.Font(None, 36)
-        self.font_small = pygame.font.Font(None, 24)
+        self.font_huge = engine.get_font(120)
+        self.font_large = engine.get_font(72)
+        self.font_medium = engine.get_font(36)
+        self.font_small = engine.get_font(24)
         
         # Game state
         self.paused = False
         self.winner = None
+        self.started = time.perf_counter()
+        self.last_run = None
         self.celebration_particles = []
         self.time = 0
         self.screen_shake = 0
@@ -381,15 +417,22 @@ class Game:
         self.title_bounce = 0
         self.score_pulse = [0, 0]
         
+        engine.warm_up(fonts=SCORE_FONT_SIZES, sprites=[('pong_scanline', self.build_scanline)])
+        
     def handle_events(self):
-        for event in pygame.event.get():
+        for event in engine.poll_events():
             if event.type == pygame.QUIT:
+                engine.request_exit()
                 return False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                elif event.key == pygame.K_SPACE:
                     self.paused = not self.paused
                 elif event.key == pygame.K_r and self.winner:
                     self.reset_game()
+                elif event.key == pygame.K_F3:
+                    quality.toggle_readout()
         
         # Handle continuous key presses
         keys = pygame.key.get_pressed()
@@ -400,15 +443,29 @@ class Game:
             if keys[pygame.K_s]:
                 self.player1.move_down()
             
-            # Player 2 controls (Up/Down arrows)
-            if keys[pygame.K_UP]:
-                self.player2.move_up()
-            if keys[pygame.K_DOWN]:
-                self.player2.move_down()
+            # Player 2 controls (Up/Down arrows), unless the computer plays
+            if self.cpu:
+                move = self.cpu.choose_move(self.cpu_view(), 2)
+                if move < 0:
+                    self.player2.move_up()
+                elif move > 0:
+                    self.player2.move_down()
+            else:
+                if keys[pygame.K_UP]:
+                    self.player2.move_up()
+                if keys[pygame.K_DOWN]:
+                    self.player2.move_down()
         
         return True
     
-    def update(self):
+    def cpu_view(self):
+        state = self.cpu_state
+        state.ball_x, state.ball_y = self.ball.x, self.ball.y
+        state.speed_x, state.speed_y = self.ball.speed_x, self.ball.speed_y
+        state.paddle1_y, state.paddle2_y = self.player1.y, self.player2.y
+        return state
+    
+    def update_effects(self):
         self.time += 0.016
         self.background.update()
         self.player1.update()
@@ -423,8 +480,33 @@ class Game:
         # Update screen shake
         if self.screen_shake > 0:
             self.screen_shake -= 1
-        
-        if self.paused or self.winner:
+    
+    def snapshot(self):
+        ball = self.ball
+        return SNAPSHOT_STRUCT.pack(ball.x, ball.y, ball.speed_x, ball.speed_y, self.player1.y, self.player2.y,
+                                    self.score1, self.score2, WINNERS.index(self.winner))
+    
+    def restore(self, data):
+        ball = self.ball
+        (ball.x, ball.y, ball.speed_x, ball.speed_y, self.player1.y, self.player2.y,
+         self.score1, self.score2, winner) = SNAPSHOT_STRUCT.unpack(data)
+        self.winner = WINNERS[winner]
+        ball.rect.x = ball.x - ball.size//2
+        ball.rect.y = ball.y - ball.size//2
+        ball.trail = []
+        self.player1.rect.y = self.player1.y
+        self.player2.rect.y = self.player2.y
+    
+    def update(self):
+        self.update_effects()
+        self.update_play()
+    
+    def update_play(self):
+        if self.paused:
+            return
+        if self.winner:
+            # The victory celebration plays out on the win screen
+            self.update_celebration_particles()
             return
         
         # Move ball
@@ -433,11 +515,13 @@ class Game:
         # Check paddle collisions
         if self.ball.rect.colliderect(self.player1.rect) and self.ball.speed_x < 0:
             self.ball.bounce_paddle(self.player1)
+            sound.play('paddle')
             self.score_pulse[0] = 20
             self.screen_shake = 5
         
         if self.ball.rect.colliderect(self.player2.rect) and self.ball.speed_x > 0:
             self.ball.bounce_paddle(self.player2)
+            sound.play('paddle')
             self.score_pulse[1] = 20
             self.screen_shake = 5
         
@@ -454,21 +538,30 @@ class Game:
             self.score_pulse[0] = 50
         
         # Check win condition
-        if self.score1 >= 10:
+        if self.score1 >= WIN_SCORE:
             self.winner = "PLAYER 1"
             self.create_victory_celebration()
-        elif self.score2 >= 10:
+            self.record_match()
+        elif self.score2 >= WIN_SCORE:
             self.winner = "PLAYER 2"
             self.create_victory_celebration()
+            self.record_match()
         
         # Update celebration particles
         self.update_celebration_particles()
     
+    def record_match(self):
+        # A match scores its winning margin
+        self.last_run = scores.record(self.scores_name, abs(self.score1 - self.score2),
+                                      seconds=time.perf_counter() - self.started,
+                                      detail=f"{self.winner} {self.score1}-{self.score2}")
+    
     def create_score_celebration(self, player1_scored):
+        sound.play('score')
         x = 100 if player1_scored else SCREEN_WIDTH - 100
         color = COLORS['secondary'] if player1_scored else COLORS['accent']
         
-        for _ in range(50):
+        for _ in range(quality.particles(50)):
             self.celebration_particles.append({
                 'x': x,
                 'y': SCREEN_HEIGHT // 2,
@@ -480,7 +573,7 @@ class Game:
             })
     
     def create_victory_celebration(self):
-        for _ in range(200):
+        for _ in range(quality.particles(200)):
             self.celebration_particles.append({
                 'x': random.randint(0, SCREEN_WIDTH),
                 'y': random.randint(0, SCREEN_HEIGHT),
@@ -543,7 +636,7 @@ class Game:
         
         # Score 1
         score1_size = int(72 * score1_scale)
-        score1_font = pygame.font.Font(None, score1_size)
+        score1_font = engine.get_font(score1_size)
         score1_text = score1_font.render(str(self.score1), True, COLORS['secondary'])
         
         # Multi-layer glow for scores
@@ -558,7 +651,7 @@ class Game:
         
         # Score 2
         score2_size = int(72 * score2_scale)
-        score2_font = pygame.font.Font(None, score2_size)
+        score2_font = engine.get_font(score2_size)
         score2_text = score2_font.render(str(self.score2), True, COLORS['accent'])
         
         for i in range(5):
@@ -636,11 +729,19 @@ class Game:
             self.screen.blit(rainbow_surface, winner_rect)
             self.screen.blit(winner_text, winner_rect)
             self.screen.blit(restart_text, restart_rect)
+            
+            # Biggest wins so far, this one highlighted
+            for i, (entry, line) in enumerate(scores.leaderboard(self.scores_name)):
+                color = COLORS['gold'] if entry is self.last_run else COLORS['gray']
+                text = self.font_small.render(line, True, color)
+                self.screen.blit(text, text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 170 + i * 28)))
     
     def reset_game(self):
         self.score1 = 0
         self.score2 = 0
         self.winner = None
+        self.started = time.perf_counter()
+        self.last_run = None
         self.ball.reset()
         self.celebration_particles = []
         self.score_pulse = [0, 0]
@@ -655,6 +756,10 @@ class Game:
         self.player2.energy_particles = []
     
     def draw(self):
+        self.draw_backdrop()
+        self.draw_front()
+    
+    def draw_backdrop(self):
         # Clear screen with animated background
         self.screen.fill(COLORS['bg'])
         
@@ -663,7 +768,13 @@ class Game:
         
         # Draw animated center line
         self.draw_animated_center_line()
-        
+    
+    def build_scanline(self):
+        scanline_surface = pygame.Surface((SCREEN_WIDTH, 1), pygame.SRCALPHA)
+        scanline_surface.fill((255, 255, 255, 20))
+        return scanline_surface
+    
+    def draw_front(self):
         # Draw celebration particles
         self.draw_celebration_particles()
         
@@ -675,27 +786,52 @@ class Game:
         # Draw exciting UI
         self.draw_exciting_ui()
         
-        # Add scanline effect for retro feel
-        for i in range(0, SCREEN_HEIGHT, 4):
-            alpha = 20
-            scanline_surface = pygame.Surface((SCREEN_WIDTH, 1), pygame.SRCALPHA)
-            scanline_surface.fill((255, 255, 255, alpha))
-            self.screen.blit(scanline_surface, (0, i))
+        # Add scanline effect for retro feel; one cached row blitted in a batch
+        if quality.scanlines():
+            scanline_surface = engine.get_sprite('pong_scanline', self.build_scanline)
+            self.screen.blits([(scanline_surface, (0, i)) for i in range(0, SCREEN_HEIGHT, 4)], False)
+        
+        quality.draw_readout(self.screen)
         
         # Update display
-        pygame.display.flip()
+        engine.flip()
     
     def run(self):
+        scores.start()
+        sound.start()
         running = True
         while running:
-            running = self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            if self.late_latch:
+                # Input is read as late as possible, right before the play update
+                self.update_effects()
+                self.draw_backdrop()
+                running = self.handle_events()
+                self.update_play()
+                self.draw_front()
+            else:
+                running = self.handle_events()
+                self.update()
+                self.draw()
+            engine.wait_frame(self.clock, 60)
+            quality.update(engine.frame_time)
         
-        pygame.quit()
-        sys.exit()
+        engine.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Neon Pong")
+    parser.add_argument('--late-latch', action='store_true',
+                        help="read input as late as possible in each frame and drop unused event types")
+    parser.add_argument('--latency', action='store_true',
+                        help="timestamp input and print input-to-display latency percentiles on exit")
+    parser.add_argument('--cpu', choices=['predictor', 'casual', 'rookie', 'tracker', 'noisy', 'lazy'],
+                        help="let a computer controller play the right paddle")
+    args = parser.parse_args()
+    
+    if args.latency:
+        engine.track_input_latency()
+    game = Game(args.late_latch, args.cpu)
+    try:
+        game.run()
+    finally:
+        if args.latency:
+            print(engine.latency_report())
\ No newline at end of file
@@ -0,0 +1,506 @@
+import argparse
+import heapq
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+import zlib
+
+from pongCore import PongState, CONTROLLERS, UP, STAY, DOWN
+
+# Online two-player Pong with rollback netcode.
+#
+# Both peers run pongCore's deterministic PongState and only exchange
+# paddle inputs over UDP. The remote paddle is predicted (it keeps doing
+# whatever it last did); when the real input for an already-simulated
+# frame turns out different, the session restores the state saved before
+# that frame and re-simulates up to the present. Inputs are applied
+# INPUT_DELAY frames late, which hides most of the round trip before
+# rollback has to.
+#
+# Every packet repeats all inputs the other side has not acknowledged, so
+# a lost packet costs nothing as long as a later one arrives. Periodic
+# checksums of confirmed states catch desyncs.
+
+FPS = 60
+INPUT_DELAY = 2
+MAX_ROLLBACK = 12  # frames we may run ahead of the last confirmed remote input
+MAX_RESEND = 64
+CHECK_INTERVAL = 30
+
+HELLO = 1
+INPUTS = 2
+
+# kind, seed, side
+HELLO_PACKET = struct.Struct('<BIB')
+# kind, first input frame, ack, frame advantage, checksum frame, checksum; then one byte per input
+INPUT_HEADER = struct.Struct('<BIibiI')
+# ball x/y, speed x/y, paddle y 1/2, scores, winner, frame
+STATE_STRUCT = struct.Struct('<4d6i')
+
+
+def state_checksum(state):
+    return zlib.crc32(STATE_STRUCT.pack(state.ball_x, state.ball_y, state.speed_x, state.speed_y,
+                                        state.paddle1_y, state.paddle2_y, state.score1, state.score2,
+                                        state.winner, state.frame))
+
+
+class RollbackSession:
+    def __init__(self, side, seed, input_delay=INPUT_DELAY):
+        rng = random.Random(seed)
+        self.state = PongState(rng.choice((-1, 1)), rng.choice((-1, 1)))
+        self.side = side
+        self.input_delay = input_delay
+        self.frame = 0  # next frame to simulate; self.state is the state before it
+
+        # Nobody has input for the first `input_delay` frames
+        self.local_inputs = {frame: STAY for frame in range(input_delay)}
+        self.remote_inputs = {frame: STAY for frame in range(input_delay)}
+        self.local_newest = input_delay - 1
+        self.remote_frame = input_delay - 1  # all remote inputs up to here are known
+        self.remote_newest = input_delay - 1
+        self.remote_ack = -1  # all our inputs up to here reached the other side
+        self.remote_advantage = 0
+
+        self.states = {}  # frame -> copy of the state before that frame
+        self.predicted = {}  # frame -> remote input we guessed when simulating it
+        self.rollback_to = None
+        self.pruned_to = 0
+        self.local_pruned_to = 0
+
+        self.checksums = {}
+        self.remote_checksums = {}
+        self.last_checked = 0
+        self.latest_checksum = (0, state_checksum(self.state))
+
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.max_depth = 0
+        self.max_rollback_ms = 0.0
+        self.stalls = 0
+        self.waits = 0
+        self.desyncs = 0
+
+    def add_local_input(self, move):
+        # An input is never changed once made: it may already be on the wire
+        frame = self.frame + self.input_delay
+        if frame not in self.local_inputs:
+            self.local_inputs[frame] = move
+            self.local_newest = frame
+
+    def add_remote_inputs(self, start, moves):
+        for offset, move in enumerate(moves):
+            frame = start + offset
+            if frame <= self.remote_frame or frame in self.remote_inputs:
+                continue
+            self.remote_inputs[frame] = move
+            self.remote_newest = max(self.remote_newest, frame)
+            guess = self.predicted.pop(frame, None)
+            if guess is not None and guess != move:
+                if self.rollback_to is None or frame < self.rollback_to:
+                    self.rollback_to = frame
+        while self.remote_frame + 1 in self.remote_inputs:
+            self.remote_frame += 1
+
+    def add_remote_checksum(self, frame, checksum):
+        ours = self.checksums.get(frame)
+        if ours is None:
+            self.remote_checksums[frame] = checksum
+        elif ours != checksum:
+            self.desyncs += 1
+
+    def predict(self):
+        return self.remote_inputs[self.remote_frame]
+
+    def simulate(self, frame):
+        self.states[frame] = self.state.copy()
+        remote = self.remote_inputs.get(frame)
+        if remote is None:
+            remote = self.predicted[frame] = self.predict()
+        local = self.local_inputs[frame]
+        if self.side == 1:
+            self.state.step(local, remote)
+        else:
+            self.state.step(remote, local)
+
+    def rollback(self):
+        start = time.perf_counter()
+        frame = self.rollback_to
+        self.rollback_to = None
+        self.state = self.states[frame].copy()
+        for resim in range(frame, self.frame):
+            self.simulate(resim)
+
+        depth = self.frame - frame
+        self.rollbacks += 1
+        self.resimulated += depth
+        self.max_depth = max(self.max_depth, depth)
+        self.max_rollback_ms = max(self.max_rollback_ms, (time.perf_counter() - start) * 1000)
+
+    def advantage(self):
+        # How far our simulation is past the newest remote input we have seen
+        return self.frame - self.remote_newest
+
+    def should_wait(self):
+        """True if we are running ahead of the other peer and should skip a frame"""
+        return self.advantage() - self.remote_advantage > 2
+
+    def advance(self, limit=None):
+        """Simulate one frame (after any pending rollback); False if we had to stall"""
+        if self.rollback_to is not None:
+            self.rollback()
+
+        if self.frame - self.remote_frame > MAX_ROLLBACK or self.frame not in self.local_inputs:
+            self.stalls += 1
+            return False
+        if limit is not None and self.frame >= limit:
+            return False
+
+        self.simulate(self.frame)
+        self.frame += 1
+        self.record_checksums()
+        self.prune()
+        return True
+
+    def confirmed(self):
+        """Frame up to which the state is final (no input still to arrive)"""
+        return min(self.frame, self.remote_frame + 1)
+
+    def record_checksums(self):
+        confirmed = self.confirmed()
+        frame = self.last_checked + CHECK_INTERVAL
+        while frame <= confirmed:
+            state = self.state if frame == self.frame else self.states[frame]
+            checksum = self.checksums[frame] = state_checksum(state)
+            self.latest_checksum = (frame, checksum)
+            remote = self.remote_checksums.pop(frame, None)
+            if remote is not None and remote != checksum:
+                self.desyncs += 1
+            self.last_checked = frame
+            frame += CHECK_INTERVAL
+
+    def prune(self):
+        # Confirmed frames can never be rolled back to again
+        keep_from = min(self.remote_frame, self.frame) - 1
+        for frame in range(self.pruned_to, keep_from):
+            self.states.pop(frame, None)
+            self.remote_inputs.pop(frame, None)
+            self.checksums.pop(frame - CHECK_INTERVAL * 8, None)
+        self.pruned_to = max(self.pruned_to, keep_from)
+
+        # Our own inputs are kept until the other side has them
+        acknowledged = min(self.remote_ack, keep_from)
+        for frame in range(self.local_pruned_to, acknowledged):
+            self.local_inputs.pop(frame, None)
+        self.local_pruned_to = max(self.local_pruned_to, acknowledged)
+
+    def outgoing(self):
+        """(first frame, moves) of every local input the other side has not acknowledged"""
+        start = max(self.remote_ack + 1, self.local_newest - MAX_RESEND + 1)
+        return start, [self.local_inputs[frame] for frame in range(start, self.local_newest + 1)]
+
+    def stats(self):
+        return {
+            'frame': self.frame,
+            'rollbacks': self.rollbacks,
+            'resimulated': self.resimulated,
+            'max_depth': self.max_depth,
+            'max_rollback_ms': round(self.max_rollback_ms, 3),
+            'stalls': self.stalls,
+            'waits': self.waits,
+            'desyncs': self.desyncs,
+        }
+
+
+class LossyLink:
+    """UDP sender that can add latency, jitter and packet loss (one way)"""
+
+    def __init__(self, sock, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.sock = sock
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.queue = []
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, data, address):
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        if not self.latency and not self.jitter:
+            self.transmit(data, address)
+            return
+        due = time.perf_counter() + self.latency + self.rng.uniform(0, self.jitter)
+        self.sequence += 1
+        heapq.heappush(self.queue, (due, self.sequence, data, address))
+
+    def transmit(self, data, address):
+        try:
+            self.sock.sendto(data, address)
+            self.sent += 1
+        except OSError:
+            # Nobody listening yet (ICMP port unreachable); same as a loss
+            self.dropped += 1
+
+    def flush(self):
+        now = time.perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.queue)
+            self.transmit(data, address)
+
+
+class Peer:
+    def __init__(self, port, remote, side, rtt=0.0, jitter=0.0, loss=0.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('0.0.0.0', port))
+        self.sock.setblocking(False)
+        self.remote = remote
+        self.side = side
+        # Each peer delays its own outgoing packets, so half the RTT each way
+        self.link = LossyLink(self.sock, rtt / 2, jitter, loss)
+        self.seed = None
+        self.remote_seen = False
+        self.inputs_seen = False
+
+    def packets(self):
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            yield data
+
+    def send_hello(self, seed):
+        self.link.send(HELLO_PACKET.pack(HELLO, seed, self.side), self.remote)
+
+    def connect(self, seed, timeout=30.0):
+        """Exchange HELLOs; the left player's seed is the one both sides use"""
+        deadline = time.perf_counter() + timeout
+        next_hello = 0
+        while not self.remote_seen:
+            now = time.perf_counter()
+            if now > deadline:
+                raise TimeoutError(f"no answer from {self.remote[0]}:{self.remote[1]}")
+            if now >= next_hello:
+                self.send_hello(seed)
+                next_hello = now + 0.1
+            for data in self.packets():
+                if data[0] == HELLO:
+                    _, remote_seed, remote_side = HELLO_PACKET.unpack_from(data)
+                    self.remote_seen = True
+                    if remote_side == 1:
+                        seed = remote_seed
+            self.link.flush()
+            time.sleep(0.005)
+        self.seed = seed
+        # One more so the other side is not left waiting on a lost HELLO
+        self.send_hello(seed)
+        return seed
+
+    def receive(self, session):
+        for data in self.packets():
+            if data[0] == HELLO:
+                # Until the other side sends inputs it may still be waiting for our HELLO
+                if not self.inputs_seen:
+                    self.send_hello(self.seed)
+                continue
+            self.inputs_seen = True
+            _, start, ack, advantage, check_frame, checksum = INPUT_HEADER.unpack_from(data)
+            moves = [byte - 1 for byte in data[INPUT_HEADER.size:]]
+            session.remote_ack = max(session.remote_ack, ack)
+            session.remote_advantage = advantage
+            session.add_remote_inputs(start, moves)
+            if check_frame:
+                session.add_remote_checksum(check_frame, checksum)
+
+    def send(self, session):
+        start, moves = session.outgoing()
+        check_frame, checksum = session.latest_checksum
+        advantage = max(-128, min(127, session.advantage()))
+        header = INPUT_HEADER.pack(INPUTS, start, session.remote_frame, advantage, check_frame, checksum)
+        self.link.send(header + bytes(move + 1 for move in moves), self.remote)
+        self.link.flush()
+
+    def close(self):
+        self.sock.close()
+
+
+def net_step(peer, session, move, limit=None):
+    """One tick of a networked match: receive, input, simulate, send"""
+    peer.receive(session)
+    session.add_local_input(move)
+    if session.should_wait():
+        session.waits += 1
+    else:
+        session.advance(limit)
+    peer.send(session)
+
+
+def play_headless(peer, session, bot, frames, linger=1.0):
+    # A bot plays our paddle at 60 FPS until `frames` frames are confirmed,
+    # then keeps the link up briefly so the other side can finish too
+    next_tick = time.perf_counter()
+    finished = None
+    while True:
+        net_step(peer, session, bot.choose_move(session.state, session.side), frames)
+        now = time.perf_counter()
+        if finished is None and session.confirmed() >= frames:
+            finished = now
+        if finished is not None and now - finished > linger:
+            return
+        next_tick += 1 / FPS
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+
+def run_net_game(peer, session, bot=None):
+    from pongGame import Game
+    import pygame
+    import engine
+
+    class NetGame(Game):
+        """pongGame's visuals driven by the rollback session"""
+
+        def __init__(self):
+            Game.__init__(self)
+            self.last_scores = (0, 0)
+            self.last_speed_x = session.state.speed_x
+
+        def handle_events(self):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    engine.request_exit()
+                    return False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    return False
+
+            # Either key set moves our own paddle
+            keys = pygame.key.get_pressed()
+            move = STAY
+            if bot:
+                move = bot.choose_move(session.state, session.side)
+            elif keys[pygame.K_w] or keys[pygame.K_UP]:
+                move = UP
+            elif keys[pygame.K_s] or keys[pygame.K_DOWN]:
+                move = DOWN
+            net_step(peer, session, move)
+            return True
+
+        def update(self):
+            self.update_effects()
+            state = session.state
+            for paddle, y in ((self.player1, state.paddle1_y), (self.player2, state.paddle2_y)):
+                paddle.y = y
+                paddle.rect.y = y
+            self.ball.x = state.ball_x
+            self.ball.y = state.ball_y
+            self.ball.rect.center = (state.ball_x, state.ball_y)
+            self.ball.trail.append((state.ball_x, state.ball_y, self.ball.energy_level))
+            if len(self.ball.trail) > 15:
+                self.ball.trail.pop(0)
+
+            if (state.speed_x > 0) != (self.last_speed_x > 0) and (state.score1, state.score2) == self.last_scores:
+                (self.player1 if state.speed_x > 0 else self.player2).hit_effect_trigger()
+                self.screen_shake = 5
+            self.last_speed_x = state.speed_x
+
+            if (state.score1, state.score2) != self.last_scores:
+                self.create_score_celebration(state.score1 != self.last_scores[0])
+                self.score1, self.score2 = state.score1, state.score2
+                self.last_scores = (state.score1, state.score2)
+
+            if state.winner and not self.winner:
+                self.winner = f"PLAYER {state.winner}"
+                self.create_victory_celebration()
+            self.update_celebration_particles()
+
+    game = NetGame()
+    running = True
+    while running:
+        running = game.handle_events()
+        game.update()
+        game.draw()
+        engine.wait_frame(game.clock, FPS)
+    engine.quit()
+
+
+def parse_address(text):
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+
+def loopback(args):
+    # Two headless bot peers on this machine, then compare their final states
+    ports = (args.port, args.port + 1)
+    children = []
+    for side in (1, 2):
+        command = [sys.executable, __file__, 'play', '--side', str(side), '--port', str(ports[side - 1]),
+                   '--remote', f"127.0.0.1:{ports[2 - side]}", '--bot', args.bot, '--frames', str(args.frames),
+                   '--rtt', str(args.rtt), '--jitter', str(args.jitter), '--loss', str(args.loss),
+                   '--seed', str(args.seed), '--headless']
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+        children.append(subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env))
+    results = [json.loads(child.communicate()[0].strip().splitlines()[-1]) for child in children]
+
+    for side, result in zip((1, 2), results):
+        print(f"peer {side}: " + ", ".join(f"{key} {value}" for key, value in result.items()))
+    same = results[0]['checksum'] == results[1]['checksum']
+    print("final states match" if same else "DESYNC: final states differ")
+    return 0 if same and not any(result['desyncs'] for result in results) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-player Pong over UDP with rollback")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    play = commands.add_parser('play', help="play one side of a match")
+    play.add_argument('--side', type=int, choices=(1, 2), required=True, help="1 = left paddle, 2 = right")
+    play.add_argument('--port', type=int, default=40001, help="local UDP port")
+    play.add_argument('--remote', type=parse_address, required=True, help="the other peer, host:port")
+    play.add_argument('--seed', type=int, default=0, help="serve direction (the left player's wins)")
+    play.add_argument('--bot', choices=sorted(CONTROLLERS), help="let a pongCore controller play")
+    play.add_argument('--frames', type=int, default=3600, help="match length for --headless")
+    play.add_argument('--headless', action='store_true', help="no window; needs --bot, prints stats as JSON")
+
+    test = commands.add_parser('loopback', help="run two bot peers over loopback and compare them")
+    test.add_argument('--port', type=int, default=40001)
+    test.add_argument('--bot', choices=sorted(CONTROLLERS), default='noisy')
+    test.add_argument('--frames', type=int, default=3600)
+    test.add_argument('--seed', type=int, default=0)
+
+    for command in (play, test):
+        command.add_argument('--rtt', type=float, default=0.0, help="simulated round trip time, seconds")
+        command.add_argument('--jitter', type=float, default=0.0, help="extra random one-way delay, seconds")
+        command.add_argument('--loss', type=float, default=0.0, help="fraction of packets dropped")
+    args = parser.parse_args()
+
+    if args.command == 'loopback':
+        sys.exit(loopback(args))
+
+    peer = Peer(args.port, args.remote, args.side, args.rtt, args.jitter, args.loss)
+    seed = peer.connect(args.seed)
+    session = RollbackSession(args.side, seed)
+
+    bot = CONTROLLERS[args.bot](random.Random(seed * 2 + args.side)) if args.bot else None
+    if args.headless:
+        if not bot:
+            parser.error("--headless needs --bot")
+        play_headless(peer, session, bot, args.frames)
+        result = session.stats()
+        result['checksum'] = state_checksum(session.state)
+        result['score'] = f"{session.state.score1}-{session.state.score2}"
+        result['dropped'] = peer.link.dropped
+        print(json.dumps(result))
+    else:
+        run_net_game(peer, session, bot)
+    peer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pongCore import CONTROLLERS, MAX_FRAMES, play_match
+
+# Matches are sent to the workers in chunks so the per-task pickling
+# overhead stays small next to the simulation work.
+DEFAULT_CHUNK_SIZE = 25
+
+
+def round_robin(names, rounds, base_seed=0):
+    """Every ordered pairing (both sides) `rounds` times, each with its own seed"""
+    matches = []
+    seed = base_seed
+    for _ in range(rounds):
+        for left, right in itertools.permutations(names, 2):
+            matches.append((left, right, seed))
+            seed += 1
+    return matches
+
+
+def play_chunk(matches, max_frames):
+    return [play_match(left, right, seed, max_frames) for left, right, seed in matches]
+
+
+def run_tournament(matches, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_frames=MAX_FRAMES):
+    """Spread matches over a process pool and yield each result as its chunk finishes"""
+    chunks = [matches[i:i + chunk_size] for i in range(0, len(matches), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, chunk, max_frames) for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                yield result
+
+
+class Standings:
+    def __init__(self, names):
+        self.table = {name: {'played': 0, 'won': 0, 'drawn': 0, 'lost': 0,
+                             'points_for': 0, 'points_against': 0} for name in names}
+
+    def add(self, result):
+        left = self.table[result['left']]
+        right = self.table[result['right']]
+        for row, scored, conceded in ((left, result['score1'], result['score2']),
+                                      (right, result['score2'], result['score1'])):
+            row['played'] += 1
+            row['points_for'] += scored
+            row['points_against'] += conceded
+
+        if result['winner'] == 1:
+            left['won'] += 1
+            right['lost'] += 1
+        elif result['winner'] == 2:
+            right['won'] += 1
+            left['lost'] += 1
+        else:
+            left['drawn'] += 1
+            right['drawn'] += 1
+
+    def ranking(self):
+        return sorted(self.table.items(),
+                      key=lambda item: (item[1]['won'] * 3 + item[1]['drawn'],
+                                        item[1]['points_for'] - item[1]['points_against']),
+                      reverse=True)
+
+    def print_table(self):
+        print(f"{'CONTROLLER':<12}{'P':>7}{'W':>7}{'D':>7}{'L':>7}{'PF':>9}{'PA':>9}")
+        for name, row in self.ranking():
+            print(f"{name:<12}{row['played']:>7}{row['won']:>7}{row['drawn']:>7}{row['lost']:>7}"
+                  f"{row['points_for']:>9}{row['points_against']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Pong controller round-robin")
+    parser.add_argument('--controllers', nargs='+', default=sorted(CONTROLLERS),
+                        choices=sorted(CONTROLLERS))
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    matches = round_robin(args.controllers, args.rounds, args.seed)
+    standings = Standings(args.controllers)
+    print(f"Playing {len(matches)} matches on {args.workers} workers...")
+
+    start = time.perf_counter()
+    done = 0
+    for result in run_tournament(matches, args.workers, args.chunk_size, args.max_frames):
+        standings.add(result)
+        done += 1
+        if done % 500 == 0:
+            print(f"  {done}/{len(matches)} matches finished")
+    elapsed = time.perf_counter() - start
+
+    standings.print_table()
+    print(f"{done} matches in {elapsed:.1f}s ({done / elapsed:.1f} matches/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from collections import deque
+
+import engine
+import scheduler
+import sound
+
+# Adaptive level of detail for the purely visual effects.
+#
+# The games report how long each frame took to build (engine.frame_time,
+# not counting the wait for the next frame). When the average over a short
+# window is close to the frame budget the quality level drops one step;
+# after a long stretch with plenty of headroom it comes back up one step.
+# Effects ask this module how many particles to emit, how much of a trail
+# to draw, how many glow layers to stack and whether to draw scanlines.
+# Nothing here feeds back into gameplay.
+
+# Knob values per level, from full quality down
+LEVELS = [
+    {'particles': 1.0, 'trails': 1.0, 'glow': 1.0, 'scanlines': True},
+    {'particles': 0.6, 'trails': 0.7, 'glow': 0.6, 'scanlines': True},
+    {'particles': 0.35, 'trails': 0.5, 'glow': 0.4, 'scanlines': False},
+    {'particles': 0.15, 'trails': 0.3, 'glow': 0.2, 'scanlines': False},
+]
+
+WINDOW = 20  # frames averaged before a decision
+DEGRADE_AT = 0.85  # fraction of the budget that counts as over budget
+RESTORE_AT = 0.5  # ... and as enough headroom to restore a level
+RESTORE_AFTER = 180  # frames of headroom before stepping back up
+
+level = 0
+knobs = LEVELS[0]
+show_readout = False
+
+_budget = 1 / 60
+_times = deque(maxlen=WINDOW)
+_calm_frames = 0
+
+
+def start(fps):
+    """Full quality and a fresh history for a game running at `fps`"""
+    global _budget, _calm_frames
+    _budget = 1 / fps
+    _times.clear()
+    _calm_frames = 0
+    set_level(0)
+
+
+def set_level(new_level):
+    global level, knobs
+    level = max(0, min(len(LEVELS) - 1, new_level))
+    knobs = LEVELS[level]
+
+
+def update(frame_time):
+    """Feed one frame's build time (seconds); may change the level"""
+    global _calm_frames
+    _times.append(frame_time)
+    if len(_times) < WINDOW:
+        return
+
+    average = sum(_times) / WINDOW
+    if average > _budget * DEGRADE_AT and level < len(LEVELS) - 1:
+        set_level(level + 1)
+        _times.clear()
+        _calm_frames = 0
+    elif average < _budget * RESTORE_AT and level > 0:
+        _calm_frames += 1
+        if _calm_frames >= RESTORE_AFTER:
+            set_level(level - 1)
+            _times.clear()
+            _calm_frames = 0
+    else:
+        _calm_frames = 0
+
+
+def particles(count):
+    """How many of `count` particles to emit"""
+    return int(count * knobs['particles'] + 0.5)
+
+
+def chance(probability):
+    """Per-frame emission chance, scaled like particle counts"""
+    return probability * knobs['particles']
+
+
+def trail(length):
+    """How many of the newest `length` trail points to draw"""
+    return max(1, int(length * knobs['trails'] + 0.5))
+
+
+def glow(layers):
+    """How many of `layers` glow layers to draw"""
+    return int(layers * knobs['glow'] + 0.5)
+
+
+def scanlines():
+    return knobs['scanlines']
+
+
+def toggle_readout():
+    global show_readout
+    show_readout = not show_readout
+
+
+def draw_readout(screen):
+    """Level, frame time, every knob and the cache, sound and GC counters, centred along the bottom edge (F3)"""
+    if not show_readout:
+        return
+    average = sum(_times) / len(_times) if _times else 0
+    lines = [
+        f"LOD {level}/{len(LEVELS) - 1}  frame {average * 1000:.1f}/{_budget * 1000:.1f} ms",
+        f"particles {knobs['particles']:.0%}  trails {knobs['trails']:.0%}  glow {knobs['glow']:.0%}  "
+        f"scanlines {'on' if knobs['scanlines'] else 'off'}",
+        engine.cache_report(),
+        sound.report(),
+        scheduler.report(),
+    ]
+    font = engine.get_font(20)
+    y = screen.get_height() - 10 - 18 * len(lines)
+    for line in lines:
+        text = font.render(line, True, (255, 255, 0), (0, 0, 0))
+        screen.blit(text, ((screen.get_width() - text.get_width()) // 2, y))
+        y += 18
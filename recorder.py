@@ -0,0 +1,270 @@
+import argparse
+import importlib
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+import engine
+
+# Gameplay footage without screen capture.
+#
+# On the main thread a Recorder only copies the frame's raw pixel buffer
+# (one memcpy through the buffer protocol) into a bounded queue. Worker
+# threads turn the copies into RGB with NumPy and either write a numbered
+# PNG sequence or append to one raw RGB24 stream that ffmpeg can read:
+#
+#     ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 60 -i clip.rgb clip.mp4
+#
+# The PNGs are compressed with zlib, which releases the GIL, so the
+# encoders run alongside the game loop instead of taking turns with it.
+# When the queue is full the 'drop' policy skips the frame (live play must
+# never wait) and 'block' waits for room (headless rendering, where every
+# frame counts and there is no clock to keep up with). An encoder that
+# fails (a closed pipe, a full disk) stops the others, and the next
+# capture() or close() raises RecorderError instead of waiting on a queue
+# nobody empties.
+
+FORMATS = ['png', 'raw']
+POLICIES = ['drop', 'block']
+QUEUE_FRAMES = 120  # two seconds of frames at 60 FPS
+PUT_TIMEOUT = 0.1  # seconds between checks on the encoders while waiting for room
+PNG_LEVEL = 1  # fast; the PNGs are usually fed to a video encoder anyway
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Games that render headless, and how each is played without a player
+RENDER_GAMES = ['BrickBreaker', 'FlappyBirdClone', 'snake', 'pongGame']
+
+
+def png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(data, zlib.crc32(tag)))
+
+
+def png_bytes(rgb, level=PNG_LEVEL):
+    """An (height, width, 3) uint8 array as a PNG file"""
+    height, width = rgb.shape[:2]
+    # Every row starts with its filter type, 0 (none)
+    rows = np.zeros((height, width * 3 + 1), np.uint8)
+    rows[:, 1:] = rgb.reshape(height, width * 3)
+    return b''.join((PNG_SIGNATURE,
+                     png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+                     png_chunk(b'IDAT', zlib.compress(rows.tobytes(), level)),
+                     png_chunk(b'IEND', b'')))
+
+
+class RecorderError(RuntimeError):
+    """An encoder thread failed; the error it hit is the __cause__"""
+
+
+class Frame:
+    """One captured frame: its raw pixels and what is needed to read them"""
+
+    def __init__(self, index, surface):
+        self.index = index
+        self.size = surface.get_size()
+        self.bytesize = surface.get_bytesize()
+        if self.bytesize == 4:
+            self.pixels = surface.get_buffer().raw
+            self.pitch = surface.get_pitch()
+            self.shifts = surface.get_shifts()[:3]
+        else:
+            # Rare (16/24-bit displays): let SDL convert instead
+            self.pixels = pygame.image.tobytes(surface, 'RGB')
+
+    def rgb(self):
+        width, height = self.size
+        if self.bytesize != 4:
+            return np.frombuffer(self.pixels, np.uint8).reshape(height, width, 3)
+        words = np.frombuffer(self.pixels, np.uint32).reshape(height, self.pitch // 4)[:, :width]
+        rgb = np.empty((height, width, 3), np.uint8)
+        for channel, shift in enumerate(self.shifts):
+            rgb[:, :, channel] = words >> shift
+        return rgb
+
+
+class Recorder:
+    def __init__(self, path, format='png', policy='drop', workers=2, queue_frames=QUEUE_FRAMES):
+        self.path = path
+        self.format = format
+        self.policy = policy
+        self.queue = queue.Queue(queue_frames)
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.lock = threading.Lock()
+        self.error = None
+        self.started = time.perf_counter()
+
+        if format == 'raw':
+            # One stream, so one writer keeps the frames in order
+            workers = 1
+            self.stream = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        else:
+            os.makedirs(path, exist_ok=True)
+        self.workers = [threading.Thread(target=self.work, name="frame encoder", daemon=True)
+                        for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def capture(self, surface):
+        """Queue a copy of `surface`'s pixels; never encodes on the caller's thread"""
+        self.check()
+        frame = Frame(self.captured, surface)
+        self.captured += 1
+        if self.policy == 'block':
+            self.put(frame)
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def check(self):
+        if self.error is not None:
+            raise RecorderError(f"frame encoder failed: {self.error}") from self.error
+
+    def put(self, item):
+        # Wait for room, but not on encoders that have stopped
+        while True:
+            self.check()
+            try:
+                self.queue.put(item, timeout=PUT_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+
+    def work(self):
+        while self.error is None:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            try:
+                if self.format == 'raw':
+                    self.stream.write(frame.rgb().tobytes())
+                else:
+                    with open(os.path.join(self.path, f"frame_{frame.index:06d}.png"), 'wb') as file:
+                        file.write(png_bytes(frame.rgb()))
+            except Exception as error:
+                # The first failure is the one reported; the other encoders stop too
+                with self.lock:
+                    if self.error is None:
+                        self.error = error
+                return
+            with self.lock:
+                self.written += 1
+
+    def close(self):
+        """Wait for every queued frame to be written"""
+        for _ in self.workers:
+            self.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.check()
+        if self.format == 'raw':
+            self.stream.flush()
+            if self.stream is not sys.stdout.buffer:
+                self.stream.close()
+
+    def report(self):
+        seconds = time.perf_counter() - self.started
+        return (f"recorded {self.written} frames ({self.dropped} dropped) to {self.path} "
+                f"in {seconds:.1f} s, {self.written / max(seconds, 1e-9):.0f} frames/s")
+
+
+def autoplay(name, module, game):
+    """Set `game` up to play itself; returns the per-frame input step"""
+    if name == 'BrickBreaker':
+        def step(frame):
+            if len(game.balls):
+                game.paddle.x = int(game.balls.x[0]) - game.paddle.width // 2
+    elif name == 'FlappyBirdClone':
+        game.game_started = True
+
+        def step(frame):
+            if game.game_over:
+                game.reset_game()
+                game.game_started = True
+            bird = game.bird
+            ahead = [pipe for pipe in game.pipes if pipe.x + pipe.width > bird.x - bird.size]
+            target = ahead[0].gap_y + 30 if ahead else module.SCREEN_HEIGHT // 2
+            if bird.y > target and bird.velocity > 0:
+                bird.jump()
+    elif name == 'snake':
+        game.autopilot = module.Autopilot(module.GRID_WIDTH, module.GRID_HEIGHT)
+
+        def step(frame):
+            if game.game_over:
+                game.reset_game()
+    else:
+        def step(frame):
+            # Both paddles follow the ball
+            for paddle in (game.player1, game.player2):
+                offset = game.ball.y - (paddle.y + paddle.height / 2)
+                if offset < -4:
+                    paddle.move_up()
+                elif offset > 4:
+                    paddle.move_down()
+    return step
+
+
+def render(args):
+    """Play a game headless as fast as it will go, recording every frame"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    module = importlib.import_module(args.game)
+    game = module.Game()
+    step = autoplay(args.game, module, game)
+    recorder = Recorder(args.out, args.format, 'block', args.workers, args.queue)
+    try:
+        for frame in range(args.frames):
+            step(frame)
+            game.update()
+            game.draw()
+            recorder.capture(pygame.display.get_surface())
+        recorder.close()
+    except RecorderError as error:
+        sys.exit(f"recorder: {error}")
+    print(recorder.report(), file=sys.stderr)
+
+
+def live(args):
+    """Play a game normally while recording what is shown"""
+    module = importlib.import_module(args.game)
+    engine.recorder = Recorder(args.out, args.format, args.policy, args.workers, args.queue)
+    module.Game().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record gameplay as a PNG sequence or a raw RGB24 stream")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    render_parser = commands.add_parser('render', help="play a game by itself, headless and faster than real time")
+    render_parser.add_argument('game', choices=RENDER_GAMES)
+    render_parser.add_argument('--frames', type=int, default=600)
+
+    live_parser = commands.add_parser('live', help="play a game and record it")
+    live_parser.add_argument('game', choices=['BrickBreaker', 'FlappyBirdClone', 'snake', 'pongGame',
+                                              'SpaceShooter'])
+    live_parser.add_argument('--policy', choices=POLICIES, default='drop',
+                             help="when the encoders fall behind: skip frames, or slow the game down")
+
+    for command in (render_parser, live_parser):
+        command.add_argument('--out', required=True, help="directory for PNGs, or file for raw ('-' for stdout)")
+        command.add_argument('--format', choices=FORMATS, default='png')
+        command.add_argument('--workers', type=int, default=2, help="encoder threads (raw always uses one)")
+        command.add_argument('--queue', type=int, default=QUEUE_FRAMES, help="frames held while encoders catch up")
+    args = parser.parse_args()
+
+    if args.command == 'render':
+        render(args)
+    else:
+        live(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import pygame
+
+import engine
+
+# Two ways of getting a frame on screen behind one small drawing interface.
+#
+# SurfaceBackend is the path every game has always used: sprites and text
+# are blitted onto the display surface by the CPU and the surface is
+# flipped. TextureBackend opens the window with an SDL Renderer instead:
+# each sprite is uploaded once as a Texture and every frame is a list of
+# texture copies (with alpha blending where the sprite has alpha) that SDL
+# batches and hands to the GPU when there is one, or draws with its
+# software renderer when there is not.
+#
+# Sprites are named and built exactly as for engine.get_sprite(), so the
+# surfaces stay in the engine's cache (and engine.warm_up() covers them)
+# whichever backend draws them.
+
+BACKENDS = ['surface', 'texture']
+TEXT_CACHE = 256  # rendered strings kept as textures before starting over
+BLEND = 1  # SDL_BLENDMODE_BLEND
+
+
+class SurfaceBackend:
+    name = 'surface'
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.size = screen.get_size()
+
+    def sprite(self, key, build, pos):
+        self.screen.blit(engine.get_sprite(key, build), pos)
+
+    def sprites(self, key, build, positions):
+        sprite = engine.get_sprite(key, build)
+        self.screen.blits([(sprite, pos) for pos in positions], False)
+
+    def text(self, font, string, color, pos=None, center=None):
+        """Draw `string` with its top left at `pos` or centred on `center`"""
+        surface = font.render(string, True, color)
+        self.screen.blit(surface, surface.get_rect(center=center) if center else pos)
+
+    def shade(self, color, alpha):
+        # A translucent fill over the whole frame
+        overlay = engine.get_sprite(('shade', color, alpha, self.size), lambda: self.build_shade(color, alpha))
+        self.screen.blit(overlay, (0, 0))
+
+    def build_shade(self, color, alpha):
+        overlay = pygame.Surface(self.size)
+        overlay.set_alpha(alpha)
+        overlay.fill(color)
+        return overlay
+
+
+class TextureBackend:
+    name = 'texture'
+
+    def __init__(self, renderer, size):
+        from pygame._sdl2.video import Texture
+        self.renderer = renderer
+        self.size = size
+        self.from_surface = Texture.from_surface
+        self.textures = {}
+        self.texts = {}
+
+    def texture(self, key, build):
+        texture = self.textures.get(key)
+        if texture is None:
+            # Surfaces with per-pixel alpha come out alpha blended, opaque
+            # ones are plain copies
+            texture = self.textures[key] = self.from_surface(self.renderer, engine.get_sprite(key, build))
+        return texture
+
+    def sprite(self, key, build, pos):
+        self.texture(key, build).draw(None, pos)
+
+    def sprites(self, key, build, positions):
+        draw = self.texture(key, build).draw
+        for pos in positions:
+            draw(None, pos)
+
+    def text(self, font, string, color, pos=None, center=None):
+        key = (font, string, color)
+        texture = self.texts.get(key)
+        if texture is None:
+            # Scores and counters keep changing; never let old strings pile up
+            if len(self.texts) >= TEXT_CACHE:
+                self.texts.clear()
+            texture = self.texts[key] = self.from_surface(self.renderer, font.render(string, True, color))
+        texture.draw(None, texture.get_rect(center=center) if center else pos)
+
+    def shade(self, color, alpha):
+        self.renderer.draw_color = (*color, alpha)
+        self.renderer.draw_blend_mode = BLEND
+        self.renderer.fill_rect((0, 0, *self.size))
+
+
+def open_display(size, caption, backend='surface'):
+    """Open the game window for `backend`; falls back to SurfaceBackend when
+    there is no renderer to be had"""
+    if backend == 'texture':
+        renderer = engine.init_renderer(size, caption)
+        if renderer is not None:
+            return TextureBackend(renderer, size)
+    return SurfaceBackend(engine.init_display(size, caption))
@@ -0,0 +1,209 @@
+import gc
+import os
+import sys
+import time
+from collections import deque
+
+# Work that can wait until a frame is done, and the garbage collector.
+#
+# engine.wait_frame() calls idle() once a frame has been built and shown,
+# before the clock sleeps away the rest of the frame. What is left of the
+# budget, less SLACK_MARGIN, goes to garbage collection first and then to
+# deferred tasks (cache warm-up, score commits, the frame log) in the order
+# they were queued: every one whose last run still fits, so a slow task
+# never holds up quick ones behind it, and at most one that has waited
+# TASK_PATIENCE frames and runs whether it fits or not.
+#
+# Python's own collector starts whenever enough allocations pile up, which
+# is usually in the middle of update() or draw(). So at the first frame of
+# every game everything alive is collected once and frozen (gc.freeze()):
+# modules, fonts, sprites and the Game itself are never scanned again. The
+# automatic collector is then switched off and idle() runs the collections
+# it would have run, by gc's own generation thresholds, in frames that
+# have the time. A frame with no slack at all still gets a collection once
+# FORCE_AFTER times the threshold has piled up, so memory stays bounded
+# under load.
+#
+# Every collection, automatic or not, is timed through gc.callbacks and
+# charged to its frame. A frame that only missed its deadline because of a
+# collection counts as a GC miss; report() shows them in the F3 readout.
+# ARCADE_GC=auto leaves the automatic collector on, to compare against,
+# and ARCADE_FRAME_LOG=path writes one CSV row per frame (or says once on
+# stderr why it cannot, and stops logging).
+
+SLACK_MARGIN = 0.002  # seconds left for the clock to wake up on time
+UNKNOWN_COST = 0.001  # what work that has never run is assumed to take
+FORCE_AFTER = 10  # thresholds' worth of put-off allocations before collecting anyway
+TASK_PATIENCE = 30  # frames a task waits for room before running anyway
+HISTORY = 600  # frames behind the readout's percentiles
+LOG_EVERY = 60  # frames of log rows written at a time
+LOG_LIMIT = 600  # rows kept while the frame log task waits for room; older ones are dropped
+
+AUTOMATIC = os.environ.get('ARCADE_GC') == 'auto'
+LOG_PATH = os.environ.get('ARCADE_FRAME_LOG')
+LOG_HEADER = "frame,work_ms,frame_gc_ms,slack_ms,slack_gc_ms,late,gc_miss\n"
+
+_tasks = deque()  # [name, task, frames waited] in the order deferred
+_costs = {}  # name: seconds its last run took
+_thresholds = gc.get_threshold()
+_pause = 0.0  # collection time charged to the frame in progress
+_collection_start = 0.0
+_history = deque(maxlen=HISTORY)  # (collection seconds inside the frame, in its slack)
+_log_rows = []
+_logging = bool(LOG_PATH)
+stats = {'frames': 0, 'late': 0, 'gc_misses': 0, 'collections': [0, 0, 0], 'forced': 0, 'tasks': 0,
+         'forced_tasks': 0, 'log_dropped': 0}
+
+
+def _on_gc(phase, info):
+    global _pause, _collection_start
+    if phase == 'start':
+        _collection_start = time.perf_counter()
+    else:
+        _pause += time.perf_counter() - _collection_start
+        stats['collections'][info['generation']] += 1
+
+
+def freeze():
+    """Collect once, freeze what is left and take over collecting (unless
+    ARCADE_GC=auto); called at each game's first frame"""
+    if not AUTOMATIC:
+        # What the last game froze may be garbage by now
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+    # Timed from here on: the collection above is start-up, not any frame's doing
+    if _on_gc not in gc.callbacks:
+        gc.callbacks.append(_on_gc)
+
+
+def defer(name, task):
+    """Run task() in the slack of a coming frame; `name` groups tasks
+    that cost about the same"""
+    _tasks.append([name, task, 0])
+
+
+def cancel(*names):
+    """Drop every queued task with one of these names"""
+    kept = [entry for entry in _tasks if entry[0] not in names]
+    _tasks.clear()
+    _tasks.extend(kept)
+
+
+def _fits(name, deadline):
+    return time.perf_counter() + _costs.get(name, UNKNOWN_COST) <= deadline
+
+
+def _timed(name, task, *args):
+    began = time.perf_counter()
+    task(*args)
+    _costs[name] = time.perf_counter() - began
+
+
+def _collect(deadline):
+    counts = gc.get_count()
+    due = [generation for generation in (2, 1, 0) if counts[generation] >= _thresholds[generation]]
+    # The oldest generation that is due and fits; collecting it covers the younger ones
+    for generation in due:
+        if _fits(f'gc {generation}', deadline):
+            _timed(f'gc {generation}', gc.collect, generation)
+            return
+    # Put off for too long: collect even though it makes this frame late
+    for generation in due:
+        if counts[generation] >= _thresholds[generation] * FORCE_AFTER:
+            _timed(f'gc {generation}', gc.collect, generation)
+            stats['forced'] += 1
+            return
+
+
+def _run_tasks(deadline):
+    waiting = []
+    forced = False
+    for entry in [_tasks.popleft() for _ in range(len(_tasks))]:
+        name, task, waited = entry
+        if _fits(name, deadline):
+            _timed(name, task)
+        elif waited >= TASK_PATIENCE and not forced:
+            # Put off for too long: run it even though it makes this frame late
+            _timed(name, task)
+            forced = True
+            stats['forced_tasks'] += 1
+        else:
+            entry[2] += 1
+            waiting.append(entry)
+            continue
+        stats['tasks'] += 1
+    # Still ahead of anything the tasks deferred while they ran
+    _tasks.extendleft(reversed(waiting))
+
+
+def idle(started, budget):
+    """Use what is left of a frame that began at `started` (perf_counter)
+    and has `budget` seconds; None for a game's first frame"""
+    global _pause
+    if started is None:
+        freeze()
+        return
+    began = time.perf_counter()
+    # Collections that ran during update() and draw()
+    frame_pause = _pause
+    deadline = started + budget - SLACK_MARGIN
+    if not AUTOMATIC:
+        _collect(deadline)
+    _run_tasks(deadline)
+    ended = time.perf_counter()
+
+    # Late, and on time but for the collections it ran
+    slack_pause = _pause - frame_pause
+    _pause = 0.0
+    late = ended - started > budget
+    gc_miss = late and ended - started - frame_pause - slack_pause <= budget
+    stats['frames'] += 1
+    stats['late'] += late
+    stats['gc_misses'] += gc_miss
+    _history.append((frame_pause, slack_pause))
+    if _logging:
+        _log_rows.append(f"{stats['frames']},{(began - started - frame_pause) * 1000:.3f},{frame_pause * 1000:.3f},"
+                         f"{(ended - began - slack_pause) * 1000:.3f},{slack_pause * 1000:.3f},"
+                         f"{int(late)},{int(gc_miss)}\n")
+        if len(_log_rows) == LOG_EVERY:
+            defer('frame log', write_log)
+        elif len(_log_rows) > LOG_LIMIT:
+            stats['log_dropped'] += len(_log_rows) - LOG_LIMIT
+            del _log_rows[:-LOG_LIMIT]
+
+
+def write_log():
+    global _logging
+    new = not os.path.exists(LOG_PATH)
+    try:
+        with open(LOG_PATH, 'a') as log:
+            if new:
+                log.write(LOG_HEADER)
+            log.writelines(_log_rows)
+    except OSError as error:
+        print(f"scheduler: {LOG_PATH}: {error}; the frame log is off", file=sys.stderr)
+        _logging = False
+    del _log_rows[:]
+
+
+def stop():
+    """Write out the rest of the log and hand collecting back to gc"""
+    if _logging and _log_rows:
+        write_log()
+    gc.enable()
+
+
+def report():
+    if not _history:
+        return "gc: no frames yet"
+    # Pauses inside frames are the ones that can make them late
+    pauses = sorted(frame_pause for frame_pause, _ in _history)
+    p99 = pauses[min(len(pauses) - 1, int(len(pauses) * 0.99))]
+    slack = max(slack_pause for _, slack_pause in _history)
+    young, middle, full = stats['collections']
+    return (f"gc {'automatic' if AUTOMATIC else 'in slack'}: in-frame pause p99 {p99 * 1000:.2f}"
+            f" max {pauses[-1] * 1000:.2f} ms, in slack max {slack * 1000:.2f} ms"
+            f"  collections {young}/{middle}/{full} ({stats['forced']} forced)  late {stats['late']}"
+            f" ({stats['gc_misses']} by gc)  {len(_tasks)} tasks queued ({stats['forced_tasks']} forced)")
@@ -0,0 +1,184 @@
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+import scheduler
+
+# High scores and run statistics for every game, kept in one SQLite file.
+#
+# Games never wait on the database. record() puts the run straight into an
+# in-memory top-N table and totals for its game, which is all the
+# leaderboards ever read, and queues the row. A writer thread owns the
+# connection: it fills the tables from the file once when it starts, then
+# commits whatever has queued up in one transaction when flush() runs in
+# the slack at the end of a frame (scheduler.py), so SQLite works while
+# the game sleeps, or after FLUSH_INTERVAL if no frame gets there. The
+# file is in WAL mode with synchronous=NORMAL, so a commit is an append to
+# the log with no fsync of the database itself.
+#
+# Nothing is stored until a game's run() calls start(); headless tools that
+# drive update() directly (recorder.py, snapshot.py) leave no scores behind.
+
+PATH = os.environ.get('ARCADE_SCORES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db'))
+TOP = 10  # runs kept per game in memory
+FLUSH_INTERVAL = 0.5  # seconds the writer waits for a flush() before committing anyway
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER,
+    detail TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (game, score DESC);
+"""
+
+_lock = threading.Lock()  # the tables below, shared with the writer's first load
+_top = {}  # game: [(score, level, detail, finished)], best first
+_totals = {}  # game: [runs, seconds played]
+_queue = queue.Queue()
+_writer = None
+_loaded = threading.Event()
+_flush = threading.Event()
+_pending = 0  # rows recorded and not yet committed, under _lock
+written = 0
+
+
+def start(path=PATH):
+    """Start the writer (once); scores are recorded from here on"""
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(target=_write, args=(path,), name="score writer", daemon=True)
+        _writer.start()
+
+
+def stop():
+    """Write out everything queued and stop the writer"""
+    global _writer
+    if _writer is not None:
+        _queue.put(None)
+        _flush.set()
+        _writer.join()
+        _writer = None
+
+
+def flush():
+    """Let the writer commit what has queued"""
+    # Not _queue.empty(): the writer has usually taken the row already and
+    # is waiting for this
+    with _lock:
+        if _pending:
+            _flush.set()
+
+
+def loaded():
+    return _loaded.is_set()
+
+
+def _add(game, runs, seconds, entries):
+    # Caller holds _lock
+    totals = _totals.setdefault(game, [0, 0.0])
+    totals[0] += runs
+    totals[1] += seconds
+    top = _top.setdefault(game, [])
+    top.extend(entries)
+    # Equal scores: the earlier run stays ahead
+    top.sort(key=lambda entry: (-entry[0], entry[3]))
+    del top[TOP:]
+
+
+def record(game, score, level=None, seconds=0.0, detail=''):
+    """Count one finished run; returns its leaderboard entry (None before start())"""
+    global _pending
+    if _writer is None:
+        return None
+    entry = (score, level, detail, time.time())
+    with _lock:
+        _add(game, 1, seconds, [entry])
+        _pending += 1
+    _queue.put((game, score, level, detail, seconds, entry[3]))
+    scheduler.defer('score flush', flush)
+    return entry
+
+
+def top(game, count=TOP):
+    with _lock:
+        return _top.get(game, [])[:count]
+
+
+def leaderboard(game, count=5):
+    """(entry, line of text) for each of `game`'s best `count` runs"""
+    lines = []
+    for rank, entry in enumerate(top(game, count), 1):
+        score, level, detail, _ = entry
+        text = f"{rank}. {score:,}"
+        if level is not None:
+            text += f"  level {level}"
+        if detail:
+            text += f"  {detail}"
+        lines.append((entry, text))
+    return lines
+
+
+def totals(game):
+    """(runs, seconds played) for `game`"""
+    with _lock:
+        return tuple(_totals.get(game, (0, 0.0)))
+
+
+def _load(connection):
+    rows = connection.execute("SELECT game, COUNT(*), SUM(seconds) FROM runs GROUP BY game").fetchall()
+    for game, runs, seconds in rows:
+        entries = connection.execute("SELECT score, level, detail, finished FROM runs WHERE game = ? "
+                                     "ORDER BY score DESC, finished LIMIT ?", (game, TOP)).fetchall()
+        # Runs recorded while this was loading are already in the tables
+        with _lock:
+            _add(game, runs, seconds, entries)
+
+
+def _write(path):
+    global written, _pending
+    try:
+        connection = sqlite3.connect(path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        _load(connection)
+    except sqlite3.Error as error:
+        print(f"scores: {path}: {error}; this session's scores are kept in memory only", file=sys.stderr)
+        connection = None
+    _loaded.set()
+
+    stopping = False
+    while not stopping:
+        rows = [_queue.get()]
+        # Wait for a frame's slack, letting a burst of rows collect into
+        # one transaction
+        if rows[0] is not None:
+            _flush.wait(FLUSH_INTERVAL)
+        while True:
+            try:
+                rows.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        if None in rows:
+            stopping = True
+            rows = [row for row in rows if row is not None]
+        if rows and connection is not None:
+            with connection:
+                connection.executemany("INSERT INTO runs (game, score, level, detail, seconds, finished) "
+                                       "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            written += len(rows)
+        with _lock:
+            _pending -= len(rows)
+            # A flush() for rows recorded since stays set
+            if not _pending:
+                _flush.clear()
+    if connection is not None:
+        connection.close()
@@ -0,0 +1,234 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pygame
+
+import quality
+import SpaceShooter
+
+# Monte Carlo balancing for SpaceShooter's mission.
+#
+# Every session is a real SpaceShooter.Game played headless by a scripted
+# bot through Game.update(keys, now), with the frame count as the clock so
+# shot timing does not depend on how fast the machine runs. A session is
+# decided by its seed alone: the game's GameRandom spawns the enemies and
+# the bot draws its mistakes from its own. Each configuration of the
+# DIFFICULTY knobs in the sweep is played by every bot over the same
+# seeds, on a process pool that keeps one Game per worker, and the report
+# gives survival time, score and level reached as distributions.
+
+DEFAULT_SESSIONS = 200  # per configuration and bot
+DEFAULT_CHUNK_SIZE = 10
+MAX_SECONDS = 600  # sessions still alive after this count as survived
+PERCENTILES = (10, 50, 90)
+
+# Bot inputs, as a pressed-keys lookup for Player.update
+KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+
+
+class Bot:
+    """Holds fire and flies up or down to target(); None stays put"""
+    dead_zone = 4
+    reaction_delay = 0  # frames before it acts on a new target
+    error = 0  # standard deviation of each target, in pixels
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.aim = None
+        self.goal = None
+        self.pending = None
+        self.wait = 0
+
+    def keys(self, game):
+        pressed = dict.fromkeys(KEYS, False)
+        pressed[pygame.K_SPACE] = True
+        # Enemies fly level, so a target's height only needs working out
+        # when the bot picks a new one; it takes it late and a little wrong
+        aim, goal = self.target(game)
+        if aim is not self.aim:
+            self.aim = aim
+            if goal is not None and self.error:
+                goal += self.rng.gauss(0, self.error)
+            self.pending = goal
+            self.wait = self.reaction_delay
+        if self.wait:
+            self.wait -= 1
+        else:
+            self.goal = self.pending
+
+        if self.goal is not None:
+            player = game.player
+            offset = self.goal - (player.y + player.height / 2)
+            pressed[pygame.K_UP] = offset < -self.dead_zone
+            pressed[pygame.K_DOWN] = offset > self.dead_zone
+        return pressed
+
+    def target(self, game):
+        """(what it is after, centre height to fly to)"""
+        return None, None
+
+
+class TurretBot(Bot):
+    # Never moves: shows how much the spawns alone can do
+    pass
+
+
+class HunterBot(Bot):
+    # Lines up with whichever enemy in front will reach it first
+    def target(self, game):
+        player = game.player
+        ahead = [enemy for enemy in game.enemies if enemy.x > player.x + player.width]
+        if not ahead:
+            return None, None
+        enemy = min(ahead, key=lambda enemy: (enemy.x - player.x) / enemy.speed)
+        return enemy, enemy.y + enemy.height / 2
+
+
+class CasualBot(HunterBot):
+    reaction_delay = 15
+    error = 25
+
+
+class RookieBot(HunterBot):
+    reaction_delay = 30
+    error = 60
+
+
+BOTS = {
+    'turret': TurretBot,
+    'hunter': HunterBot,
+    'casual': CasualBot,
+    'rookie': RookieBot,
+}
+
+
+_game = None  # one per worker process, reset for every session
+
+
+def session_game():
+    global _game
+    if _game is None:
+        _game = SpaceShooter.Game()
+        # Particles are cosmetic (nothing in quality.py feeds back into
+        # play), so sessions run without any
+        quality.knobs = dict(quality.LEVELS[-1], particles=0)
+    return _game
+
+
+def play_session(bot, seed, difficulty, max_frames):
+    """Play one mission with `bot` under `difficulty`"""
+    game = session_game()
+    game.difficulty = dict(difficulty)
+    game.rng.seed(seed)
+    game.reset_game('mission')
+    player = BOTS[bot](random.Random(seed))
+    frame = 0
+    while not game.game_over and frame < max_frames:
+        game.update(player.keys(game), frame * 1000 // SpaceShooter.FPS)
+        frame += 1
+    return frame / SpaceShooter.FPS, game.score, game.level, not game.game_over
+
+
+def play_chunk(sessions, configs, max_frames):
+    return [(config, bot) + play_session(bot, seed, configs[config], max_frames)
+            for config, bot, seed in sessions]
+
+
+def run_sweep(sessions, configs, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_frames=MAX_SECONDS * 60):
+    """Spread sessions over a process pool and yield each result as its chunk finishes"""
+    chunks = [sessions[i:i + chunk_size] for i in range(0, len(sessions), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, chunk, configs, max_frames) for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                yield result
+
+
+def sweep_configs(args):
+    """Every combination of the swept DIFFICULTY values"""
+    names = list(SpaceShooter.DIFFICULTY)
+    values = [getattr(args, name) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def describe(difficulty):
+    speed = difficulty['enemy_speed']
+    return (f"spawn every {difficulty['spawn_start']}-{difficulty['spawn_step']}/level "
+            f"(min {difficulty['spawn_min']}) frames, up to {difficulty['enemy_cap']}+level enemies, "
+            f"speed {speed[0]:g}-{speed[1]:g}, level every {difficulty['level_points']} points")
+
+
+class Report:
+    def __init__(self, configs, bots):
+        self.configs = configs
+        self.bots = bots
+        self.results = {(config, bot): [] for config in range(len(configs)) for bot in bots}
+
+    def add(self, result):
+        self.results[result[:2]].append(result[2:])
+
+    @staticmethod
+    def spread(values):
+        low, middle, high = np.percentile(values, PERCENTILES)
+        return f"{values.mean():8.0f}{low:8.0f}{middle:8.0f}{high:8.0f}"
+
+    def print_report(self):
+        percentiles = ''.join(f"p{p}".rjust(8) for p in PERCENTILES)
+        for config, difficulty in enumerate(self.configs):
+            print(f"\n[{config}] {describe(difficulty)}")
+            print(f"{'BOT':<10}{'RUNS':>6}{'ALIVE':>7}   SECONDS {'mean':>7}{percentiles}"
+                  f"   SCORE {'mean':>9}{percentiles}   LEVEL {'mean':>9}{percentiles}")
+            for bot in self.bots:
+                seconds, score, level, survived = np.array(self.results[config, bot]).T
+                print(f"{bot:<10}{len(seconds):>6}{survived.mean():>7.0%}   {'':7}{self.spread(seconds)}"
+                      f"   {'':5}{self.spread(score)}   {'':5}{self.spread(level)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless SpaceShooter difficulty sweep with scripted bots")
+    parser.add_argument('--bots', nargs='+', default=list(BOTS), choices=list(BOTS))
+    parser.add_argument('--sessions', type=int, default=DEFAULT_SESSIONS,
+                        help="sessions per configuration and bot")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--max-seconds', type=int, default=MAX_SECONDS)
+    parser.add_argument('--seed', type=int, default=0)
+    # One option per DIFFICULTY knob; every combination is played
+    defaults = SpaceShooter.DIFFICULTY
+    for name in ('spawn_start', 'spawn_step', 'spawn_min', 'enemy_cap', 'level_points'):
+        parser.add_argument('--' + name.replace('_', '-'), type=int, nargs='+', default=[defaults[name]])
+    parser.add_argument('--enemy-speed', type=lambda text: tuple(map(float, text.split(':'))), nargs='+',
+                        default=[defaults['enemy_speed']], metavar='LOW:HIGH')
+    args = parser.parse_args()
+
+    # The workers' games open a window; nothing needs to be shown
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    configs = sweep_configs(args)
+    # Every configuration and bot gets the same seeds
+    sessions = [(config, bot, args.seed + i) for config in range(len(configs))
+                for bot in args.bots for i in range(args.sessions)]
+    report = Report(configs, args.bots)
+    print(f"Playing {len(sessions)} sessions ({len(configs)} configurations x {len(args.bots)} bots x "
+          f"{args.sessions}) on {args.workers} workers...")
+
+    start = time.perf_counter()
+    done = 0
+    for result in run_sweep(sessions, configs, args.workers, args.chunk_size, args.max_seconds * SpaceShooter.FPS):
+        report.add(result)
+        done += 1
+        if done % 500 == 0:
+            print(f"  {done}/{len(sessions)} sessions finished")
+    elapsed = time.perf_counter() - start
+
+    report.print_report()
+    print(f"\n{done} sessions in {elapsed:.1f}s ({done / elapsed:.1f} sessions/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import math
+import struct
+
+import numpy as np
+import pygame
+
+# Enemy bullets for SpaceShooter's bullet-hell mode.
+#
+# Every bullet lives in a set of preallocated NumPy arrays used as a ring
+# buffer: firing writes the next slots after `head` (wrapping around and
+# overwriting the oldest bullet if the pool is ever full), and one
+# vectorized step per frame moves every bullet and culls the ones that
+# left the screen. Nothing is allocated per bullet, so 10,000 of them cost
+# about as much as a handful of array operations.
+
+CAPACITY = 16384
+MARGIN = 20  # bullets are culled this far outside the screen
+RADIUS = 3
+
+# Pixel offsets of one bullet: a small disc with a bright core
+SHAPE = [(dx, dy) for dx in range(-RADIUS, RADIUS + 1) for dy in range(-RADIUS, RADIUS + 1)
+         if dx * dx + dy * dy <= RADIUS * RADIUS]
+CORE = [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]
+
+# Snapshot header: head, live bullet count; then the live slots (int32) and
+# their x, y, vx, vy (float64)
+SNAPSHOT_HEADER = struct.Struct('<II')
+
+
+class BulletPool:
+    def __init__(self, width, height, capacity=CAPACITY):
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.head = 0
+        self.count = 0
+
+    def clear(self):
+        self.alive[:] = False
+        self.head = 0
+        self.count = 0
+
+    def emit(self, x, y, angles, speed):
+        """Fire one bullet from (x, y) along each angle (radians)"""
+        angles = np.asarray(angles, dtype=float)
+        slots = (self.head + np.arange(len(angles))) % self.capacity
+        self.head = (self.head + len(angles)) % self.capacity
+        self.count += len(angles) - int(self.alive[slots].sum())
+
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = speed * np.cos(angles)
+        self.vy[slots] = speed * np.sin(angles)
+        self.alive[slots] = True
+
+    def snapshot(self):
+        # Live bullets only, kept in their slots so the ring buffer
+        # overwrites the same ones afterwards
+        slots = np.flatnonzero(self.alive)
+        return (SNAPSHOT_HEADER.pack(self.head, len(slots)) + slots.astype(np.int32).tobytes() +
+                np.stack((self.x[slots], self.y[slots], self.vx[slots], self.vy[slots])).tobytes())
+    
+    def restore(self, data, offset=0):
+        """Restore from a snapshot() at `offset`; returns the offset just past it"""
+        self.head, count = SNAPSHOT_HEADER.unpack_from(data, offset)
+        offset += SNAPSHOT_HEADER.size
+        slots = np.frombuffer(data, np.int32, count, offset)
+        offset += slots.nbytes
+        values = np.frombuffer(data, float, count * 4, offset).reshape(4, count)
+        self.alive[:] = False
+        self.alive[slots] = True
+        self.x[slots], self.y[slots], self.vx[slots], self.vy[slots] = values
+        self.count = count
+        return offset + values.nbytes
+    
+    def step(self):
+        # Dead slots move too; that is cheaper than masking and harmless
+        self.x += self.vx
+        self.y += self.vy
+        self.alive &= ((self.x > -MARGIN) & (self.x < self.width + MARGIN) &
+                       (self.y > -MARGIN) & (self.y < self.height + MARGIN))
+        self.count = int(np.count_nonzero(self.alive))
+
+    def collide(self, rect):
+        """Remove every bullet touching `rect` and return how many there were"""
+        hit = (self.alive &
+               (self.x + RADIUS > rect.left) & (self.x - RADIUS < rect.right) &
+               (self.y + RADIUS > rect.top) & (self.y - RADIUS < rect.bottom))
+        hits = int(np.count_nonzero(hit))
+        if hits:
+            self.alive &= ~hit
+            self.count -= hits
+        return hits
+
+    def draw(self, screen, color, core_color):
+        # Stamped straight into the surface's pixels, one array write per
+        # offset of the bullet shape rather than one draw call per bullet
+        xs = self.x[self.alive].astype(np.intp)
+        ys = self.y[self.alive].astype(np.intp)
+        width, height = screen.get_size()
+        pixels = pygame.surfarray.pixels2d(screen)
+        for offsets, mapped in ((SHAPE, screen.map_rgb(color)), (CORE, screen.map_rgb(core_color))):
+            for dx, dy in offsets:
+                px = xs + dx
+                py = ys + dy
+                inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+                pixels[px[inside], py[inside]] = mapped
+        del pixels
+
+
+# Scripted patterns. Each one fires a volley from an emitter at (x, y);
+# `tick` is the emitter's frame counter, so patterns can rotate over time,
+# and `density` (the game level) adds bullets to every volley.
+
+def ring(pool, x, y, tick, target, density=1, speed=3.0):
+    count = 16 + 8 * density
+    offset = (tick // 40) * math.pi / count
+    pool.emit(x, y, offset + np.arange(count) * (2 * math.pi / count), speed)
+
+
+def spiral(pool, x, y, tick, target, density=1, speed=3.5):
+    arms = 2 + 2 * density
+    offset = tick * 0.13
+    pool.emit(x, y, offset + np.arange(arms) * (2 * math.pi / arms), speed)
+
+
+def aimed(pool, x, y, tick, target, density=1, spread=0.5, speed=5.0):
+    count = 5 + 2 * density
+    angle = math.atan2(target[1] - y, target[0] - x)
+    pool.emit(x, y, angle + np.linspace(-spread / 2, spread / 2, count), speed)
+
+
+# name: (pattern, frames between volleys)
+PATTERNS = {
+    'ring': (ring, 40),
+    'spiral': (spiral, 3),
+    'aimed': (aimed, 15),
+}
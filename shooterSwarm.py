@@ -0,0 +1,244 @@
+import math
+import struct
+
+import numpy as np
+
+# Swarm engine for SpaceShooter: thousands of small enemy drones kept in
+# preallocated NumPy arrays and moved in a few vectorized steps per frame.
+#
+# Formation drones (sine waves, V-shapes) follow a closed-form path around
+# a baseline that scrolls left. Flocking drones are boids: separation,
+# alignment and cohesion come from per-cell sums over a uniform grid
+# (np.bincount plus a 3x3 neighbourhood sum), so a step costs O(n + cells)
+# instead of comparing every pair.
+
+CAPACITY = 5000
+DRONE_WIDTH = 30
+DRONE_HEIGHT = 15
+# Hitbox inside the drone sprite, as Enemy.get_rect at half size
+HITBOX = (3, 4, DRONE_WIDTH - 5, DRONE_HEIGHT - 8)
+
+# Formation kinds
+WAVE = 0
+FLOCK = 1
+
+# Flocking
+CELL_SIZE = 40
+COHESION = 0.003
+ALIGNMENT = 0.05
+SEPARATION = 0.06
+SEEK = 0.0002  # pull towards the player
+CRUISE_SPEED = 2.0  # flocks still drift left across the screen
+DRIFT = 0.1
+MAX_SPEED = 4.0
+EDGE_MARGIN = 90
+SPAWN_MARGIN = 240  # flocks enter from this far right of the screen; the grid covers it
+
+# Snapshot header: tick, live drone count, rng state (PCG64 state and
+# increment, 128 bits each, and its buffered 32-bit half); then the live
+# slots (int32), their eight float64 arrays and their kind and colour bytes
+SNAPSHOT_HEADER = struct.Struct('<iI16s16s?I')
+FLOAT_ARRAYS = ['x', 'y', 'vx', 'vy', 'base_y', 'amplitude', 'phase', 'frequency']
+
+
+class Swarm:
+    def __init__(self, width, height, capacity=CAPACITY, seed=None):
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.color = np.zeros(capacity, dtype=np.int8)
+        # Wave path: y = base_y + amplitude * sin(phase + tick * frequency)
+        self.base_y = np.zeros(capacity)
+        self.amplitude = np.zeros(capacity)
+        self.phase = np.zeros(capacity)
+        self.frequency = np.zeros(capacity)
+        self.tick = 0
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+        self.grid_cols = (width + SPAWN_MARGIN) // CELL_SIZE + 1
+        self.grid_rows = height // CELL_SIZE + 1
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+
+    def free_slots(self, count):
+        return np.flatnonzero(~self.alive)[:count]
+
+    def spawn(self, x, y, vx, vy, kind, color):
+        """Add drones at the given positions; returns the slots they took"""
+        slots = self.free_slots(len(x))
+        n = len(slots)
+        self.x[slots] = x[:n]
+        self.y[slots] = y[:n]
+        self.vx[slots] = vx[:n] if np.ndim(vx) else vx
+        self.vy[slots] = vy[:n] if np.ndim(vy) else vy
+        self.kind[slots] = kind
+        self.color[slots] = color
+        self.base_y[slots] = self.y[slots]
+        # Reused slots still hold the last drone's wave path; only the wave
+        # spawners set one, and snapshot() writes it for every live drone
+        self.amplitude[slots] = 0.0
+        self.phase[slots] = 0.0
+        self.frequency[slots] = 0.0
+        self.alive[slots] = True
+        self.count += n
+        return slots
+
+    def spawn_sine(self, count, y, color, speed=2.5, amplitude=80, spacing=35):
+        # A snake of drones; each one lags the one ahead along the wave
+        x = self.width + np.arange(count) * spacing
+        slots = self.spawn(x, np.full(count, float(y)), -speed, 0.0, WAVE, color)
+        self.amplitude[slots] = amplitude
+        self.frequency[slots] = 0.05
+        self.phase[slots] = -np.arange(len(slots)) * 0.4 - self.tick * 0.05
+
+    def spawn_vee(self, count, y, color, speed=2.0, spacing=28):
+        # Leader in front, wings trailing back above and below; the whole V bobs together
+        rank = (np.arange(count) + 1) // 2
+        side = np.where(np.arange(count) % 2, 1, -1)
+        x = self.width + rank * spacing
+        ys = y + side * rank * spacing * 0.6
+        slots = self.spawn(x, ys, -speed, 0.0, WAVE, color)
+        self.amplitude[slots] = 25
+        self.frequency[slots] = 0.03
+        self.phase[slots] = -self.tick * 0.03
+
+    def spawn_flock(self, count, y, color, speed=2.0):
+        x = self.width + self.rng.uniform(0, SPAWN_MARGIN - DRONE_WIDTH, count)
+        ys = y + self.rng.normal(0, 60, count)
+        angles = math.pi + self.rng.uniform(-0.5, 0.5, count)
+        self.spawn(x, ys, speed * np.cos(angles), speed * np.sin(angles), FLOCK, color)
+
+    def neighbourhood(self, per_cell):
+        # Sum of each cell and its 8 neighbours
+        grid = np.pad(per_cell.reshape(self.grid_rows, self.grid_cols), 1)
+        total = np.zeros((self.grid_rows, self.grid_cols))
+        for dy in range(3):
+            for dx in range(3):
+                total += grid[dy:dy + self.grid_rows, dx:dx + self.grid_cols]
+        return total.ravel()
+
+    def update_flock(self, index, target):
+        x, y, vx, vy = self.x[index], self.y[index], self.vx[index], self.vy[index]
+        cols = np.clip((x // CELL_SIZE).astype(np.intp), 0, self.grid_cols - 1)
+        rows = np.clip((y // CELL_SIZE).astype(np.intp), 0, self.grid_rows - 1)
+        cell = rows * self.grid_cols + cols
+        cells = self.grid_rows * self.grid_cols
+
+        count = np.bincount(cell, minlength=cells).astype(float)
+        sum_x = np.bincount(cell, x, cells)
+        sum_y = np.bincount(cell, y, cells)
+        near = self.neighbourhood(count)[cell]
+        near_x = self.neighbourhood(sum_x)[cell]
+        near_y = self.neighbourhood(sum_y)[cell]
+        near_vx = self.neighbourhood(np.bincount(cell, vx, cells))[cell]
+        near_vy = self.neighbourhood(np.bincount(cell, vy, cells))[cell]
+
+        # Cohesion towards the local centre, alignment with the local
+        # heading, separation from the centre of the drone's own cell
+        ax = COHESION * (near_x / near - x) + ALIGNMENT * (near_vx / near - vx)
+        ay = COHESION * (near_y / near - y) + ALIGNMENT * (near_vy / near - vy)
+        own = count[cell]
+        ax += SEPARATION * (x - sum_x[cell] / own)
+        ay += SEPARATION * (y - sum_y[cell] / own)
+        ax += DRIFT * (-CRUISE_SPEED - vx)
+        ax += SEEK * (target[0] - x)
+        ay += SEEK * (target[1] - y)
+        ay += np.where(y < EDGE_MARGIN, 0.3, 0.0) - np.where(y > self.height - EDGE_MARGIN, 0.3, 0.0)
+
+        vx += ax
+        vy += ay
+        speed = np.hypot(vx, vy)
+        scale = np.minimum(1.0, MAX_SPEED / np.maximum(speed, 1e-9))
+        self.vx[index] = vx * scale
+        self.vy[index] = vy * scale
+        self.x[index] = x + self.vx[index]
+        self.y[index] = y + self.vy[index]
+
+    def update(self, target):
+        self.tick += 1
+        wave = np.flatnonzero(self.alive & (self.kind == WAVE))
+        self.x[wave] += self.vx[wave]
+        self.y[wave] = self.base_y[wave] + self.amplitude[wave] * np.sin(
+            self.phase[wave] + self.tick * self.frequency[wave])
+
+        flock = np.flatnonzero(self.alive & (self.kind == FLOCK))
+        if len(flock):
+            self.update_flock(flock, target)
+
+        # Drones that flew off the left edge are gone
+        self.alive &= self.x > -DRONE_WIDTH
+        self.count = int(np.count_nonzero(self.alive))
+
+    def snapshot(self):
+        slots = np.flatnonzero(self.alive)
+        rng = self.rng.bit_generator.state
+        header = SNAPSHOT_HEADER.pack(self.tick, len(slots), rng['state']['state'].to_bytes(16, 'little'),
+                                      rng['state']['inc'].to_bytes(16, 'little'), rng['has_uint32'],
+                                      rng['uinteger'])
+        floats = np.stack([getattr(self, name)[slots] for name in FLOAT_ARRAYS])
+        return b''.join((header, slots.astype(np.int32).tobytes(), floats.tobytes(),
+                         self.kind[slots].tobytes(), self.color[slots].tobytes()))
+    
+    def restore(self, data, offset=0):
+        """Restore from a snapshot() at `offset`; returns the offset just past it"""
+        self.tick, count, state, inc, has_uint32, uinteger = SNAPSHOT_HEADER.unpack_from(data, offset)
+        offset += SNAPSHOT_HEADER.size
+        self.rng.bit_generator.state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': int.from_bytes(state, 'little'), 'inc': int.from_bytes(inc, 'little')},
+            'has_uint32': int(has_uint32),
+            'uinteger': uinteger,
+        }
+        slots = np.frombuffer(data, np.int32, count, offset)
+        offset += slots.nbytes
+        floats = np.frombuffer(data, float, count * len(FLOAT_ARRAYS), offset).reshape(len(FLOAT_ARRAYS), count)
+        offset += floats.nbytes
+        for name, values in zip(FLOAT_ARRAYS, floats):
+            getattr(self, name)[slots] = values
+        self.kind[slots] = np.frombuffer(data, np.int8, count, offset)
+        self.color[slots] = np.frombuffer(data, np.int8, count, offset + count)
+        self.alive[:] = False
+        self.alive[slots] = True
+        self.count = count
+        return offset + count * 2
+    
+    def touching(self, rect):
+        left = self.x + HITBOX[0]
+        top = self.y + HITBOX[1]
+        return (self.alive & (left < rect.right) & (rect.left < left + HITBOX[2]) &
+                (top < rect.bottom) & (rect.top < top + HITBOX[3]))
+
+    def hit_first(self, rect):
+        """Destroy the first drone touching `rect`; returns its slot or None"""
+        slots = np.flatnonzero(self.touching(rect))
+        if not len(slots):
+            return None
+        self.alive[slots[0]] = False
+        self.count -= 1
+        return slots[0]
+
+    def hit_all(self, rect):
+        """Destroy every drone touching `rect`; returns how many there were"""
+        hit = self.touching(rect)
+        hits = int(np.count_nonzero(hit))
+        if hits:
+            self.alive &= ~hit
+            self.count -= hits
+        return hits
+
+    def draw(self, screen, sprites):
+        # One pre-rendered sprite per colour, blitted in a single batch
+        alive = np.flatnonzero(self.alive)
+        xs = self.x[alive].astype(np.intp).tolist()
+        ys = self.y[alive].astype(np.intp).tolist()
+        colors = self.color[alive].tolist()
+        screen.blits([(sprites[c], (x, y)) for c, x, y in zip(colors, xs, ys)], False)
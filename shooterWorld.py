@@ -0,0 +1,124 @@
+import struct
+
+from snapshot import GameRandom, GOLDEN_GAMMA, MASK
+
+# Side-scrolling levels for SpaceShooter's deep-strike mode.
+#
+# A level is a strip of chunks, each CHUNK_WIDTH pixels of world, far
+# longer than anything kept in memory. A chunk's enemies come from the
+# level seed and the chunk index alone, so a chunk is built only when the
+# camera gets near it and is forgotten once the camera is past it. Until
+# then its enemies sleep as plain (x, y, speed, colour) tuples in world
+# coordinates: never updated, never drawn. They wake, and become real
+# enemies in screen coordinates, when they come within WAKE_MARGIN of the
+# right edge of the view; the game drops them again once they leave on the
+# left. What is alive at any moment is bounded by the view, not the level.
+
+CHUNK_WIDTH = 600
+LEVEL_CHUNKS = 500  # 300,000 pixels, about 40 minutes of scrolling
+LOAD_AHEAD = 2  # chunks built past the one the wake line is in
+WAKE_MARGIN = 200  # enemies wake this far right of the view, so they fly in
+SCROLL_SPEED = 2  # camera pixels per frame
+ENEMY_SPEED = (0.5, 1.5)  # own speed, on top of the scrolling
+EDGE_MARGIN = (80, 100)  # kept clear at the top (HUD) and bottom
+
+# Seed, sector, camera x; the chunks in memory follow from these
+SNAPSHOT_HEADER = struct.Struct('<QII')
+
+
+class World:
+    def __init__(self, view_width, view_height, colors, chunks=LEVEL_CHUNKS):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.colors = colors
+        self.chunks = chunks
+        self.clear()
+
+    def clear(self):
+        self.seed = 0
+        self.sector = 0
+        self.camera_x = 0
+        self.loaded = {}  # chunk index: sleeping enemies, sorted by x
+        self.next_chunk = 0
+
+    def start(self, seed, sector=1):
+        """Start a fresh level; sectors get denser as they go"""
+        self.clear()
+        self.seed = seed
+        self.sector = sector
+        self.stream()
+
+    @property
+    def length(self):
+        return self.chunks * CHUNK_WIDTH
+
+    @property
+    def wake_line(self):
+        return self.camera_x + self.view_width + WAKE_MARGIN
+
+    def sleeping(self):
+        return sum(len(enemies) for enemies in self.loaded.values())
+
+    def progress(self):
+        return min(self.camera_x / self.length, 1.0)
+
+    def finished(self):
+        return self.camera_x >= self.length and not self.loaded
+
+    def build_chunk(self, index):
+        # The chunk's own generator, so chunks come out the same in any order
+        rng = GameRandom((self.seed + (index + 1) * GOLDEN_GAMMA) & MASK)
+        count = rng.randint(1, 3 + self.sector + 4 * index // self.chunks)
+        left = index * CHUNK_WIDTH
+        top, bottom = EDGE_MARGIN
+        return sorted((left + rng.randrange(CHUNK_WIDTH), rng.randint(top, self.view_height - bottom),
+                       rng.uniform(*ENEMY_SPEED), rng.randrange(self.colors)) for _ in range(count))
+
+    def stream(self):
+        # Build the chunks up to LOAD_AHEAD past the wake line
+        last = min(self.wake_line // CHUNK_WIDTH + LOAD_AHEAD, self.chunks - 1)
+        while self.next_chunk <= last:
+            self.loaded[self.next_chunk] = self.build_chunk(self.next_chunk)
+            self.next_chunk += 1
+
+    def advance(self):
+        """Scroll one frame; returns the enemies that wake, as
+        (screen x, y, speed, colour index)"""
+        if self.camera_x < self.length:
+            self.camera_x += SCROLL_SPEED
+            self.stream()
+        wake_line = self.wake_line
+        woken = []
+        # Chunks are loaded in order and each is sorted, so only the front
+        # of the first one or two is ever looked at
+        for index in list(self.loaded):
+            enemies = self.loaded[index]
+            count = 0
+            while count < len(enemies) and enemies[count][0] < wake_line:
+                x, y, speed, color = enemies[count]
+                woken.append((x - self.camera_x, y, speed, color))
+                count += 1
+            del enemies[:count]
+            if enemies:
+                break
+            del self.loaded[index]
+        return woken
+
+    def snapshot(self):
+        return SNAPSHOT_HEADER.pack(self.seed, self.sector, self.camera_x)
+
+    def restore(self, data, offset=0):
+        """Restore from a snapshot() at `offset`; returns the offset just past it"""
+        seed, sector, camera_x = SNAPSHOT_HEADER.unpack_from(data, offset)
+        self.clear()
+        self.seed, self.sector, self.camera_x = seed, sector, camera_x
+        if sector:
+            # Rebuild what was in memory, minus the enemies already awake
+            self.next_chunk = min(self.wake_line // CHUNK_WIDTH, self.chunks)
+            self.stream()
+            wake_line = self.wake_line
+            for index in list(self.loaded):
+                self.loaded[index] = [enemy for enemy in self.loaded[index] if enemy[0] >= wake_line]
+                if not self.loaded[index]:
+                    del self.loaded[index]
+        return offset + SNAPSHOT_HEADER.size
@@ -1,10 +1,18 @@
 import pygame
-import sys
-import random
 import math
+import struct
+import time
+import argparse
 
-# Initialize Pygame
-pygame.init()
+import numpy as np
+
+import engine
+import scores
+import sound
+from gridRaster import GridRaster
+from snakeAutopilot import Autopilot
+from snakeWorld import ChunkedBoard, GreedyPilot
+from snapshot import GameRandom
 
 # Constants
 WINDOW_WIDTH = 800
@@ -13,6 +21,17 @@ GRID_SIZE = 20
 GRID_WIDTH = WINDOW_WIDTH // GRID_SIZE
 GRID_HEIGHT = WINDOW_HEIGHT // GRID_SIZE
 
+# Large-world mode: the window is a camera over a board of WORLD_SIZE x
+# WORLD_SIZE cells, and food turns up within FOOD_RANGE cells of the head
+WORLD_SIZE = 10000
+FOOD_RANGE = 15
+# Body segments drawn with their own fading colour; the rest share the last one
+FADE_SEGMENTS = 14
+# From this length on the playfield is drawn as one raster (gridRaster.py)
+# instead of one rounded rect per segment
+RASTER_FROM = 200
+DRAW_MODES = ['auto', 'rects', 'raster']
+
 # Modern color palette
 COLORS = {
     'background': (18, 18, 18),      # Dark background
@@ -26,9 +45,23 @@ COLORS = {
     'shadow': (0, 0, 0, 100)         # Semi-transparent shadow
 }
 
+# Snapshot header: direction, grow, food position, score, game over, snake
+# length, rng state; then one (x, y) byte pair per snake segment, head first
+SNAPSHOT_HEADER = struct.Struct('<bb?BBi?HQ')
+# The same for a large world, with 32-bit coordinates and length; the
+# segments follow as (x, y) uint32 pairs
+WORLD_SNAPSHOT_HEADER = struct.Struct('<bb?IIi?IQ')
+
 class Snake:
-    def __init__(self):
-        self.positions = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, board=None):
+        self.width = width
+        self.height = height
+        # Occupancy, when kept in a ChunkedBoard; otherwise the body is searched
+        self.board = board
+        self.positions = [(width // 2, height // 2)]
+        if board is not None:
+            board.clear()
+            board.add(self.positions[0])
         self.direction = (1, 0)
         self.grow = False
         
@@ -38,18 +71,22 @@ class Snake:
         new_head = (head_x + dx, head_y + dy)
         
         # Check wall collision
-        if (new_head[0] < 0 or new_head[0] >= GRID_WIDTH or 
-            new_head[1] < 0 or new_head[1] >= GRID_HEIGHT):
+        if (new_head[0] < 0 or new_head[0] >= self.width or 
+            new_head[1] < 0 or new_head[1] >= self.height):
             return False
             
         # Check self collision
-        if new_head in self.positions:
+        if new_head in (self.positions if self.board is None else self.board):
             return False
             
         self.positions.insert(0, new_head)
+        if self.board is not None:
+            self.board.add(new_head)
         
         if not self.grow:
-            self.positions.pop()
+            tail = self.positions.pop()
+            if self.board is not None:
+                self.board.remove(tail)
         else:
             self.grow = False
             
@@ -64,14 +101,16 @@ class Snake:
         self.grow = True
 
 class Food:
-    def __init__(self, snake_positions):
-        self.position = self.generate_position(snake_positions)
+    def __init__(self, snake_positions, rng, area=(0, 0, GRID_WIDTH, GRID_HEIGHT)):
+        self.position = self.generate_position(snake_positions, rng, area)
         self.pulse = 0
         
-    def generate_position(self, snake_positions):
+    def generate_position(self, snake_positions, rng, area):
+        # Anywhere in area = (left, top, right, bottom) that is not snake
+        left, top, right, bottom = area
         while True:
-            pos = (random.randint(0, GRID_WIDTH - 1), 
-                   random.randint(0, GRID_HEIGHT - 1))
+            pos = (rng.randint(left, right - 1), 
+                   rng.randint(top, bottom - 1))
             if pos not in snake_positions:
                 return pos
     
@@ -79,28 +118,49 @@ class Food:
         self.pulse += 0.2
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Modern Snake Game")
+    def __init__(self, world_size=None, draw_mode='auto'):
+        self.screen = engine.init_display((WINDOW_WIDTH, WINDOW_HEIGHT), "Modern Snake Game")
         self.clock = pygame.time.Clock()
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 36)
-        self.font_small = pygame.font.Font(None, 24)
+        self.font_large = engine.get_font(48)
+        self.font_medium = engine.get_font(36)
+        self.font_small = engine.get_font(24)
+        self.autopilot = None
+        # Board size in cells; a large world is never bigger than the window
+        self.world = bool(world_size)
+        if self.world:
+            self.grid_width = max(world_size, GRID_WIDTH)
+            self.grid_height = max(world_size, GRID_HEIGHT)
+        else:
+            self.grid_width, self.grid_height = GRID_WIDTH, GRID_HEIGHT
+        # Occupancy, for collisions and for finding the cells in view
+        self.board = ChunkedBoard()
+        self.draw_mode = draw_mode
+        self.scores_name = 'snake:world' if self.world else 'snake'
+        self.raster = GridRaster(self.screen, GRID_SIZE, self.draw_tile, FADE_SEGMENTS + 1)
+        # Top left of the window in world pixels
+        self.camera = (0, 0)
+        # Food placement; its state is part of every snapshot
+        self.rng = GameRandom()
         self.reset_game()
         
     def reset_game(self):
-        self.snake = Snake()
-        self.food = Food(self.snake.positions)
+        self.snake = Snake(self.grid_width, self.grid_height, self.board)
+        self.food = self.place_food()
         self.score = 0
         self.game_over = False
         self.paused = False
+        self.started = time.perf_counter()
+        self.last_run = None
         
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                engine.request_exit()
                 return False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                elif event.key == pygame.K_UP:
                     self.snake.change_direction((0, -1))
                 elif event.key == pygame.K_DOWN:
                     self.snake.change_direction((0, 1))
@@ -115,79 +175,195 @@ class Game:
                         self.paused = not self.paused
                 elif event.key == pygame.K_r and self.game_over:
                     self.reset_game()
+                elif event.key == pygame.K_a:
+                    # Toggle the autopilot (used for soak testing)
+                    if self.autopilot:
+                        self.autopilot = None
+                    elif self.world:
+                        self.autopilot = GreedyPilot(self.board, self.grid_width, self.grid_height)
+                    else:
+                        self.autopilot = Autopilot(GRID_WIDTH, GRID_HEIGHT)
         return True
     
+    def place_food(self):
+        if not self.world:
+            return Food(self.board, self.rng)
+        # Somewhere near the head; the rest of a large world stays empty
+        head_x, head_y = self.snake.positions[0]
+        area = (max(0, head_x - FOOD_RANGE), max(0, head_y - FOOD_RANGE),
+                min(self.grid_width, head_x + FOOD_RANGE + 1), min(self.grid_height, head_y + FOOD_RANGE + 1))
+        return Food(self.board, self.rng, area)
+    
+    def snapshot(self):
+        snake = self.snake
+        header = WORLD_SNAPSHOT_HEADER if self.world else SNAPSHOT_HEADER
+        if not self.world:
+            cells = bytes([value for position in snake.positions for value in position])
+        else:
+            cells = np.array(snake.positions, np.uint32).tobytes()
+        return header.pack(*snake.direction, snake.grow, *self.food.position, self.score,
+                           self.game_over, len(snake.positions), self.rng.getstate()) + cells
+    
+    def restore(self, data):
+        header = WORLD_SNAPSHOT_HEADER if self.world else SNAPSHOT_HEADER
+        (dx, dy, self.snake.grow, food_x, food_y, self.score, self.game_over,
+         length, rng_state) = header.unpack_from(data)
+        self.snake.direction = (dx, dy)
+        self.food.position = (food_x, food_y)
+        self.rng.setstate(rng_state)
+        if not self.world:
+            cells = iter(data[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + length * 2])
+            self.snake.positions = list(zip(cells, cells))
+        else:
+            cells = np.frombuffer(data, np.uint32, length * 2, header.size).reshape(length, 2)
+            self.snake.positions = [tuple(position) for position in cells.tolist()]
+        self.board.clear()
+        for position in self.snake.positions:
+            self.board.add(position)
+    
     def update(self):
         if self.game_over or self.paused:
             return
+        
+        if self.autopilot:
+            self.snake.change_direction(self.autopilot.next_direction(self.snake, self.food.position))
             
         if not self.snake.move():
-            self.game_over = True
+            self.end_game()
             return
         
         # Check food collision
         if self.snake.positions[0] == self.food.position:
             self.snake.eat_food()
             self.score += 10
-            self.food = Food(self.snake.positions)
+            sound.play('eat')
+            # Board filled, there is nowhere left to put food
+            if len(self.snake.positions) >= self.grid_width * self.grid_height:
+                self.end_game()
+                return
+            self.food = self.place_food()
         
         self.food.update()
     
+    def update_camera(self):
+        # Keep the head centred, without showing anything past the edges
+        head_x, head_y = self.snake.positions[0]
+        max_x = self.grid_width * GRID_SIZE - WINDOW_WIDTH
+        max_y = self.grid_height * GRID_SIZE - WINDOW_HEIGHT
+        self.camera = (min(max(head_x * GRID_SIZE + GRID_SIZE // 2 - WINDOW_WIDTH // 2, 0), max_x),
+                       min(max(head_y * GRID_SIZE + GRID_SIZE // 2 - WINDOW_HEIGHT // 2, 0), max_y))
+    
     def draw_grid(self):
-        for x in range(0, WINDOW_WIDTH, GRID_SIZE):
+        camera_x, camera_y = self.camera
+        for x in range(-(camera_x % GRID_SIZE), WINDOW_WIDTH, GRID_SIZE):
             pygame.draw.line(self.screen, COLORS['grid'], (x, 0), (x, WINDOW_HEIGHT))
-        for y in range(0, WINDOW_HEIGHT, GRID_SIZE):
+        for y in range(-(camera_y % GRID_SIZE), WINDOW_HEIGHT, GRID_SIZE):
             pygame.draw.line(self.screen, COLORS['grid'], (0, y), (WINDOW_WIDTH, y))
     
     def draw_rounded_rect(self, surface, color, rect, radius):
         pygame.draw.rect(surface, color, rect, border_radius=radius)
     
     def draw_snake(self):
+        if self.world:
+            self.draw_snake_in_view()
+            return
         for i, pos in enumerate(self.snake.positions):
             x, y = pos[0] * GRID_SIZE, pos[1] * GRID_SIZE
-            rect = pygame.Rect(x + 2, y + 2, GRID_SIZE - 4, GRID_SIZE - 4)
-            
-            if i == 0:  # Head
-                # Draw shadow
-                shadow_rect = pygame.Rect(x + 4, y + 4, GRID_SIZE - 4, GRID_SIZE - 4)
-                shadow_surface = pygame.Surface((GRID_SIZE - 4, GRID_SIZE - 4), pygame.SRCALPHA)
-                pygame.draw.rect(shadow_surface, COLORS['shadow'], shadow_surface.get_rect(), border_radius=8)
-                self.screen.blit(shadow_surface, shadow_rect)
-                
-                # Draw head with gradient effect
-                self.draw_rounded_rect(self.screen, COLORS['snake_head'], rect, 8)
-                
-                # Draw eyes
-                eye_size = 3
-                eye_offset = 6
-                if self.snake.direction == (1, 0):  # Right
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + GRID_SIZE - eye_offset, y + eye_offset), eye_size)
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + GRID_SIZE - eye_offset, y + GRID_SIZE - eye_offset), eye_size)
-                elif self.snake.direction == (-1, 0):  # Left
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + eye_offset, y + eye_offset), eye_size)
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + eye_offset, y + GRID_SIZE - eye_offset), eye_size)
-                elif self.snake.direction == (0, -1):  # Up
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + eye_offset, y + eye_offset), eye_size)
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + GRID_SIZE - eye_offset, y + eye_offset), eye_size)
-                else:  # Down
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + eye_offset, y + GRID_SIZE - eye_offset), eye_size)
-                    pygame.draw.circle(self.screen, COLORS['background'], 
-                                     (x + GRID_SIZE - eye_offset, y + GRID_SIZE - eye_offset), eye_size)
-            else:  # Body
-                # Fade effect for body segments
-                fade_factor = max(0.3, 1 - (i * 0.05))
-                body_color = tuple(int(c * fade_factor) for c in COLORS['snake_body'])
-                self.draw_rounded_rect(self.screen, body_color, rect, 6)
+            if i == 0:
+                self.draw_head(x, y)
+            else:
+                self.draw_body(self.screen, x, y, i)
+    
+    def draw_tile(self, tile, cell_type):
+        # One cell as draw_grid and draw_body leave it; type 0 is empty,
+        # the others are body segments 1..FADE_SEGMENTS
+        tile.fill(COLORS['background'])
+        pygame.draw.line(tile, COLORS['grid'], (0, 0), (0, GRID_SIZE - 1))
+        pygame.draw.line(tile, COLORS['grid'], (0, 0), (GRID_SIZE - 1, 0))
+        if cell_type:
+            self.draw_body(tile, 0, 0, cell_type)
+    
+    def use_raster(self):
+        return self.draw_mode == 'raster' or (self.draw_mode == 'auto' and
+                                              len(self.snake.positions) >= RASTER_FROM)
+    
+    def draw_playfield(self):
+        # Background, grid and body of everything in view as one raster: every
+        # occupied cell is a faded segment, then the head end of the body gets
+        # its own types and the head's cell is left empty for draw_head
+        camera_x, camera_y = self.camera
+        left, top = camera_x // GRID_SIZE, camera_y // GRID_SIZE
+        cells = self.board.window(left, top, GRID_WIDTH + 1, GRID_HEIGHT + 1) * FADE_SEGMENTS
+        for i, (x, y) in enumerate(self.snake.positions[:FADE_SEGMENTS]):
+            if 0 <= x - left <= GRID_WIDTH and 0 <= y - top <= GRID_HEIGHT:
+                cells[y - top, x - left] = i
+        self.raster.draw(self.screen, cells, (camera_x % GRID_SIZE, camera_y % GRID_SIZE))
+        head = self.snake.positions[0]
+        self.draw_head(head[0] * GRID_SIZE - camera_x, head[1] * GRID_SIZE - camera_y)
+    
+    def draw_snake_in_view(self):
+        # Only the chunks under the camera are looked at. Every body cell
+        # there but the head's gets the colour of the faded-out tail, then
+        # the head end of the snake is drawn over it in its own colours.
+        camera_x, camera_y = self.camera
+        left, top = camera_x // GRID_SIZE, camera_y // GRID_SIZE
+        head = self.snake.positions[0]
+        head_x, head_y = head[0] * GRID_SIZE - camera_x, head[1] * GRID_SIZE - camera_y
+        xs, ys = self.board.cells_in(left, top, left + GRID_WIDTH + 1, top + GRID_HEIGHT + 1)
+        for x, y in zip((xs * GRID_SIZE - camera_x).tolist(), (ys * GRID_SIZE - camera_y).tolist()):
+            if x != head_x or y != head_y:
+                self.draw_body(self.screen, x, y, FADE_SEGMENTS)
+        for i in range(min(FADE_SEGMENTS, len(self.snake.positions)) - 1, 0, -1):
+            pos = self.snake.positions[i]
+            self.draw_body(self.screen, pos[0] * GRID_SIZE - camera_x, pos[1] * GRID_SIZE - camera_y, i)
+        self.draw_head(head_x, head_y)
+    
+    def draw_head(self, x, y):
+        rect = pygame.Rect(x + 2, y + 2, GRID_SIZE - 4, GRID_SIZE - 4)
+        
+        # Draw shadow
+        shadow_rect = pygame.Rect(x + 4, y + 4, GRID_SIZE - 4, GRID_SIZE - 4)
+        shadow_surface = pygame.Surface((GRID_SIZE - 4, GRID_SIZE - 4), pygame.SRCALPHA)
+        pygame.draw.rect(shadow_surface, COLORS['shadow'], shadow_surface.get_rect(), border_radius=8)
+        self.screen.blit(shadow_surface, shadow_rect)
+        
+        # Draw head with gradient effect
+        self.draw_rounded_rect(self.screen, COLORS['snake_head'], rect, 8)
+        
+        # Draw eyes
+        eye_size = 3
+        eye_offset = 6
+        if self.snake.direction == (1, 0):  # Right
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + GRID_SIZE - eye_offset, y + eye_offset), eye_size)
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + GRID_SIZE - eye_offset, y + GRID_SIZE - eye_offset), eye_size)
+        elif self.snake.direction == (-1, 0):  # Left
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + eye_offset, y + eye_offset), eye_size)
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + eye_offset, y + GRID_SIZE - eye_offset), eye_size)
+        elif self.snake.direction == (0, -1):  # Up
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + eye_offset, y + eye_offset), eye_size)
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + GRID_SIZE - eye_offset, y + eye_offset), eye_size)
+        else:  # Down
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + eye_offset, y + GRID_SIZE - eye_offset), eye_size)
+            pygame.draw.circle(self.screen, COLORS['background'], 
+                             (x + GRID_SIZE - eye_offset, y + GRID_SIZE - eye_offset), eye_size)
+    
+    def draw_body(self, surface, x, y, i):
+        rect = pygame.Rect(x + 2, y + 2, GRID_SIZE - 4, GRID_SIZE - 4)
+        # Fade effect for body segments
+        fade_factor = max(0.3, 1 - (i * 0.05))
+        body_color = tuple(int(c * fade_factor) for c in COLORS['snake_body'])
+        self.draw_rounded_rect(surface, body_color, rect, 6)
     
     def draw_food(self):
-        x, y = self.food.position[0] * GRID_SIZE, self.food.position[1] * GRID_SIZE
+        x = self.food.position[0] * GRID_SIZE - self.camera[0]
+        y = self.food.position[1] * GRID_SIZE - self.camera[1]
         
         # Pulsing effect
         pulse_size = int(2 + math.sin(self.food.pulse) * 2)
@@ -209,14 +385,32 @@ class Game:
                                max(1, (GRID_SIZE - pulse_size * 2) // 3))
         pygame.draw.ellipse(self.screen, (255, 255, 255, 150), shine_rect)
     
+    def end_game(self):
+        if self.game_over:
+            return
+        self.game_over = True
+        sound.play('crash')
+        # Autopilot runs stay off the leaderboard
+        if not self.autopilot:
+            self.last_run = scores.record(self.scores_name, self.score,
+                                          seconds=time.perf_counter() - self.started)
+    
     def draw_ui(self):
         # Score display
         score_text = self.font_medium.render(f"Score: {self.score}", True, COLORS['text'])
         self.screen.blit(score_text, (20, 20))
         
+        # Where the head is in a large world, and the chunks the body occupies
+        if self.world:
+            head_x, head_y = self.snake.positions[0]
+            world_text = self.font_small.render(f"{head_x}, {head_y} of {self.grid_width} x {self.grid_height}  "
+                                                f"chunks: {len(self.board)} ({self.board.memory() // 1024} KB)",
+                                                True, COLORS['text'])
+            self.screen.blit(world_text, (WINDOW_WIDTH - world_text.get_width() - 20, 26))
+        
         # Instructions
         if not self.game_over:
-            instruction_text = self.font_small.render("SPACE to pause | Arrow keys to move", True, COLORS['text'])
+            instruction_text = self.font_small.render("SPACE to pause | Arrow keys to move | A for autopilot", True, COLORS['text'])
             self.screen.blit(instruction_text, (20, WINDOW_HEIGHT - 40))
         
         # Game over screen
@@ -240,6 +434,12 @@ class Game:
             restart_text = self.font_small.render("Press SPACE or R to restart", True, COLORS['accent'])
             restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 20))
             self.screen.blit(restart_text, restart_rect)
+            
+            # Best runs so far, this one highlighted
+            for i, (entry, line) in enumerate(scores.leaderboard(self.scores_name)):
+                color = COLORS['accent'] if entry is self.last_run else COLORS['text']
+                text = self.font_small.render(line, True, color)
+                self.screen.blit(text, text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 70 + i * 26)))
         
         # Pause screen
         elif self.paused:
@@ -248,24 +448,36 @@ class Game:
             self.screen.blit(pause_text, pause_rect)
     
     def draw(self):
-        self.screen.fill(COLORS['background'])
-        self.draw_grid()
-        self.draw_snake()
+        self.update_camera()
+        if self.use_raster():
+            self.draw_playfield()
+        else:
+            self.screen.fill(COLORS['background'])
+            self.draw_grid()
+            self.draw_snake()
         self.draw_food()
         self.draw_ui()
-        pygame.display.flip()
+        engine.flip()
     
     def run(self):
+        scores.start()
+        sound.start()
         running = True  
         while running:
             running = self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(10)  # Control game speed
+            engine.wait_frame(self.clock, 10)  # Control game speed
         
-        pygame.quit()
-        sys.exit()
+        engine.quit()
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Modern Snake Game")
+    parser.add_argument('--world', type=int, nargs='?', const=WORLD_SIZE, default=None, metavar='CELLS',
+                        help=f"play on a CELLS x CELLS board seen through a camera (default {WORLD_SIZE})")
+    parser.add_argument('--draw', choices=DRAW_MODES, default='auto',
+                        help=f"one rect per segment, one raster for the whole playfield, or rects up to "
+                             f"{RASTER_FROM} segments and a raster from then on")
+    args = parser.parse_args()
+    game = Game(args.world, args.draw)
     game.run()
\ No newline at end of file
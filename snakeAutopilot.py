@@ -0,0 +1,314 @@
+import heapq
+from collections import deque
+
+# Autopilot for snake.py soak tests.
+#
+# Cells are stored as ints (y * width + x) and the board occupancy is a
+# bytearray that is patched at the head and tail every tick instead of
+# being rebuilt. Each tick the bot:
+#   1. follows its cached path to the food if the next step is still free
+#      and safe,
+#   2. otherwise resumes a bounded A* search (at most `max_expansions`
+#      nodes per tick) that runs backwards from the food towards the head,
+#      so half-finished searches stay valid while the head moves,
+#   3. otherwise falls back to the Hamiltonian cycle (or to chasing its
+#      tail when the board has no cycle).
+#
+# Moves off the path are checked against the cycle: the body always lies
+# between tail and head in cycle order, so taking the next cycle cell is
+# always safe and shortcuts are only allowed when they stay inside that
+# window. That is what lets the bot fill the whole board.
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+MAX_EXPANSIONS = 1000
+SHORTCUT_MARGIN = 2
+
+
+def build_hamiltonian_cycle(width, height):
+    """Cell order for a closed tour of the board, or None if none exists"""
+    if width < 2 or height < 2 or (width % 2 and height % 2):
+        return None
+
+    transpose = height % 2 == 1
+    if transpose:
+        width, height = height, width
+
+    # Serpentine through columns 1..width-1, then return up column 0
+    tour = []
+    for y in range(height):
+        xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        for x in xs:
+            tour.append((x, y))
+    for y in range(height - 1, -1, -1):
+        tour.append((0, y))
+
+    if transpose:
+        tour = [(y, x) for x, y in tour]
+        width, height = height, width
+
+    order = [0] * (width * height)
+    for index, (x, y) in enumerate(tour):
+        order[y * width + x] = index
+    return order
+
+
+class Autopilot:
+    def __init__(self, width, height, max_expansions=MAX_EXPANSIONS):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.max_expansions = max_expansions
+
+        self.order = build_hamiltonian_cycle(width, height)
+        if self.order is not None:
+            self.cycle = [0] * self.size
+            for cell, index in enumerate(self.order):
+                self.cycle[index] = cell
+
+        # Neighbour table so the search never re-checks board edges
+        self.neighbours = []
+        for cell in range(self.size):
+            x, y = cell % width, cell // width
+            self.neighbours.append([(y + dy) * width + x + dx for dx, dy in DIRECTIONS
+                                    if 0 <= x + dx < width and 0 <= y + dy < height])
+
+        self.occupied = bytearray(self.size)
+        self.body = deque()
+        self.cycle_safe = False
+        self.food = None
+        self.path = deque()
+        self.search = None
+
+        # Stats for soak runs
+        self.ticks = 0
+        self.path_moves = 0
+        self.fallback_moves = 0
+        self.searches_started = 0
+        self.expansions = 0
+        self.max_tick_expansions = 0
+
+    def cell(self, position):
+        return position[1] * self.width + position[0]
+
+    def position(self, cell):
+        return (cell % self.width, cell // self.width)
+
+    def cycle_distance(self, start, end):
+        return (self.order[end] - self.order[start]) % self.size
+
+    def sync(self, positions):
+        """Patch occupancy from the snake's new positions, O(1) per tick"""
+        body = self.body
+        head = self.cell(positions[0])
+        if body and body[0] == head and len(body) == len(positions):
+            return
+        if body and head in self.neighbours[body[0]] and 0 <= len(positions) - len(body) <= 1:
+            body.appendleft(head)
+            self.occupied[head] = 1
+            while len(body) > len(positions):
+                self.occupied[body.pop()] = 0
+            if body[-1] == self.cell(positions[-1]):
+                return
+        self.rebuild(positions)
+
+    def rebuild(self, positions):
+        self.occupied = bytearray(self.size)
+        self.body = deque(self.cell(p) for p in positions)
+        for cell in self.body:
+            self.occupied[cell] = 1
+        self.path.clear()
+        self.search = None
+        self.cycle_safe = self.order is not None and self.body_inside_cycle_window()
+
+    def body_inside_cycle_window(self):
+        head, tail = self.body[0], self.body[-1]
+        span = self.cycle_distance(tail, head)
+        return all(self.cycle_distance(tail, cell) <= span for cell in self.body)
+
+    def is_safe(self, cell, growing):
+        if self.occupied[cell]:
+            return False
+        if not self.cycle_safe:
+            return True
+        head, tail = self.body[0], self.body[-1]
+        step = self.cycle_distance(head, cell)
+        if step == 1:
+            return True
+        # No shortcuts once the snake covers half the board
+        if len(self.body) * 2 > self.size:
+            return False
+        # Head and tail are the same cell on a new snake; the whole cycle is free
+        free = self.cycle_distance(head, tail) if len(self.body) > 1 else self.size
+        return step < free - growing - SHORTCUT_MARGIN
+
+    def start_search(self, food):
+        self.searches_started += 1
+        self.search = {
+            'food': food,
+            # While the cycle invariant holds only search paths that move
+            # forward along the cycle; those can never cut across the body
+            'monotone': self.cycle_safe,
+            'open': [(0, 0, food)],
+            'came_from': {food: None},
+            'cost': {food: 0},
+            'counter': 1,
+        }
+
+    def resume_search(self, head):
+        """Run the backwards A* for one tick's budget; return a path or None"""
+        search = self.search
+        food = search['food']
+        monotone = search['monotone']
+        open_heap = search['open']
+        came_from = search['came_from']
+        cost = search['cost']
+        occupied = self.occupied
+        neighbours = self.neighbours
+        order = self.order
+        size = self.size
+        width = self.width
+        head_x, head_y = head % width, head // width
+        head_neighbours = neighbours[head]
+        if monotone:
+            food_order = order[food]
+            head_to_food = (food_order - order[head]) % size
+
+        expansions = 0
+        while open_heap and expansions < self.max_expansions:
+            _, _, current = heapq.heappop(open_heap)
+            expansions += 1
+            if current in head_neighbours and not occupied[current] and (
+                    not monotone or
+                    (order[current] - order[head]) % size + (food_order - order[current]) % size == head_to_food):
+                self.search = None
+                self.record_expansions(expansions)
+                path = deque()
+                while current is not None:
+                    path.append(current)
+                    current = came_from[current]
+                return path
+            next_cost = cost[current] + 1
+            if monotone:
+                current_to_food = (food_order - order[current]) % size
+            for neighbour in neighbours[current]:
+                if occupied[neighbour] or cost.get(neighbour, next_cost + 1) <= next_cost:
+                    continue
+                if monotone and (food_order - order[neighbour]) % size <= current_to_food:
+                    continue
+                cost[neighbour] = next_cost
+                came_from[neighbour] = current
+                estimate = next_cost + abs(neighbour % width - head_x) + abs(neighbour // width - head_y)
+                search['counter'] += 1
+                heapq.heappush(open_heap, (estimate, search['counter'], neighbour))
+
+        self.record_expansions(expansions)
+        if not open_heap:
+            # Food is walled off for now; try again once the tail has moved
+            self.search = None
+        return None
+
+    def record_expansions(self, expansions):
+        self.expansions += expansions
+        self.max_tick_expansions = max(self.max_tick_expansions, expansions)
+
+    def tail_chase(self, head, blocked):
+        """Bounded BFS towards the tail; returns the first step or None"""
+        tail = self.body[-1]
+        occupied = self.occupied
+        first_step = {}
+        queue = deque()
+        for neighbour in self.neighbours[head]:
+            if not occupied[neighbour] and neighbour != blocked:
+                first_step[neighbour] = neighbour
+                queue.append(neighbour)
+
+        expansions = 0
+        while queue and expansions < self.max_expansions:
+            current = queue.popleft()
+            expansions += 1
+            if tail in self.neighbours[current]:
+                self.record_expansions(expansions)
+                return first_step[current]
+            for neighbour in self.neighbours[current]:
+                if not occupied[neighbour] and neighbour not in first_step:
+                    first_step[neighbour] = first_step[current]
+                    queue.append(neighbour)
+        self.record_expansions(expansions)
+        return next(iter(first_step), None)
+
+    def next_direction(self, snake, food_position):
+        """Pick the direction for the coming tick"""
+        self.ticks += 1
+        self.sync(snake.positions)
+        head = self.body[0]
+        food = self.cell(food_position)
+        growing = 1 if snake.grow else 0
+
+        # Cell behind the head; change_direction ignores reversals anyway
+        dx, dy = snake.direction
+        head_x, head_y = self.position(head)
+        behind_x, behind_y = head_x - dx, head_y - dy
+        behind = behind_y * self.width + behind_x if 0 <= behind_x < self.width and 0 <= behind_y < self.height else -1
+
+        if food != self.food:
+            self.food = food
+            self.path.clear()
+            self.search = None
+
+        move = None
+        path = self.path
+        # Repair: drop cells we have already passed, then check the next step
+        while path and path[0] == head:
+            path.popleft()
+        if path and path[0] in self.neighbours[head] and path[0] != behind and self.is_safe(path[0], growing):
+            move = path.popleft()
+        else:
+            path.clear()
+            # Past half the board only the cycle itself is safe, so don't search
+            if not (self.cycle_safe and len(self.body) * 2 > self.size):
+                if self.search is None:
+                    self.start_search(food)
+                found = self.resume_search(head)
+                if found and found[0] != behind and self.is_safe(found[0], growing):
+                    move = found.popleft()
+                    self.path = found
+
+        if move is not None:
+            self.path_moves += 1
+        else:
+            self.fallback_moves += 1
+            move = self.fallback_move(head, behind, growing)
+            if move is None:
+                return snake.direction
+
+        move_x, move_y = self.position(move)
+        return (move_x - head_x, move_y - head_y)
+
+    def fallback_move(self, head, behind, growing):
+        if self.cycle_safe:
+            # Greedy shortcut towards the food along the cycle, else next cycle cell
+            best = None
+            best_distance = self.size
+            for neighbour in self.neighbours[head]:
+                if neighbour == behind or not self.is_safe(neighbour, growing):
+                    continue
+                distance = self.cycle_distance(neighbour, self.food)
+                if distance < best_distance:
+                    best, best_distance = neighbour, distance
+            if best is not None:
+                return best
+            next_cell = self.cycle[(self.order[head] + 1) % self.size]
+            if next_cell != behind and not self.occupied[next_cell]:
+                return next_cell
+        return self.tail_chase(head, behind)
+
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'path_moves': self.path_moves,
+            'fallback_moves': self.fallback_moves,
+            'searches': self.searches_started,
+            'expansions': self.expansions,
+            'max_tick_expansions': self.max_tick_expansions,
+            'cycle_safe': self.cycle_safe,
+        }
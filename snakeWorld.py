@@ -0,0 +1,107 @@
+import numpy as np
+
+# Sparse board for snake.py's large-world mode.
+#
+# The world is cut into CHUNK x CHUNK squares and only the squares the
+# snake is in get an occupancy array; a square is dropped again as soon as
+# the tail leaves it. Memory follows the snake, not the board, and drawing
+# only looks at the handful of chunks under the camera, so a 10,000 x
+# 10,000 board costs the same per frame as a 40 x 30 one.
+
+CHUNK = 32
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+class ChunkedBoard:
+    def __init__(self):
+        self.chunks = {}  # (chunk x, chunk y): CHUNK x CHUNK uint8 array, indexed [y][x]
+        self.counts = {}  # occupied cells per chunk
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __contains__(self, position):
+        x, y = position
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        return chunk is not None and chunk[y % CHUNK, x % CHUNK] != 0
+
+    def add(self, position):
+        x, y = position
+        key = (x // CHUNK, y // CHUNK)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = np.zeros((CHUNK, CHUNK), np.uint8)
+            self.counts[key] = 0
+        chunk[y % CHUNK, x % CHUNK] = 1
+        self.counts[key] += 1
+
+    def remove(self, position):
+        x, y = position
+        key = (x // CHUNK, y // CHUNK)
+        self.chunks[key][y % CHUNK, x % CHUNK] = 0
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.chunks[key], self.counts[key]
+
+    def clear(self):
+        self.chunks.clear()
+        self.counts.clear()
+
+    def cells_in(self, left, top, right, bottom):
+        """Occupied cells with left <= x < right and top <= y < bottom, as x and y arrays"""
+        xs = []
+        ys = []
+        for chunk_y in range(top // CHUNK, (bottom - 1) // CHUNK + 1):
+            for chunk_x in range(left // CHUNK, (right - 1) // CHUNK + 1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is not None:
+                    rows, cols = np.nonzero(chunk)
+                    xs.append(cols + chunk_x * CHUNK)
+                    ys.append(rows + chunk_y * CHUNK)
+        if not xs:
+            return np.empty(0, np.intp), np.empty(0, np.intp)
+        xs = np.concatenate(xs)
+        ys = np.concatenate(ys)
+        inside = (xs >= left) & (xs < right) & (ys >= top) & (ys < bottom)
+        return xs[inside], ys[inside]
+
+    def window(self, left, top, cols, rows):
+        """Occupancy of cols x rows cells from (left, top) as a (rows, cols) uint8 array"""
+        cells = np.zeros((rows, cols), np.uint8)
+        for chunk_y in range(top // CHUNK, (top + rows - 1) // CHUNK + 1):
+            for chunk_x in range(left // CHUNK, (left + cols - 1) // CHUNK + 1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is None:
+                    continue
+                # The overlap of this chunk and the window, in board cells
+                x0, y0 = max(left, chunk_x * CHUNK), max(top, chunk_y * CHUNK)
+                x1, y1 = min(left + cols, (chunk_x + 1) * CHUNK), min(top + rows, (chunk_y + 1) * CHUNK)
+                cells[y0 - top:y1 - top, x0 - left:x1 - left] = chunk[y0 - chunk_y * CHUNK:y1 - chunk_y * CHUNK,
+                                                                      x0 - chunk_x * CHUNK:x1 - chunk_x * CHUNK]
+        return cells
+
+    def memory(self):
+        """Bytes held by occupancy arrays"""
+        return len(self.chunks) * CHUNK * CHUNK
+
+
+class GreedyPilot:
+    """Autopilot for boards far too big for snakeAutopilot's full-board
+    search: steps towards the food without hitting a wall or the body.
+    It looks no further ahead than one cell, so it does get itself stuck."""
+
+    def __init__(self, board, width, height):
+        self.board = board
+        self.width = width
+        self.height = height
+
+    def next_direction(self, snake, food_position):
+        head_x, head_y = snake.positions[0]
+        options = []
+        for dx, dy in DIRECTIONS:
+            x, y = head_x + dx, head_y + dy
+            if (-dx, -dy) == snake.direction or not (0 <= x < self.width and 0 <= y < self.height):
+                continue
+            if (x, y) not in self.board:
+                options.append((abs(food_position[0] - x) + abs(food_position[1] - y), (dx, dy)))
+        return min(options)[1] if options else snake.direction
@@ -0,0 +1,150 @@
+import argparse
+import importlib
+import os
+import random
+import time
+
+# Game-state snapshots: every Game has snapshot(), returning the state that
+# decides what happens next packed into one bytes object, and
+# restore(data), which puts that state back. Cosmetic state (particles,
+# trails, stars, glow timers) is left out and simply carries on.
+#
+# Gameplay randomness comes from a GameRandom per game rather than the
+# global `random`: saving a Mersenne Twister means copying 625 words,
+# which alone costs more than a whole Brick Breaker snapshot, while
+# splitmix64 keeps its entire state in one 64-bit integer.
+
+MASK = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+class GameRandom(random.Random):
+    """random.Random driven by splitmix64; getstate() is a single int"""
+
+    def seed(self, a=None):
+        if a is None:
+            a = int.from_bytes(os.urandom(8), 'little')
+        self.state = a & MASK
+
+    def next64(self):
+        self.state = z = (self.state + GOLDEN_GAMMA) & MASK
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+        return z ^ (z >> 31)
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k):
+        if k <= 64:
+            return self.next64() >> (64 - k)
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self.next64() << shift
+        return bits & ((1 << k) - 1)
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+
+def time_round_trips(game, states, rounds):
+    """Mean seconds for one snapshot() plus one restore(), cycling through `states`"""
+    start = time.perf_counter()
+    for i in range(rounds):
+        game.snapshot()
+        game.restore(states[i % len(states)])
+    return (time.perf_counter() - start) / rounds
+
+
+def new_game(name, module):
+    """A Game set up to play itself, well enough to change its state"""
+    game = module.Game()
+    # Past the title screen, which is not part of a snapshot
+    if name == 'FlappyBirdClone':
+        game.game_started = True
+    elif name == 'SpaceShooter':
+        game.reset_game()
+    elif name == 'snake':
+        game.autopilot = module.Autopilot(module.GRID_WIDTH, module.GRID_HEIGHT)
+    return game
+
+
+def replay_matches(name, module, game, start, frames):
+    # Play on from a snapshot twice, the second time in a new Game, so any
+    # state snapshot() misses differs between the runs; both must end in
+    # the same state
+    game.restore(start)
+    for _ in range(frames):
+        game.update()
+    first = game.snapshot()
+    game = new_game(name, module)
+    game.restore(start)
+    for _ in range(frames):
+        game.update()
+    return game.snapshot() == first
+
+
+def bench_states(name, module, frames):
+    """(game, [snapshots]) for one game: a fresh board and one played for `frames` frames"""
+    if name == 'SpaceShooter':
+        # Fill the bullet pool and the swarm directly rather than playing
+        game = new_game(name, module)
+        game.reset_game('bullet_hell')
+        game.spawn_enemy()
+        for _ in range(frames):
+            game.update_enemy_bullets()
+        bullets = game.snapshot()
+        import pygame
+        from shooterSwarm import SPAWN_MARGIN
+        game.reset_game('swarm')
+        game.swarm.spawn_flock(2000, module.SCREEN_HEIGHT // 2, 0)
+        # The tail of a sine wave shot down behind the flock; the next wave,
+        # a flock, takes the slots it left
+        game.swarm.spawn_sine(30, module.SCREEN_HEIGHT // 3, 1)
+        game.swarm.hit_all(pygame.Rect(module.SCREEN_WIDTH + SPAWN_MARGIN, 0, 2000, module.SCREEN_HEIGHT))
+        game.swarm_waves = 2
+        for _ in range(frames // 10):
+            game.swarm.update(game.player.get_rect().center)
+        return game, [bullets, game.snapshot()]
+
+    game = new_game(name, module)
+    fresh = game.snapshot()
+    for frame in range(frames):
+        # Just enough play to keep the game going and change its state
+        if name == 'BrickBreaker' and len(game.balls):
+            game.paddle.x = int(game.balls.x[0]) - game.paddle.width // 2
+        elif name == 'FlappyBirdClone' and frame % 20 == 0:
+            game.bird.jump()
+        game.update()
+    return game, [fresh, game.snapshot()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time game-state snapshot and restore")
+    parser.add_argument('games', nargs='*', default=['BrickBreaker', 'snake', 'pongGame', 'FlappyBirdClone',
+                                                     'SpaceShooter'])
+    parser.add_argument('--rounds', type=int, default=20000)
+    parser.add_argument('--frames', type=int, default=600, help="frames played before the second snapshot")
+    args = parser.parse_args()
+
+    # The games open a window when constructed; nothing needs to be shown
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    for name in args.games:
+        module = importlib.import_module(name)
+        game, states = bench_states(name, module, args.frames)
+        seconds = time_round_trips(game, states, args.rounds)
+        sizes = '/'.join(str(len(state)) for state in states)
+        line = f"{name:16s} snapshot+restore: {seconds * 1e6:7.2f} us   size: {sizes} bytes"
+        if hasattr(game, 'update'):
+            # From every state, so SpaceShooter replays both bullet-hell and swarm
+            matches = all(replay_matches(name, module, game, state, args.frames) for state in states)
+            line += f"   replay: {'ok' if matches else 'MISMATCH'}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
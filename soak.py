@@ -0,0 +1,321 @@
+import argparse
+import importlib
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pygame
+
+import engine
+import scheduler
+
+# Long headless sessions that catch slow leaks before a kiosk does.
+#
+# One game is played for hours as fast as it will go, by a bot or by
+# random input, restarting whenever it ends, with its update() and draw()
+# exactly as run() calls them. Every --interval seconds a sample records
+# the memory tracemalloc traces, the p50/p99 frame time over the interval
+# and a census of the game: the length of every list, dict and deque on
+# the Game, on the objects it holds and on the items of its lists (so
+# bird.particles or enemies[].engine_particles, summed over the enemies),
+# plus the engine's caches. The first sample after --warmup is the
+# baseline. The run fails when traced memory has grown past --max-growth
+# or p99 frame time past --max-p99 times the baseline's, for --patience
+# samples in a row, and then shows which allocation sites grew.
+#
+# Each frame ends in scheduler.idle() with the budget run() gives it, so
+# garbage is collected the way it is in play: automatic collection off
+# and the scheduler's collections in the slack. ARCADE_GC=auto soaks
+# Python's own collector instead.
+#
+# Quality never adapts here (quality.update is not fed), so effects stay
+# at full detail throughout. Frame times include tracemalloc's own
+# overhead, which is why drift is judged against a baseline taken under
+# the same conditions.
+
+GAMES = ['BrickBreaker', 'FlappyBirdClone', 'snake', 'pongGame', 'SpaceShooter']
+FRAME_RATES = {'snake': 10}  # what each run() passes to engine.wait_frame; 60 otherwise
+INPUTS = ['bot', 'random']
+
+DEFAULT_INTERVAL = 60  # seconds between samples
+DEFAULT_WARMUP = 120  # seconds before the baseline, while caches fill
+MAX_GROWTH = 16  # MB of traced memory over the baseline
+MAX_P99 = 1.5  # p99 frame time over the baseline's
+PATIENCE = 3  # samples in a row over a threshold before failing
+TOP_SITES = 10
+CELEBRATION_FRAMES = 180  # Pong: frames the win screen stays up before a rematch
+
+
+def census(obj, prefix='', depth=2):
+    """{attribute path: length} for every container reachable from `obj`"""
+    counts = {}
+    for name, value in vars(obj).items():
+        if isinstance(value, (list, dict, deque, set)):
+            counts[prefix + name] = len(value)
+            if depth and isinstance(value, list):
+                # Containers on the items, summed over the list
+                for item in value:
+                    if hasattr(item, '__dict__'):
+                        for path, count in census(item, f"{prefix}{name}[].", 0).items():
+                            counts[path] = counts.get(path, 0) + count
+        elif depth and hasattr(value, '__dict__') and not isinstance(value, type):
+            counts.update(census(value, prefix + name + '.', depth - 1))
+    return counts
+
+
+def engine_census():
+    return {'engine sprites': len(engine._sprites), 'engine fonts': len(engine._fonts)}
+
+
+def driver(name, module, game, style, rng):
+    """Set `game` up to play itself; returns step(frame), which gives it
+    the frame's input (restarting it once it is over) and updates it"""
+    if name == 'BrickBreaker':
+        target = [game.paddle.x]
+
+        def steer(frame):
+            if game.game_over:
+                game.reset_game()
+            paddle = game.paddle
+            if style == 'bot':
+                if len(game.balls):
+                    paddle.x = int(game.balls.x[0]) - paddle.width // 2
+                return
+            # Wander to a new spot now and then, at paddle speed
+            if frame % 30 == 0:
+                target[0] = rng.randrange(module.SCREEN_WIDTH - paddle.width)
+            paddle.x += max(-paddle.speed, min(paddle.speed, target[0] - paddle.x))
+    elif name == 'FlappyBirdClone':
+        game.game_started = True
+
+        def steer(frame):
+            if game.game_over:
+                game.reset_game()
+                game.game_started = True
+            bird = game.bird
+            if style == 'random':
+                if rng.random() < 0.06:
+                    bird.jump()
+                return
+            ahead = [pipe for pipe in game.pipes if pipe.x + pipe.width > bird.x - bird.size]
+            target = ahead[0].gap_y + 30 if ahead else module.SCREEN_HEIGHT // 2
+            if bird.y > target and bird.velocity > 0:
+                bird.jump()
+    elif name == 'snake':
+        if style == 'bot':
+            game.autopilot = module.Autopilot(module.GRID_WIDTH, module.GRID_HEIGHT)
+
+        def steer(frame):
+            if game.game_over:
+                game.reset_game()
+            if style == 'random' and rng.random() < 0.2:
+                game.snake.change_direction(rng.choice([(0, -1), (0, 1), (-1, 0), (1, 0)]))
+    elif name == 'pongGame':
+        won_at = [None]
+
+        def steer(frame):
+            if game.winner:
+                # Let the win screen run a while, then a rematch
+                if won_at[0] is None:
+                    won_at[0] = frame
+                elif frame - won_at[0] >= CELEBRATION_FRAMES:
+                    game.reset_game()
+                    won_at[0] = None
+                return
+            for paddle in (game.player1, game.player2):
+                if style == 'random':
+                    move = rng.choice((-1, 0, 1))
+                else:
+                    offset = game.ball.y - (paddle.y + paddle.height / 2)
+                    move = -1 if offset < -4 else 1 if offset > 4 else 0
+                if move < 0:
+                    paddle.move_up()
+                elif move > 0:
+                    paddle.move_down()
+    else:
+        # Every mode in turn; the bots are shooterBalance's
+        from shooterBalance import HunterBot, KEYS
+        bot = HunterBot(rng)
+        game.reset_game(module.MODES[0])
+
+        def steer(frame):
+            if game.game_over:
+                game.reset_game(module.MODES[(module.MODES.index(game.mode) + 1) % len(module.MODES)])
+            if style == 'bot':
+                return bot.keys(game)
+            return {key: rng.random() < 0.5 for key in KEYS}
+
+        # It takes its keys (and the clock) through update()
+        return lambda frame: game.update(steer(frame), frame * 1000 // module.FPS)
+
+    def step(frame):
+        steer(frame)
+        game.update()
+    return step
+
+
+class Sample:
+    def __init__(self, elapsed, frames, memory, frame_times, counts):
+        self.elapsed = elapsed
+        self.frames = frames
+        self.memory = memory
+        self.p50, self.p99 = np.percentile(frame_times, (50, 99)) if frame_times else (0.0, 0.0)
+        self.counts = counts
+
+
+class Soak:
+    def __init__(self, name, style, seed, interval, warmup, max_growth, max_p99, patience):
+        self.name = name
+        self.module = importlib.import_module(name)
+        self.game = self.module.Game()
+        self.step = driver(name, self.module, self.game, style, random.Random(seed))
+        random.seed(seed)
+        self.budget = 1 / FRAME_RATES.get(name, 60)
+        self.interval = interval
+        self.warmup = warmup
+        self.max_growth = max_growth
+        self.max_p99 = max_p99
+        self.patience = patience
+        self.baseline = None
+        self.baseline_trace = None
+        self.samples = []
+        self.strikes = 0
+        self.failure = None
+
+    def play_frame(self, frame):
+        pygame.event.pump()
+        self.step(frame)
+        self.game.draw()
+        if self.name == 'BrickBreaker':
+            # Its draw() leaves the flip to run()
+            engine.flip()
+
+    def run(self, seconds):
+        tracemalloc.start()
+        started = time.perf_counter()
+        next_sample = started + self.interval
+        frame = 0
+        frame_times = []
+        while True:
+            began = time.perf_counter()
+            self.play_frame(frame)
+            now = time.perf_counter()
+            frame_times.append(now - began)
+            # The slack, as engine.wait_frame() gives it; the first frame freezes start-up
+            scheduler.idle(began if frame else None, self.budget)
+            frame += 1
+            if now < next_sample:
+                continue
+
+            counts = census(self.game)
+            counts.update(engine_census())
+            sample = Sample(now - started, frame, tracemalloc.get_traced_memory()[0], frame_times, counts)
+            frame_times = []
+            self.add(sample)
+            if self.failure or now - started >= seconds:
+                break
+            next_sample = time.perf_counter() + self.interval
+        self.report()
+        scheduler.stop()
+        tracemalloc.stop()
+        return self.failure is None
+
+    def add(self, sample):
+        self.samples.append(sample)
+        if self.baseline is None:
+            if sample.elapsed >= self.warmup:
+                self.baseline = sample
+                self.baseline_trace = tracemalloc.take_snapshot()
+                # Which is itself traced, and kept to the end
+                sample.memory = tracemalloc.get_traced_memory()[0]
+            self.print_sample(sample)
+            return
+
+        growth = (sample.memory - self.baseline.memory) / 2 ** 20
+        slowdown = sample.p99 / self.baseline.p99 if self.baseline.p99 else 1.0
+        reasons = []
+        if growth > self.max_growth:
+            reasons.append(f"traced memory {growth:+.1f} MB over the baseline")
+        if slowdown > self.max_p99:
+            reasons.append(f"p99 frame time {slowdown:.2f}x the baseline's")
+        self.strikes = self.strikes + 1 if reasons else 0
+        self.print_sample(sample, growth, slowdown)
+        if self.strikes >= self.patience:
+            self.failure = "; ".join(reasons)
+
+    def print_sample(self, sample, growth=None, slowdown=None):
+        line = (f"{sample.elapsed / 60:7.1f} min {sample.frames:>10,} frames  traced {sample.memory / 2 ** 20:7.1f} MB"
+                f"  p50 {sample.p50 * 1000:6.2f} ms  p99 {sample.p99 * 1000:6.2f} ms")
+        if growth is None:
+            line += "  (baseline)" if sample is self.baseline else "  (warming up)"
+        else:
+            line += f"  {growth:+6.1f} MB  p99 x{slowdown:.2f}" + ("  !" if self.strikes else "")
+        print(line, flush=True)
+
+    def report(self):
+        print()
+        if self.baseline is None:
+            print("finished before the warm-up; nothing to compare")
+            return
+        last = self.samples[-1]
+
+        # Containers by how much they grew, peak of the run against the baseline
+        peaks = {}
+        for sample in self.samples[self.samples.index(self.baseline):]:
+            for path, count in sample.counts.items():
+                peaks[path] = max(peaks.get(path, 0), count)
+        print(f"{'CONTAINER':<40}{'BASELINE':>10}{'PEAK':>10}{'NOW':>10}")
+        rows = sorted(peaks, key=lambda path: peaks[path] - self.baseline.counts.get(path, 0), reverse=True)
+        for path in rows[:TOP_SITES]:
+            print(f"{path:<40}{self.baseline.counts.get(path, 0):>10,}{peaks[path]:>10,}{last.counts.get(path, 0):>10,}")
+
+        # Where the memory that appeared since the baseline was allocated
+        print("\nallocation sites since the baseline:")
+        ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        trace = tracemalloc.take_snapshot().filter_traces(ignore)
+        grown = [stat for stat in trace.compare_to(self.baseline_trace.filter_traces(ignore), 'lineno')
+                 if stat.size_diff > 0]
+        for stat in grown[:TOP_SITES]:
+            print(f"  {stat}")
+        if not grown:
+            print("  none")
+
+        print()
+        print(scheduler.report())
+        if self.failure:
+            print(f"FAIL after {last.elapsed / 60:.1f} min: {self.failure}")
+        else:
+            print(f"ok: {last.elapsed / 60:.1f} min, {last.frames:,} frames, "
+                  f"{(last.memory - self.baseline.memory) / 2 ** 20:+.1f} MB since the baseline")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a game headless for hours and fail on memory or frame-time drift")
+    parser.add_argument('game', choices=GAMES)
+    parser.add_argument('--hours', type=float, default=1.0)
+    parser.add_argument('--input', choices=INPUTS, default='bot')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="seconds between samples")
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP, help="seconds before the baseline sample")
+    parser.add_argument('--max-growth', type=float, default=MAX_GROWTH, help="MB of traced memory over the baseline")
+    parser.add_argument('--max-p99', type=float, default=MAX_P99, help="p99 frame time as a multiple of the baseline's")
+    parser.add_argument('--patience', type=int, default=PATIENCE, help="samples in a row over a threshold to fail")
+    args = parser.parse_args()
+
+    # Nothing needs to be shown
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    soak = Soak(args.game, args.input, args.seed, args.interval, args.warmup, args.max_growth, args.max_p99,
+                args.patience)
+    print(f"Soaking {args.game} with {args.input} input for {args.hours:g} h, a sample every {args.interval:g} s")
+    passed = soak.run(args.hours * 3600)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
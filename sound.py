@@ -0,0 +1,194 @@
+import time
+
+import numpy as np
+import pygame
+
+# Sound effects for every game, synthesized at start-up.
+#
+# start() opens the mixer with a small buffer and builds every effect as a
+# NumPy waveform turned into a pygame Sound once, so playing one later is
+# only a Channel.play() on memory that already exists. The mixer gets a
+# fixed pool of CHANNELS channels, picked by hand rather than by
+# Sound.play(): an effect never has more than its own voice limit going at
+# once (a new one restarts the oldest of them), and when every channel is
+# busy it takes over the oldest voice of an equal or lower priority effect.
+# When there is none of those it is dropped and counted, never queued, so
+# a burst of brick breaks or gunfire cannot hold up a frame.
+#
+# Like scores.py, nothing happens until a game's run() calls start();
+# headless tools that drive update() directly stay silent. It works with
+# SDL_AUDIODRIVER=dummy, where the mixer runs without a device.
+
+RATE = 44100
+BUFFER = 256  # samples per mixer callback; 5.8 ms at 44.1 kHz
+CHANNELS = 16
+VOLUME = 0.35  # peak amplitude of every effect
+
+# Effect: (voice limit, priority). A busy mixer steals from equal or lower priority
+EFFECTS = {
+    'paddle': (2, 2),
+    'wall': (2, 1),
+    'brick': (4, 1),
+    'powerup': (1, 2),
+    'score': (1, 3),
+    'eat': (1, 2),
+    'flap': (2, 2),
+    'shot': (4, 1),
+    'hit': (2, 2),
+    'explosion': (4, 2),
+    'crash': (1, 3),
+}
+
+_sounds = None
+_channels = []
+_owners = []  # effect playing on each channel
+_ages = []  # when it started, as a count of play() calls
+_plays = 0
+stats = {'played': 0, 'stolen': 0, 'dropped': 0, 'worst_play': 0.0}
+mixer_latency = 0.0  # seconds of audio in one mixer buffer
+
+
+def envelope(n, decay):
+    # Instant attack, exponential release over `decay` seconds
+    return np.exp(-np.arange(n) / (decay * RATE))
+
+
+def sweep(seconds, start, end, shape=np.sin):
+    """A tone gliding from `start` to `end` Hz"""
+    n = int(seconds * RATE)
+    frequency = np.linspace(start, end, n)
+    return shape(2 * np.pi * np.cumsum(frequency) / RATE)
+
+
+def square(phase):
+    return np.sign(np.sin(phase))
+
+
+def noise(seconds, smooth=1, seed=0):
+    # White noise, low-passed by a moving average of `smooth` samples
+    samples = np.random.default_rng(seed).uniform(-1, 1, int(seconds * RATE))
+    if smooth > 1:
+        samples = np.convolve(samples, np.ones(smooth) / smooth, 'same')
+        samples /= np.abs(samples).max()
+    return samples
+
+
+def synthesize(name):
+    """Effect `name` as float samples in -1..1"""
+    if name == 'paddle':
+        wave = sweep(0.07, 440, 420, square) * 0.6
+        return wave * envelope(len(wave), 0.02)
+    if name == 'wall':
+        wave = sweep(0.05, 330, 330, square) * 0.5
+        return wave * envelope(len(wave), 0.015)
+    if name == 'brick':
+        wave = sweep(0.08, 660, 990)
+        return wave * envelope(len(wave), 0.03)
+    if name == 'powerup':
+        wave = sweep(0.25, 400, 1200, square) * 0.5
+        return wave * np.linspace(1, 0, len(wave))
+    if name == 'score':
+        notes = [sweep(0.07, tone, tone) for tone in (523, 659, 784)]
+        return np.concatenate([note * envelope(len(note), 0.05) for note in notes])
+    if name == 'eat':
+        wave = sweep(0.06, 880, 1320)
+        return wave * envelope(len(wave), 0.02)
+    if name == 'flap':
+        wave = sweep(0.08, 200, 450) * 0.7 + noise(0.08, 8, 1) * 0.3
+        return wave * envelope(len(wave), 0.025)
+    if name == 'shot':
+        wave = sweep(0.09, 1400, 300, square) * 0.4
+        return wave * envelope(len(wave), 0.03)
+    if name == 'hit':
+        wave = sweep(0.12, 180, 120, square) * 0.5
+        return wave * envelope(len(wave), 0.05)
+    if name == 'explosion':
+        wave = noise(0.45, 24, 2)
+        return wave * envelope(len(wave), 0.12)
+    if name == 'crash':
+        wave = noise(0.6, 12, 3) * 0.6 + sweep(0.6, 110, 55) * 0.4
+        return wave * envelope(len(wave), 0.2)
+    raise KeyError(name)
+
+
+def start():
+    """Open the mixer and build every effect (once). Without an audio
+    device the games just stay silent"""
+    global _sounds, mixer_latency
+    if _sounds is not None:
+        return
+    try:
+        pygame.mixer.init(RATE, -16, 2, BUFFER)
+    except pygame.error as error:
+        print(f"sound: {error}; playing without sound")
+        _sounds = {}
+        return
+    rate, _, channels = pygame.mixer.get_init()
+    mixer_latency = BUFFER / rate
+    pygame.mixer.set_num_channels(CHANNELS)
+    _channels[:] = [pygame.mixer.Channel(i) for i in range(CHANNELS)]
+    _owners[:] = [None] * CHANNELS
+    _ages[:] = [0] * CHANNELS
+
+    sounds = {}
+    for name in EFFECTS:
+        wave = synthesize(name)
+        if rate != RATE:
+            # The device insisted on its own rate; resample
+            wave = np.interp(np.arange(0, len(wave), RATE / rate), np.arange(len(wave)), wave)
+        samples = (wave * VOLUME * 32767).astype(np.int16)
+        if channels > 1:
+            samples = np.repeat(samples[:, None], channels, axis=1)
+        sounds[name] = pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+    _sounds = sounds
+
+
+def play(name):
+    """Start effect `name` on a pool channel, or count it as dropped"""
+    global _plays
+    if not _sounds:
+        return
+    began = time.perf_counter()
+    limit, priority = EFFECTS[name]
+    voices = 0
+    same = free = victim = None
+    for index, channel in enumerate(_channels):
+        if not channel.get_busy():
+            if free is None:
+                free = index
+        elif _owners[index] == name:
+            voices += 1
+            if same is None or _ages[index] < _ages[same]:
+                same = index
+        elif EFFECTS[_owners[index]][1] <= priority:
+            if victim is None or ((EFFECTS[_owners[index]][1], _ages[index]) <
+                                  (EFFECTS[_owners[victim]][1], _ages[victim])):
+                victim = index
+
+    if voices >= limit:
+        index = same
+        stats['stolen'] += 1
+    elif free is not None:
+        index = free
+    elif victim is not None:
+        index = victim
+        stats['stolen'] += 1
+    else:
+        stats['dropped'] += 1
+        return
+    _channels[index].play(_sounds[name])
+    _owners[index] = name
+    _plays += 1
+    _ages[index] = _plays
+    stats['played'] += 1
+    stats['worst_play'] = max(stats['worst_play'], time.perf_counter() - began)
+
+
+def report():
+    if _sounds is None:
+        return "sound off"
+    if not _sounds:
+        return "sound: no audio device"
+    busy = sum(channel.get_busy() for channel in _channels)
+    return (f"sound {mixer_latency * 1000:.1f} ms buffer  voices {busy}/{CHANNELS}  played {stats['played']}  "
+            f"stolen {stats['stolen']}  dropped {stats['dropped']}  worst play {stats['worst_play'] * 1e6:.0f} us")
@@ -0,0 +1,75 @@
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold-start timing for each game. Every run happens in a fresh Python
+# process so nothing is already imported or initialised, and the child
+# stops right after the game's first pygame.display.flip().
+
+GAMES = ['snake', 'pongGame', 'BrickBreaker', 'FlappyBirdClone', 'SpaceShooter']
+STAGES = ['import', 'init', 'first_frame', 'first_flip']
+
+
+def measure_child(module_name):
+    start = time.perf_counter()
+    import engine
+    module = importlib.import_module(module_name)
+    imported = time.perf_counter()
+
+    game = module.Game()
+    initialised = time.perf_counter()
+
+    engine.stop_after_first_flip = True
+    try:
+        game.run()
+    except engine.FirstFlip:
+        pass
+
+    # Each stage is reported as the time since the previous one, in ms
+    times = {
+        'import': imported - start,
+        'init': initialised - imported,
+        'first_frame': engine.startup_marks['first_frame'] - initialised,
+        'first_flip': engine.startup_marks['first_flip'] - engine.startup_marks['first_frame'],
+    }
+    print(json.dumps({stage: value * 1000 for stage, value in times.items()}))
+
+
+def measure(module_name, headless):
+    env = dict(os.environ)
+    if headless:
+        env['SDL_VIDEODRIVER'] = 'dummy'
+    env['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    output = subprocess.run([sys.executable, __file__, '--child', module_name],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of each game")
+    parser.add_argument('games', nargs='*', default=GAMES)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--headless', action='store_true', help="use SDL's dummy video driver")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(args.child)
+        return
+
+    print(f"{'GAME':<18}" + ''.join(f"{stage.upper():>13}" for stage in STAGES) + f"{'TOTAL':>13}")
+    for module_name in args.games:
+        runs = [measure(module_name, args.headless) for _ in range(args.runs)]
+        medians = [statistics.median(run[stage] for run in runs) for stage in STAGES]
+        print(f"{module_name:<18}" + ''.join(f"{value:>10.1f} ms" for value in medians) +
+              f"{sum(medians):>10.1f} ms")
+    print(f"(median of {args.runs} cold starts)")
+
+
+if __name__ == "__main__":
+    main()